@@ -2,7 +2,9 @@
 
 echo "Applying database migrations..."
 python manage.py migrate --noinput
-python manage.py import_base_exercises
+
+# Базовые упражнения загружаются отдельным шагом деплоя, а не при каждом запуске:
+# docker compose run --rm nutrition python manage.py import_base_exercises
 
 echo "Starting server..."
 exec "$@"
\ No newline at end of file
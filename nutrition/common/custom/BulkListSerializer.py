@@ -0,0 +1,59 @@
+from rest_framework import serializers
+from common.custom.BulkPrimaryKeyRelatedField import BulkPrimaryKeyRelatedField
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Пакетная валидация списка записей. Связанные объекты всех записей загружаются заранее
+    одним запросом на каждое поле BulkPrimaryKeyRelatedField.
+    Для обновления передаётся queryset записей, элементы данных сопоставляются по id.
+    """
+
+    # Разрешены ли при обновлении элементы без id (новые записи)
+    allow_create_on_update = False
+
+    def _prefetch_related_objects(self, data):
+        items = [item for item in data if isinstance(item, dict)]
+        self.context["bulk_related_objects"] = {
+            name: field.prefetch(
+                item[name] for item in items if item.get(name) is not None
+            )
+            for name, field in self.child.fields.items()
+            if isinstance(field, BulkPrimaryKeyRelatedField) and not field.read_only
+        }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._prefetch_related_objects(data)
+            if self.instance is not None:
+                ids = [
+                    item.get("id")
+                    for item in data
+                    if isinstance(item, dict) and item.get("id") is not None
+                ]
+                if len(ids) != len(set(ids)):
+                    raise serializers.ValidationError(
+                        {"id": "Записи в пакете не должны повторяться."}
+                    )
+                self._instances = {obj.pk: obj for obj in self.instance}
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        pk = data.get("id") if isinstance(data, dict) else None
+        if pk is None and self.allow_create_on_update:
+            self.child.instance = None
+            self.child.initial_data = data
+            return super().run_child_validation(data)
+
+        instance = self._instances.get(pk)
+        if instance is None:
+            raise serializers.ValidationError(
+                {"id": "Объект не существует или вам не принадлежит"}
+            )
+        self.child.instance = instance
+        self.child.initial_data = data
+        attrs = super().run_child_validation(data)
+        return {**attrs, "id": instance.pk}
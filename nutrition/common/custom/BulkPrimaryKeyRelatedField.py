@@ -0,0 +1,50 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from typing import Any, Dict, Iterable
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле для пакетной валидации: ListSerializer заранее загружает объекты всех записей
+    одним запросом (prefetch) и кладёт их в context["bulk_related_objects"][field_name],
+    поле берёт объект оттуда вместо отдельного запроса на каждую запись.
+    """
+
+    def __init__(self, **kwargs):
+        self.bulk_prefetch_related = kwargs.pop("bulk_prefetch_related", ())
+        super().__init__(**kwargs)
+
+    def _to_pk(self, data):
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def prefetch(self, values: Iterable) -> Dict[Any, Any]:
+        """Загружает объекты по переданным значениям поля одним запросом."""
+        pks = set()
+        for value in values:
+            if isinstance(value, bool):
+                continue
+            try:
+                pks.add(self._to_pk(value))
+            except (DjangoValidationError, TypeError, ValueError):
+                continue
+        queryset = self.get_queryset()
+        if self.bulk_prefetch_related:
+            queryset = queryset.prefetch_related(*self.bulk_prefetch_related)
+        return queryset.in_bulk(pks)
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("bulk_related_objects", {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = self._to_pk(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        obj = prefetched.get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
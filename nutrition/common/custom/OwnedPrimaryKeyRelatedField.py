@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from common.custom.BulkPrimaryKeyRelatedField import BulkPrimaryKeyRelatedField
 
 
-class OwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+class OwnedPrimaryKeyRelatedField(BulkPrimaryKeyRelatedField):
     """Кастомное поле для проверки принадлежности объекта пользователю"""
 
     def __init__(self, **kwargs):
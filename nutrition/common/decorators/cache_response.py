@@ -1,10 +1,121 @@
 from functools import wraps
 from rest_framework.response import Response
+from django.conf import settings
 from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from common.utils.CacheHelper import CacheHelper
 from common.utils.CacheKeyBuilder import CacheKeyBuilder
+from common.utils.LocalLRUCache import LocalLRUCache
+from typing import Any, NamedTuple, Optional
+import random
+import math
+import time
+import gzip
 
+# Локальный уровень кэша для global-записей: ключи содержат версию,
+# поэтому bump_cache_version инвалидирует и его
+local_cache = LocalLRUCache(
+    settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_MAX_TTL
+)
+
+# Время жизни блокировки пересчёта и максимальное ожидание чужого пересчёта (сек)
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheEntry(NamedTuple):
+    data: Any
+    expires_at: float
+    # Сколько секунд занял пересчёт (для вероятностного раннего истечения)
+    delta: float
+    # ETag версии, для которой посчитано значение (важно при отдаче устаревшего)
+    etag: str
+
+
+class RenderedResponse(NamedTuple):
+    """Готовый ответ: сжатое gzip тело и его Content-Type."""
+
+    content: bytes
+    content_type: str
+
+
+def _render_response(view, request, response: Response) -> RenderedResponse:
+    """Рендерит Response выбранным рендерером и сжимает результат для хранения в кэше."""
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    response.render()
+
+    return RenderedResponse(
+        gzip.compress(response.content, mtime=0),
+        response["Content-Type"],
+    )
+
+
+def _build_response(request, data: Any, etag: str):
+    """Возвращает ответ из закэшированного значения (готовые байты или данные для DRF)."""
+    if not isinstance(data, RenderedResponse):
+        return Response(data, headers={"ETag": etag})
+
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(data.content, content_type=data.content_type)
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(
+            gzip.decompress(data.content), content_type=data.content_type
+        )
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def _expires_early(entry: CacheEntry, beta: float) -> bool:
+    """
+    Вероятностное раннее истечение (XFetch): чем ближе конец TTL и чем дольше пересчёт,
+    тем выше шанс, что один из запросов обновит запись заранее.
+    """
+    return (
+        time.time() - entry.delta * beta * math.log(1.0 - random.random())
+        >= entry.expires_at
+    )
+
+
+def _wait_for_entry(cache_key: str) -> Optional[CacheEntry]:
+    """Ждёт, пока другой воркер, держащий блокировку, положит значение в кэш."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+        if isinstance(entry, CacheEntry):
+            return entry
+    return None
+
+
+def cache_response(
+    *,
+    entity: str,
+    ttl: int,
+    per_user=False,
+    stale_ttl: Optional[int] = None,
+    early_expiry_beta: float = 1.0,
+    rendered: bool = True,
+):
+    """
+    Кэширует ответ view с защитой от одновременного пересчёта (stampede):
+    - пересчитывает значение только тот воркер, который взял блокировку ключа;
+    - остальные отдают устаревшее значение (stale-while-revalidate) или ждут пересчёта;
+    - запись может быть обновлена заранее до истечения TTL (early_expiry_beta=0 отключает).
+    Устаревшее значение хранится stale_ttl секунд (по умолчанию 2 * ttl).
+    При rendered=True JSON-ответы хранятся готовыми сжатыми байтами и при попадании
+    в кэш отдаются без повторного рендеринга DRF.
+    ETag ответа строится по ключу кэша (версия сущности + параметры запроса),
+    поэтому If-None-Match обрабатывается ответом 304 без чтения кэша и БД.
+    """
+    if stale_ttl is None:
+        stale_ttl = ttl * 2
 
-def cache_response(*, entity: str, ttl: int, per_user=False):
     def decorator(view_method):
         @wraps(view_method)
         def wrapper(self, request, *args, **kwargs):
@@ -18,7 +129,7 @@ def cache_response(*, entity: str, ttl: int, per_user=False):
             extra = {k: v for k, v in kwargs.items() if k.endswith("_pk")}
 
             if "pk" in kwargs:
-                cache_key = builder.build(
+                key_params = dict(
                     scope="detail",
                     extra={"pk": kwargs["pk"], **extra},
                 )
@@ -36,21 +147,72 @@ def cache_response(*, entity: str, ttl: int, per_user=False):
                 if date_query:
                     filters["date"] = [date_query]
 
-                cache_key = builder.build(
+                key_params = dict(
                     scope="list",
                     filters=filters,
                     page=request.query_params.get("page"),
                     extra=extra or None,
                 )
 
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return Response(cached)
+            renderer = getattr(request, "accepted_renderer", None)
+            render = rendered and getattr(renderer, "format", None) == "json"
+            if render:
+                key_params["format"] = renderer.format
+
+            cache_key = builder.build(**key_params)
+            etag = CacheHelper.make_etag(cache_key)
+
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+            use_local = user_id == "global"
+            if use_local:
+                cached = local_cache.get(cache_key)
+                if cached is not None:
+                    return _build_response(request, cached, etag)
+
+            entry = cache.get(cache_key)
+            if not isinstance(entry, CacheEntry):
+                entry = None
+            if entry is not None and not _expires_early(entry, early_expiry_beta):
+                if use_local:
+                    local_cache.set(cache_key, entry.data, ttl)
+                return _build_response(request, entry.data, etag)
+
+            lock_key = f"{cache_key}:lock"
+            locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            if not locked:
+                # Пересчитывает другой воркер: отдаём то, что есть
+                if entry is None:
+                    stale = cache.get(builder.build_stale(**key_params))
+                    if isinstance(stale, CacheEntry):
+                        entry = stale
+                if entry is None:
+                    entry = _wait_for_entry(cache_key)
+                if entry is not None:
+                    return _build_response(request, entry.data, entry.etag)
 
-            response = view_method(self, request, *args, **kwargs)
+            try:
+                start = time.monotonic()
+                response = view_method(self, request, *args, **kwargs)
+                delta = time.monotonic() - start
 
-            if isinstance(response, Response) and 200 <= response.status_code < 300:
-                cache.set(cache_key, response.data, ttl)
+                if isinstance(response, Response) and 200 <= response.status_code < 300:
+                    if render:
+                        data = _render_response(self, request, response)
+                    else:
+                        data = response.data
+                    response["ETag"] = etag
+                    entry = CacheEntry(data, time.time() + ttl, delta, etag)
+                    cache.set(cache_key, entry, ttl)
+                    cache.set(builder.build_stale(**key_params), entry, stale_ttl)
+                    if use_local:
+                        local_cache.set(cache_key, data, ttl)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
 
             return response
 
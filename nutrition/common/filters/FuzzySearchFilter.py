@@ -1,10 +1,22 @@
 from django.contrib.postgres.search import TrigramWordSimilarity
-from django.db.models import Q
+from django.db.models import F, Q
 from django.db.models.functions import Greatest
 from rest_framework.filters import BaseFilterBackend
+from typing import List
+import common.lookups.TrigramIContains  # noqa: F401 (регистрация lookup trigram_icontains)
 
 
 class FuzzySearchFilter(BaseFilterBackend):
+    """
+    Нечёткий поиск по search_fields.
+    Условия записаны через операторы, которые поддерживаются GIN-индексами gin_trgm_ops:
+    ILIKE для подстроки и %> для похожести по словам (порог оператора задаётся
+    pg_trgm.word_similarity_threshold в настройках подключения). Точный порог похожести
+    проверяется уже для найденных по индексу строк.
+    Если у view есть метод get_search_boost, его выражение прибавляется к похожести
+    при сортировке.
+    """
+
     def filter_queryset(self, request, queryset, view):
         search_query = request.query_params.get("search")
         current_action = getattr(view, "action", None)
@@ -22,19 +34,41 @@ class FuzzySearchFilter(BaseFilterBackend):
             search_fields = getattr(view, "search_fields", ["name"])
             threshold = getattr(view, "fuzzy_threshold", 0.3)
 
+        queryset = queryset.annotate(
+            similarity=self.similarity_expression(search_query, search_fields)
+        ).filter(self.search_condition(search_query, search_fields, threshold))
+
+        # View может добавить к похожести бонус (например, за часто используемые записи)
+        get_search_boost = getattr(view, "get_search_boost", None)
+        boost = get_search_boost() if get_search_boost is not None else None
+        if boost is not None:
+            queryset = queryset.annotate(search_rank=F("similarity") + boost)
+            return queryset.order_by("-search_rank", "id")
+
+        return queryset.order_by("-similarity", "id")
+
+    @staticmethod
+    def similarity_expression(search_query: str, search_fields: List[str]):
+        """Похожесть запроса по словам (наибольшая из полей search_fields)."""
         similarities = [
             TrigramWordSimilarity(search_query, field) for field in search_fields
         ]
-
         if len(similarities) > 1:
-            queryset = queryset.annotate(similarity=Greatest(*similarities))
-        else:
-            queryset = queryset.annotate(similarity=similarities[0])
+            return Greatest(*similarities)
+        return similarities[0]
 
-        filter_condition = Q()
+    @staticmethod
+    def search_condition(
+        search_query: str, search_fields: List[str], threshold: float
+    ) -> Q:
+        """
+        Условие поиска для queryset с аннотацией similarity (см. similarity_expression):
+        подстрока или похожесть по словам выше порога.
+        """
+        contains_condition = Q()
+        similar_condition = Q()
         for field in search_fields:
-            filter_condition |= Q(**{f"{field}__icontains": search_query})
+            contains_condition |= Q(**{f"{field}__trigram_icontains": search_query})
+            similar_condition |= Q(**{f"{field}__trigram_word_similar": search_query})
 
-        queryset = queryset.filter(filter_condition | Q(similarity__gt=threshold))
-
-        return queryset.order_by("-similarity", "id")
+        return contains_condition | (similar_condition & Q(similarity__gt=threshold))
@@ -0,0 +1,18 @@
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramIContains(IContains):
+    """
+    Регистронезависимый поиск подстроки через ILIKE вместо UPPER(...) LIKE,
+    чтобы Postgres мог использовать GIN-индекс gin_trgm_ops по самому полю.
+    """
+
+    lookup_name = "trigram_icontains"
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
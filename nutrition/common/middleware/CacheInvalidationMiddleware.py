@@ -0,0 +1,18 @@
+from common.utils.CacheHelper import CacheHelper
+
+
+class CacheInvalidationMiddleware:
+    """
+    Копит инвалидации кэша (CacheHelper.invalidate) за время запроса и увеличивает
+    версии один раз в конце, сколько бы записей ни изменилось в обработчике.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = CacheHelper.start_request_invalidations()
+        try:
+            return self.get_response(request)
+        finally:
+            CacheHelper.end_request_invalidations(token)
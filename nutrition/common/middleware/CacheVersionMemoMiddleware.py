@@ -0,0 +1,18 @@
+from common.utils.CacheHelper import CacheHelper
+
+
+class CacheVersionMemoMiddleware:
+    """
+    Запоминает прочитанные версии кэша в памяти процесса на время одного запроса,
+    чтобы построение нескольких ключей стоило не больше одного обращения к Redis.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = CacheHelper.start_request_memo()
+        try:
+            return self.get_response(request)
+        finally:
+            CacheHelper.end_request_memo(token)
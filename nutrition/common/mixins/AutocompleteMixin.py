@@ -1,11 +1,28 @@
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from common.utils.AutocompleteIndex import AutocompleteIndexRegistry
 
 
 class AutocompleteMixin:
     autocomplete_search_fields = ["name"]
     autocomplete_min_length = 2
     autocomplete_limit = 10
+    # Сущность версии кэша, по которой перестраивается индекс в памяти (None — поиск в БД)
+    autocomplete_index_entity = None
+    autocomplete_index_per_user = False
+
+    def _autocomplete_index_rows(self):
+        fields = self.autocomplete_search_fields
+        queryset = self.get_queryset().order_by("id").values("id", *fields)
+        return [(row["id"], {f: row[f] for f in fields}) for row in queryset]
+
+    def _use_autocomplete_index(self, request) -> bool:
+        """Индекс не знает о фильтрах filterset_fields, с ними поиск идёт через БД."""
+        if self.autocomplete_index_entity is None:
+            return False
+        return not any(
+            k in request.query_params for k in getattr(self, "filterset_fields", [])
+        )
 
     @action(detail=False, methods=["get"])
     def autocomplete(self, request):
@@ -13,6 +30,19 @@ class AutocompleteMixin:
         if len(search) < self.autocomplete_min_length:
             return Response([])
 
+        if self._use_autocomplete_index(request):
+            index = AutocompleteIndexRegistry.get(
+                self.autocomplete_index_entity,
+                self.autocomplete_search_fields,
+                self._autocomplete_index_rows,
+                (
+                    request.user.telegram_id
+                    if self.autocomplete_index_per_user
+                    else "global"
+                ),
+            )
+            return Response(index.search(search, self.autocomplete_limit))
+
         queryset = self.filter_queryset(self.get_queryset())
 
         data = queryset.values(*self.autocomplete_search_fields)[
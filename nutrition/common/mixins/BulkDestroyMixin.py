@@ -0,0 +1,36 @@
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+class BulkDestroyMixin:
+    """Пакетное удаление записей пользователя: DELETE .../bulk_delete/ с {"ids": [...]}."""
+
+    bulk_max_size = 200
+
+    def perform_bulk_destroy(self, queryset) -> int:
+        return queryset.delete()[1].get(queryset.model._meta.label, 0)
+
+    @action(detail=False, methods=["delete"])
+    def bulk_delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {"message": "Требуется непустой список ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > self.bulk_max_size:
+            return Response(
+                {"message": f"Не больше {self.bulk_max_size} записей за запрос."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            return Response(
+                {"message": "ids должен быть списком чисел."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        deleted = self.perform_bulk_destroy(self.get_queryset().filter(pk__in=ids))
+        return Response({"deleted": deleted}, status=status.HTTP_200_OK)
@@ -33,7 +33,21 @@ class ModelCleanMixin:
                 setattr(instance, attr, value)
 
         try:
-            instance.full_clean()
+            if "bulk_related_objects" in self.context:
+                # При пакетной валидации связанные объекты уже загружены сериализатором
+                # (или не менялись). validate_constraints и validate_unique делают
+                # запросы на каждую запись и не видят остальных записей пакета, поэтому
+                # не вызываются: CheckConstraint моделей с пакетным сохранением
+                # (EatenFood, RecipeIngredient) повторяют clean() и валидаторы полей,
+                # уникальность состава рецепта проверяется для всего пакета
+                # в RecipeIngredientBulk.save, у EatenFood уникальных ограничений нет.
+                # БД всё равно проверяет ограничения в общей транзакции пакета
+                relations = [f.name for f in model._meta.fields if f.is_relation]
+                instance.full_clean(
+                    exclude=relations, validate_unique=False, validate_constraints=False
+                )
+            else:
+                instance.full_clean()
         except DjangoValidationError as e:
             raise serializers.ValidationError(e.message_dict)
 
@@ -0,0 +1,136 @@
+import pytest
+import time
+import gzip
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from common.decorators.cache_response import CacheEntry, cache_response, local_cache
+from common.utils.CacheKeyBuilder import CacheKeyBuilder
+from common.utils.CacheHelper import CacheHelper
+
+
+class CatalogView:
+    calls = 0
+
+    @cache_response(entity="catalog", ttl=60)
+    def list(self, request, *args, **kwargs):
+        CatalogView.calls += 1
+        return Response({"calls": CatalogView.calls})
+
+
+class RenderedCatalogView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    @cache_response(entity="catalog", ttl=60)
+    def get(self, request, *args, **kwargs):
+        CatalogView.calls += 1
+        return Response({"name": "Яблоко", "calls": CatalogView.calls})
+
+
+def list_keys():
+    builder = CacheKeyBuilder(entity="catalog")
+    params = dict(scope="list", filters={}, page=None, extra=None)
+    return builder.build(**params), builder.build_stale(**params)
+
+
+@pytest.fixture
+def request_():
+    cache.clear()
+    local_cache.clear()
+    CatalogView.calls = 0
+    return Request(APIRequestFactory().get("/"))
+
+
+class TestCacheResponse:
+    def test_global_entry_served_from_local_cache(self, request_):
+        view = CatalogView()
+        assert view.list(request_).data == {"calls": 1}
+
+        # Redis-уровень пуст, ответ отдаётся из памяти процесса
+        cache.clear()
+        cache.set("cache_version:catalog:global", 1, None)
+        assert view.list(request_).data == {"calls": 1}
+
+    def test_version_bump_invalidates_local_cache(self, request_):
+        view = CatalogView()
+        view.list(request_)
+
+        CacheHelper.bump_cache_version("catalog")
+
+        assert view.list(request_).data == {"calls": 2}
+
+    def test_stale_value_served_while_locked(self, request_):
+        view = CatalogView()
+        view.list(request_)
+        local_cache.clear()
+
+        CacheHelper.bump_cache_version("catalog")
+        cache_key, _ = list_keys()
+        cache.add(f"{cache_key}:lock", 1)
+
+        assert view.list(request_).data == {"calls": 1}
+        assert CatalogView.calls == 1
+
+    def test_recompute_after_lock_wait(self, request_):
+        cache_key, _ = list_keys()
+        cache.add(f"{cache_key}:lock", 1)
+
+        with patch("common.decorators.cache_response.LOCK_WAIT", 0.1):
+            assert CatalogView().list(request_).data == {"calls": 1}
+        assert cache.get(f"{cache_key}:lock") == 1
+
+    def test_early_expiry(self, request_):
+        view = CatalogView()
+        cache_key, _ = list_keys()
+
+        # Запись истекает через секунду, а её пересчёт занимал 10 секунд
+        cache.set(cache_key, CacheEntry({"calls": 0}, time.time() + 1, 10, ""), 60)
+        with patch("common.decorators.cache_response.random.random", return_value=0.5):
+            assert view.list(request_).data == {"calls": 1}
+
+        # Без раннего истечения (beta=0) запись отдаётся до конца TTL
+        cache.set(cache_key, CacheEntry({"calls": 0}, time.time() + 1, 10, ""), 60)
+        local_cache.clear()
+        with patch("common.decorators.cache_response.random.random", return_value=0.5):
+            lazy_view = cache_response(entity="catalog", ttl=60, early_expiry_beta=0)(
+                CatalogView.list.__wrapped__
+            )
+            assert lazy_view(view, request_).data == {"calls": 0}
+
+    def test_rendered_bytes_cached(self, request_):
+        view = RenderedCatalogView.as_view()
+        factory = APIRequestFactory()
+
+        response = view(factory.get("/"))
+        response.render()
+        expected = response.content
+
+        cached = view(factory.get("/"))
+        assert cached.content == expected
+        assert cached["ETag"] == response["ETag"]
+        assert cached["Content-Type"] == "application/json"
+
+        compressed = view(factory.get("/", HTTP_ACCEPT_ENCODING="gzip, deflate"))
+        assert compressed["Content-Encoding"] == "gzip"
+        assert gzip.decompress(compressed.content) == expected
+        assert CatalogView.calls == 1
+
+    def test_not_modified_by_version_etag(self, request_):
+        view = RenderedCatalogView.as_view()
+        factory = APIRequestFactory()
+
+        etag = view(factory.get("/"))["ETag"]
+        with patch("common.decorators.cache_response._build_response") as build:
+            response = view(factory.get("/", HTTP_IF_NONE_MATCH=etag))
+            assert build.call_count == 0
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        CacheHelper.bump_cache_version("catalog")
+        response = view(factory.get("/", HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == 200
+        assert response["ETag"] != etag
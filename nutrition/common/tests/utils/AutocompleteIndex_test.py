@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import Mock
+from django.core.cache import cache
+from common.utils.AutocompleteIndex import AutocompleteIndex, AutocompleteIndexRegistry
+from common.utils.CacheHelper import CacheHelper
+
+ROWS = [
+    (1, {"name": "Куриная грудка"}),
+    (2, {"name": "Грудка индейки"}),
+    (3, {"name": "Творог 5%"}),
+    (4, {"name": "Курица гриль"}),
+    (5, {"name": "Сырок творожный"}),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    AutocompleteIndexRegistry.clear()
+
+
+def names(result):
+    return [row["name"] for row in result]
+
+
+class TestAutocompleteIndex:
+    def test_prefix_matches_first(self):
+        index = AutocompleteIndex(ROWS, ["name"])
+
+        result = names(index.search("гру", 10))
+
+        assert result[:2] == ["Куриная грудка", "Грудка индейки"]
+
+    def test_substring_match(self):
+        index = AutocompleteIndex(ROWS, ["name"])
+
+        assert names(index.search("ворож", 10))[0] == "Сырок творожный"
+
+    def test_similar_word_match(self):
+        index = AutocompleteIndex(ROWS, ["name"])
+
+        # Опечатка: подстроки нет, но слово похоже по триграммам
+        assert "Курица гриль" in names(index.search("курийа", 10))
+
+    def test_limit_and_case(self):
+        index = AutocompleteIndex(ROWS, ["name"])
+
+        assert len(index.search("ТВОР", 1)) == 1
+        assert index.search("", 10) == []
+
+    def test_returns_field_values(self):
+        rows = [(1, {"name": "Омлет", "description": "Яйца и молоко"})]
+        index = AutocompleteIndex(rows, ["name", "description"])
+
+        assert index.search("молок", 10) == [
+            {"name": "Омлет", "description": "Яйца и молоко"}
+        ]
+
+
+class TestAutocompleteIndexRegistry:
+    def test_index_reused_until_version_bump(self):
+        loader = Mock(return_value=ROWS)
+
+        first = AutocompleteIndexRegistry.get("base_food", ["name"], loader)
+        second = AutocompleteIndexRegistry.get("base_food", ["name"], loader)
+        assert first is second
+        assert loader.call_count == 1
+
+        CacheHelper.bump_cache_version("base_food")
+        third = AutocompleteIndexRegistry.get("base_food", ["name"], loader)
+        assert third is not first
+        assert loader.call_count == 2
+
+    def test_per_user_indexes(self):
+        loader_1 = Mock(return_value=ROWS[:1])
+        loader_2 = Mock(return_value=ROWS[1:2])
+
+        index_1 = AutocompleteIndexRegistry.get("custom_food", ["name"], loader_1, 1)
+        index_2 = AutocompleteIndexRegistry.get("custom_food", ["name"], loader_2, 2)
+
+        assert names(index_1.search("гру", 10)) == ["Куриная грудка"]
+        assert names(index_2.search("гру", 10)) == ["Грудка индейки"]
+
+        CacheHelper.bump_cache_version("custom_food", 1)
+        AutocompleteIndexRegistry.get("custom_food", ["name"], loader_1, 1)
+        AutocompleteIndexRegistry.get("custom_food", ["name"], loader_2, 2)
+        assert loader_1.call_count == 2
+        assert loader_2.call_count == 1
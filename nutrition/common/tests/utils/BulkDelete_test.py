@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import patch
+from django.db.models.signals import post_delete
+from nutrition_trecker.models import EatenFood
+from common.utils.BulkDelete import BulkDelete
+
+
+@pytest.mark.django_db
+class TestBulkDelete:
+    def test_delete_pks(self, django_assert_num_queries):
+        rows = [
+            EatenFood.objects.create(
+                user_id=1,
+                name="Каша",
+                proteins=3,
+                fats=1,
+                carbohydrates=20,
+                weight_grams=100,
+            )
+            for _ in range(5)
+        ]
+        received = []
+
+        def receiver(sender, instance, **kwargs):
+            received.append(instance)
+
+        post_delete.connect(receiver, sender=EatenFood, dispatch_uid="bulk_delete_test")
+        try:
+            with patch.object(BulkDelete, "BATCH_SIZE", 2):
+                with django_assert_num_queries(2):
+                    deleted = BulkDelete.delete_pks(
+                        EatenFood, [row.pk for row in rows[:4]]
+                    )
+        finally:
+            post_delete.disconnect(sender=EatenFood, dispatch_uid="bulk_delete_test")
+
+        assert deleted == 4
+        assert list(EatenFood.objects.all()) == [rows[4]]
+        assert received == []
+
+    def test_delete_no_pks(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert BulkDelete.delete_pks(EatenFood, []) == 0
@@ -0,0 +1,114 @@
+import pytest
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import transaction
+from common.utils.CacheHelper import CacheHelper
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestCacheHelper:
+    def test_get_cache_version_default(self):
+        assert CacheHelper.get_cache_version("recipe", 1) == 1
+        assert cache.get("cache_version:recipe:1") == 1
+
+    def test_bump_cache_version(self):
+        CacheHelper.get_cache_version("recipe", 1)
+
+        assert CacheHelper.bump_cache_version("recipe", 1) == 2
+        assert CacheHelper.bump_cache_version("recipe", 1) == 3
+        assert CacheHelper.get_cache_version("recipe", 1) == 3
+
+    def test_bump_missing_cache_version(self):
+        assert CacheHelper.bump_cache_version("recipe", 1) == 2
+        assert CacheHelper.get_cache_version("recipe", 1) == 2
+
+    def test_get_cache_versions_one_round_trip(self):
+        CacheHelper.bump_cache_versions(["recipe", "recipe_ingredient"], 1)
+
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            versions = CacheHelper.get_cache_versions(
+                ["recipe", "recipe_ingredient"], 1
+            )
+
+        assert versions == {"recipe": 2, "recipe_ingredient": 2}
+        assert get_many.call_count == 1
+
+    def test_request_memo(self):
+        token = CacheHelper.start_request_memo()
+        try:
+            key = CacheHelper.make_cache_key("recipe", "list", 1)
+
+            with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+                assert CacheHelper.make_cache_key("recipe", "list", 1) == key
+                assert get_many.call_count == 0
+
+                CacheHelper.bump_cache_version("recipe", 1)
+                assert CacheHelper.make_cache_key("recipe", "list", 1) != key
+                assert get_many.call_count == 0
+        finally:
+            CacheHelper.end_request_memo(token)
+
+    @pytest.mark.django_db
+    def test_invalidate_after_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                CacheHelper.invalidate(["recipe", "recipe_ingredient"], 1)
+                CacheHelper.invalidate(["recipe"], 1)
+                # До фиксации транзакции версия не меняется
+                assert CacheHelper.get_cache_version("recipe", 1) == 1
+
+        # Повторный ключ увеличивается один раз
+        assert len(callbacks) == 2
+        assert CacheHelper.get_cache_version("recipe", 1) == 2
+        assert CacheHelper.get_cache_version("recipe_ingredient", 1) == 2
+
+        # Следующая транзакция снова увеличивает версию
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                CacheHelper.invalidate(["recipe"], 1)
+
+        assert CacheHelper.get_cache_version("recipe", 1) == 3
+
+    @pytest.mark.django_db
+    def test_invalidate_rollback(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(ValueError):
+                with transaction.atomic():
+                    CacheHelper.invalidate(["recipe"], 1)
+                    raise ValueError
+            CacheHelper.invalidate(["custom_food"], 1)
+
+        assert CacheHelper.get_cache_version("recipe", 1) == 1
+        assert CacheHelper.get_cache_version("custom_food", 1) == 2
+
+    @pytest.mark.django_db
+    def test_invalidate_savepoint_rollback(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                CacheHelper.invalidate(["recipe"], 1)
+                with pytest.raises(ValueError):
+                    with transaction.atomic():
+                        CacheHelper.invalidate(["recipe", "custom_food"], 1)
+                        raise ValueError
+
+        assert CacheHelper.get_cache_version("recipe", 1) == 2
+        assert CacheHelper.get_cache_version("custom_food", 1) == 1
+
+    def test_invalidate_request(self):
+        token = CacheHelper.start_request_invalidations()
+        try:
+            with patch.object(
+                CacheHelper, "_incr_many", wraps=CacheHelper._incr_many
+            ) as incr_many:
+                CacheHelper.invalidate(["recipe"], 1)
+                CacheHelper.invalidate(["recipe", "recipe_ingredient"], 1)
+                assert incr_many.call_count == 0
+        finally:
+            CacheHelper.end_request_invalidations(token)
+
+        assert CacheHelper.get_cache_version("recipe", 1) == 2
+        assert CacheHelper.get_cache_version("recipe_ingredient", 1) == 2
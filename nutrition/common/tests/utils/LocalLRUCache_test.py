@@ -0,0 +1,34 @@
+from unittest.mock import patch
+from common.utils.LocalLRUCache import LocalLRUCache
+
+
+class TestLocalLRUCache:
+    def test_evicts_least_recently_used(self):
+        local_cache = LocalLRUCache(max_entries=2)
+        local_cache.set("a", 1, 60)
+        local_cache.set("b", 2, 60)
+
+        assert local_cache.get("a") == 1
+        local_cache.set("c", 3, 60)
+
+        assert local_cache.get("b") is None
+        assert local_cache.get("a") == 1
+        assert local_cache.get("c") == 3
+        assert len(local_cache) == 2
+
+    def test_expired_entry(self):
+        local_cache = LocalLRUCache(max_entries=2, max_ttl=10)
+
+        with patch("common.utils.LocalLRUCache.time.monotonic", return_value=100):
+            local_cache.set("a", 1, 60)
+
+        with patch("common.utils.LocalLRUCache.time.monotonic", return_value=109):
+            assert local_cache.get("a") == 1
+        with patch("common.utils.LocalLRUCache.time.monotonic", return_value=110):
+            assert local_cache.get("a") is None
+
+    def test_disabled(self):
+        local_cache = LocalLRUCache(max_entries=0)
+        local_cache.set("a", 1, 60)
+
+        assert local_cache.get("a") is None
@@ -0,0 +1,170 @@
+from django.conf import settings
+from collections import Counter
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+import threading
+import re
+from common.utils.CacheHelper import CacheHelper
+from common.utils.LocalLRUCache import LocalLRUCache
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _normalize(text: str) -> str:
+    return text.lower()
+
+
+def _word_trigrams(text: str) -> Set[str]:
+    """Триграммы в формате pg_trgm: каждое слово дополняется двумя пробелами слева и одним справа."""
+    trigrams = set()
+    for word in _WORD_RE.findall(text):
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def _ngrams(text: str, size: int) -> Set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class AutocompleteIndex:
+    """
+    Индекс автокомплита в памяти процесса: отсортированный массив префиксов
+    (название целиком и каждое слово) и инвертированные индексы по n-граммам.
+    Повторяет логику FuzzySearchFilter для автокомплита (подстрока или похожесть по словам
+    выше порога), не обращаясь к БД.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, dict]], fields: List[str]):
+        self.values: Dict[int, dict] = dict()
+        self.texts: Dict[int, str] = dict()
+        self.prefixes: List[Tuple[str, int]] = []
+        self.word_trigrams: Dict[str, Set[int]] = dict()
+        self.substrings: Dict[str, Set[int]] = dict()
+
+        for pk, values in rows:
+            text = _normalize(" ".join(str(values[f]) for f in fields if values[f]))
+            self.values[pk] = values
+            self.texts[pk] = text
+
+            self.prefixes.append((text, pk))
+            self.prefixes.extend((word, pk) for word in _WORD_RE.findall(text))
+
+            for trigram in _word_trigrams(text):
+                self.word_trigrams.setdefault(trigram, set()).add(pk)
+            for ngram in _ngrams(text, 2) | _ngrams(text, 3):
+                self.substrings.setdefault(ngram, set()).add(pk)
+
+        self.prefixes.sort()
+
+    def _prefix_matches(self, query: str) -> Set[int]:
+        """Записи, у которых название или одно из слов начинается с query (бинарный поиск)."""
+        result = set()
+        position = bisect_left(self.prefixes, (query, -1))
+        while position < len(self.prefixes):
+            text, pk = self.prefixes[position]
+            if not text.startswith(query):
+                break
+            result.add(pk)
+            position += 1
+        return result
+
+    def _substring_matches(self, query: str) -> Set[int]:
+        """Записи, содержащие query как подстроку (аналог icontains)."""
+        ngrams = _ngrams(query, 3) if len(query) >= 3 else {query}
+        postings = [self.substrings.get(ngram, set()) for ngram in ngrams]
+        if not postings:
+            return set()
+        candidates = set.intersection(*postings)
+        return {pk for pk in candidates if query in self.texts[pk]}
+
+    def _similarities(self, query: str) -> Dict[int, float]:
+        """
+        Похожесть по словам: доля триграмм запроса, встречающихся в названии
+        (приближение word_similarity из pg_trgm).
+        """
+        query_trigrams = _word_trigrams(query)
+        if not query_trigrams:
+            return dict()
+        counts = Counter()
+        for trigram in query_trigrams:
+            counts.update(self.word_trigrams.get(trigram, ()))
+        return {pk: count / len(query_trigrams) for pk, count in counts.items()}
+
+    def search(self, query: str, limit: int, threshold: float = 0.1) -> List[dict]:
+        query = _normalize(query.strip())
+        if not query:
+            return []
+
+        similarities = self._similarities(query)
+        matches = self._substring_matches(query)
+        matches.update(pk for pk, sim in similarities.items() if sim > threshold)
+        prefixes = self._prefix_matches(query)
+
+        ranked = sorted(
+            matches,
+            key=lambda pk: (
+                pk not in prefixes,
+                -similarities.get(pk, 0.0),
+                pk,
+            ),
+        )
+        return [self.values[pk] for pk in ranked[:limit]]
+
+
+class AutocompleteIndexRegistry:
+    """
+    Хранит индексы автокомплита воркера. Индекс перестраивается лениво,
+    когда меняется версия кэша сущности (CacheHelper.invalidate в сигналах).
+    Глобальные индексы (base_food, base_exercise) живут постоянно,
+    пользовательские (custom_food, recipe, custom_exercise) — в ограниченном LRU.
+    """
+
+    _global: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, AutocompleteIndex]] = dict()
+    _per_user = LocalLRUCache(settings.AUTOCOMPLETE_INDEX_MAX_USERS)
+    _lock = threading.Lock()
+
+    @classmethod
+    def _lookup(cls, key: tuple, is_global: bool):
+        if is_global:
+            return cls._global.get(key)
+        return cls._per_user.get(key)
+
+    @classmethod
+    def get(
+        cls,
+        entity: str,
+        fields: List[str],
+        loader: Callable[[], Iterable[Tuple[int, dict]]],
+        user_id: int | str = "global",
+    ) -> AutocompleteIndex:
+        version = CacheHelper.get_cache_version(entity, user_id)
+        key = (entity, tuple(fields))
+
+        if user_id != "global":
+            key = (*key, user_id)
+
+        cached = cls._lookup(key, user_id == "global")
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with cls._lock:
+            # Индекс мог быть перестроен другим потоком, пока ждали блокировку
+            cached = cls._lookup(key, user_id == "global")
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            index = AutocompleteIndex(loader(), fields)
+            if user_id == "global":
+                cls._global[key] = (version, index)
+            else:
+                cls._per_user.set(
+                    key, (version, index), settings.AUTOCOMPLETE_INDEX_TTL
+                )
+        return index
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._global.clear()
+            cls._per_user.clear()
@@ -0,0 +1,35 @@
+from django.db import connections, router
+from django.db.models import Model
+from typing import Iterable, List, Type
+
+
+class BulkDelete:
+    """
+    Удаление строк по первичным ключам простым DELETE ... WHERE pk IN (...).
+
+    queryset.delete() для моделей с обработчиками post_delete выбирает все строки
+    и отправляет сигнал на каждую. Пакетные операции, которые сами пересчитывают
+    сводные таблицы и версии кэша (EatenFoodBulk, EatenFoodRetention,
+    RecipeIngredientBulk), удаляют через этот класс. Подходит только для моделей,
+    на которые не ссылаются другие модели: каскады и SET_NULL здесь не выполняются.
+    """
+
+    BATCH_SIZE = 500
+
+    @classmethod
+    def delete_pks(cls, model: Type[Model], pks: Iterable[int]) -> int:
+        """Удаляет строки model с указанными pk, возвращает число удалённых."""
+        pks: List[int] = list(pks)
+        connection = connections[router.db_for_write(model)]
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(model._meta.pk.column)
+        deleted = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), cls.BATCH_SIZE):
+                batch = pks[start : start + cls.BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {column} IN ({placeholders})", batch
+                )
+                deleted += cursor.rowcount
+        return deleted
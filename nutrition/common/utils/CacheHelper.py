@@ -1,24 +1,180 @@
 from django.core.cache import cache
+from django.db import transaction
+from contextvars import ContextVar
+from functools import partial
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import hashlib
+
+# Версии кэша, уже прочитанные в рамках текущего запроса (см. CacheVersionMemoMiddleware)
+_request_versions: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "cache_versions", default=None
+)
+
+# Инвалидации, отложенные до конца текущего запроса (см. CacheInvalidationMiddleware)
+_request_invalidations: ContextVar[Optional[Set[str]]] = ContextVar(
+    "cache_invalidations", default=None
+)
+
+# Ключи, уже увеличенные после фиксации текущей транзакции (см. CacheHelper.invalidate)
+_transaction_batch: ContextVar[Optional[Dict]] = ContextVar(
+    "cache_transaction_batch", default=None
+)
 
 
 class CacheHelper:
+    @classmethod
+    def _version_key(cls, entity: str, user_id: int | str) -> str:
+        return f"cache_version:{entity}:{user_id}"
+
+    @classmethod
+    def start_request_memo(cls):
+        """Включает запоминание версий в памяти процесса до вызова end_request_memo."""
+        return _request_versions.set(dict())
+
+    @classmethod
+    def end_request_memo(cls, token) -> None:
+        _request_versions.reset(token)
+
+    @classmethod
+    def get_cache_versions(
+        cls, entities: Iterable[str], user_id: int | str = "global"
+    ) -> Dict[str, int]:
+        """
+        Возвращает текущие версии кэша для нескольких сущностей одним запросом (MGET).
+        Внутри запроса версии запоминаются, повторные обращения не ходят в кэш.
+        """
+        memo = _request_versions.get()
+        version_keys = {
+            cls._version_key(entity, user_id): entity for entity in entities
+        }
+
+        versions = dict()
+        if memo is not None:
+            versions.update({k: memo[k] for k in version_keys if k in memo})
+
+        missing = [k for k in version_keys if k not in versions]
+        if missing:
+            versions.update(cache.get_many(missing))
+
+        for version_key in missing:
+            if version_key not in versions:
+                # add не перезапишет версию, если её успели создать параллельно
+                cache.add(version_key, 1, None)
+                versions[version_key] = cache.get(version_key, 1)
+
+        if memo is not None:
+            memo.update(versions)
+
+        return {entity: versions[k] for k, entity in version_keys.items()}
+
     @classmethod
     def get_cache_version(cls, entity: str, user_id: int | str = "global") -> int:
         """Возвращает текущую версию кэша для выбранной сущности."""
-        version_key = f"cache_version:{entity}:{user_id}"
-        version = cache.get(version_key)
-        if version is None:
-            version = 1
-            cache.set(version_key, version, None)
-            return version
-        return version
+        return cls.get_cache_versions([entity], user_id)[entity]
+
+    @classmethod
+    def _incr_many(cls, version_keys: List[str]) -> List[int]:
+        """
+        Атомарно увеличивает версии (INCR); отсутствующий ключ создаётся со значением 1.
+        Для django-redis все INCR отправляются одним pipeline.
+        """
+        client = getattr(cache, "client", None)
+        if hasattr(client, "get_client"):
+            pipeline = client.get_client(write=True).pipeline()
+            for version_key in version_keys:
+                pipeline.incr(client.make_key(version_key))
+            return pipeline.execute()
+
+        result = []
+        for version_key in version_keys:
+            if cache.add(version_key, 1, None):
+                result.append(1)
+            else:
+                result.append(cache.incr(version_key))
+        return result
+
+    @classmethod
+    def _bump_keys(cls, keys: List[str]) -> Dict[str, int]:
+        """Увеличивает версии по ключам одним pipeline, возвращает новые версии."""
+        versions = dict(zip(keys, cls._incr_many(keys)))
+
+        # Отсутствовавшая версия считалась равной 1, поэтому новая должна быть больше
+        created = [k for k, version in versions.items() if version == 1]
+        if created:
+            versions.update(zip(created, cls._incr_many(created)))
+
+        memo = _request_versions.get()
+        if memo is not None:
+            memo.update(versions)
+
+        return versions
+
+    @classmethod
+    def bump_cache_versions(
+        cls, entities: Iterable[str], user_id: int | str = "global"
+    ) -> Dict[str, int]:
+        """Инвалидирует кэш нескольких сущностей атомарным инкрементом версий."""
+        version_keys = {
+            cls._version_key(entity, user_id): entity for entity in entities
+        }
+        versions = cls._bump_keys(list(version_keys))
+        return {entity: versions[k] for k, entity in version_keys.items()}
 
     @classmethod
     def bump_cache_version(cls, entity: str, user_id: int | str = "global") -> int:
         """Инвалидирует кэш икриментом версии."""
-        version_key = f"cache_version:{entity}:{user_id}"
-        v = cls.get_cache_version(entity, user_id)
-        cache.set(version_key, v + 1)
+        return cls.bump_cache_versions([entity], user_id)[entity]
+
+    @classmethod
+    def invalidate(cls, entities: Iterable[str], user_id: int | str = "global") -> None:
+        """
+        Отложенная инвалидация кэша сущностей. Внутри transaction.atomic версии
+        увеличиваются только после фиксации транзакции: каждый вызов регистрирует
+        transaction.on_commit, поэтому при откате транзакции или точки сохранения
+        Django отбрасывает его вместе с ключами. Повторные пары (сущность, пользователь)
+        в транзакции и в запросе схлопываются, в запросе все версии увеличиваются
+        одним pipeline.
+        """
+        keys = {cls._version_key(entity, user_id) for entity in entities}
+        if not transaction.get_connection().in_atomic_block:
+            cls._collect(keys)
+            return
+
+        batch = _transaction_batch.get()
+        if batch is None or batch["flushed"]:
+            # Колбэки одной фиксации выполняются подряд и делят общий набор ключей
+            batch = {"flushed": False, "keys": set()}
+            _transaction_batch.set(batch)
+        transaction.on_commit(partial(cls._flush_transaction, batch, frozenset(keys)))
+
+    @classmethod
+    def _flush_transaction(cls, batch: Dict, keys: FrozenSet[str]) -> None:
+        batch["flushed"] = True
+        keys = keys - batch["keys"]
+        if keys:
+            batch["keys"].update(keys)
+            cls._collect(set(keys))
+
+    @classmethod
+    def _collect(cls, keys: Set[str]) -> None:
+        pending = _request_invalidations.get()
+        if pending is not None:
+            pending.update(keys)
+        else:
+            cls._bump_keys(sorted(keys))
+
+    @classmethod
+    def start_request_invalidations(cls):
+        """Откладывает инвалидации до вызова end_request_invalidations."""
+        return _request_invalidations.set(set())
+
+    @classmethod
+    def end_request_invalidations(cls, token) -> None:
+        """Увеличивает версии, накопленные за запрос, одним pipeline."""
+        keys = _request_invalidations.get()
+        _request_invalidations.reset(token)
+        if keys:
+            cls._bump_keys(sorted(keys))
 
     @classmethod
     def make_cache_key(
@@ -27,3 +183,18 @@ class CacheHelper:
         """Возвращает ключ с актуальной версией для создания и нахождения требуемого кэша."""
         version = cls.get_cache_version(entity, user_id)
         return f"{entity}:{user_id}:v{version}:{suffix}"
+
+    @classmethod
+    def make_stale_cache_key(
+        cls, entity: str, suffix: str, user_id: int | str = "global"
+    ) -> str:
+        """Возвращает ключ без версии, переживающий инвалидацию (для stale-while-revalidate)."""
+        return f"{entity}:{user_id}:stale:{suffix}"
+
+    @classmethod
+    def make_etag(cls, cache_key: str) -> str:
+        """
+        Возвращает слабый ETag по ключу кэша: ключ уже содержит версию сущности
+        и параметры запроса, поэтому ETag меняется вместе с bump_cache_version.
+        """
+        return f'W/"{hashlib.sha1(cache_key.encode()).hexdigest()}"'
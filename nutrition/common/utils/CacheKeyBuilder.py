@@ -18,18 +18,31 @@ class CacheKeyBuilder:
         self.entity = entity
         self.user_id = user_id
 
-    def build(self, *, scope: str, filters=None, page=None, extra=None) -> str:
+    def _suffix(
+        self, *, scope: str, filters=None, page=None, extra=None, format=None
+    ) -> str:
         payload = {
             "scope": scope,
             "filters": filters or {},
             "page": page,
             "extra": extra,
         }
+        if format is not None:
+            payload["format"] = format
 
-        suffix = serialize_cache_payload(payload)
+        return serialize_cache_payload(payload)
 
+    def build(self, **params) -> str:
         return CacheHelper.make_cache_key(
             self.entity,
-            suffix,
+            self._suffix(**params),
+            self.user_id,
+        )
+
+    def build_stale(self, **params) -> str:
+        """Ключ без версии: хранит последнее значение, которое можно отдать во время пересчёта."""
+        return CacheHelper.make_stale_cache_key(
+            self.entity,
+            self._suffix(**params),
             self.user_id,
         )
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+import threading
+import time
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU-кэш в памяти процесса с ограничением числа записей и временем жизни."""
+
+    def __init__(self, max_entries: int, max_ttl: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._data: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение и помечает его как недавно использованное."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: int) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи при переполнении."""
+        if self.max_entries <= 0:
+            return
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "django_filters",
     "nutrition_trecker.apps.NutritionTreckerConfig",
@@ -79,6 +80,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "common.middleware.CacheVersionMemoMiddleware.CacheVersionMemoMiddleware",
+    "common.middleware.CacheInvalidationMiddleware.CacheInvalidationMiddleware",
 ]
 
 ROOT_URLCONF = "nutrition.urls"
@@ -103,6 +106,10 @@ WSGI_APPLICATION = "nutrition.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Порог оператора %> (pg_trgm.word_similarity_threshold) для индексного нечёткого поиска.
+# Должен быть не больше минимального порога FuzzySearchFilter (0.1 для автокомплита)
+TRIGRAM_WORD_SIMILARITY_THRESHOLD = 0.1
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql_psycopg2",
@@ -111,6 +118,9 @@ DATABASES = {
         "PASSWORD": get_env_variable("DB_PASSWORD"),
         "HOST": get_env_variable("DB_HOST"),
         "PORT": get_env_variable("DB_PORT"),
+        "OPTIONS": {
+            "options": f"-c pg_trgm.word_similarity_threshold={TRIGRAM_WORD_SIMILARITY_THRESHOLD}",
+        },
         "TEST": {
             "NAME": get_env_variable("TEST_DB"),
         },
@@ -244,9 +254,33 @@ EMAIL_HOST_PASSWORD = get_env_variable("EMAIL_HOST_PASSWORD")
 # Nutrition trecker
 
 MAX_EATEN_FOOD_AGE_DAYS = 90
+# Удаление устаревших записей (команда delete_old_eaten_food)
+EATEN_FOOD_RETENTION_BATCH_SIZE = 5000
+EATEN_FOOD_RETENTION_SLEEP = 0.1
+EATEN_FOOD_RETENTION_LOCK_TIMEOUT_MS = 2000
+# Архив истории питания (--archive): кбжу по дням хранится NUTRITION_HISTORY_DAILY_DAYS
+# дней, дальше — только по неделям; сжатые выгрузки удаляемых записей — в EATEN_FOOD_ARCHIVE_DIR
+NUTRITION_HISTORY_DAILY_DAYS = 730
+NUTRITION_HISTORY_MAX_DAYS = 730
+EATEN_FOOD_ARCHIVE_DIR = Path(
+    get_env_variable("EATEN_FOOD_ARCHIVE_DIR", str(BASE_DIR / "archive" / "eatenfood"))
+)
+NUTRITION_CHARTS_CACHE_TTL = 60 * 60 * 24
+NUTRITION_CHARTS_RENDER_WORKERS = int(
+    get_env_variable("NUTRITION_CHARTS_RENDER_WORKERS", "0")
+)
 
 # Caches
 
+# Локальный (в памяти воркера) уровень для global-записей cache_response
+LOCAL_CACHE_MAX_ENTRIES = 512
+LOCAL_CACHE_MAX_TTL = 60
+
+# Индексы автокомплита в памяти воркера: число пользователей с собственным индексом
+# (CustomFood, Recipe, CustomExercise) и время их жизни без обращений (сек)
+AUTOCOMPLETE_INDEX_MAX_USERS = 256
+AUTOCOMPLETE_INDEX_TTL = 60 * 30
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -10,6 +10,7 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "postgres"),
         "HOST": os.getenv("TEST_DB_HOST", "localhost"),
         "PORT": os.getenv("TEST_DB_PORT", "5432"),
+        "OPTIONS": DATABASES["default"]["OPTIONS"],  # noqa: F405
     }
 }
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import BaseFood
+from .services.FoodSourceDelete import FoodSourceDelete
 
 
 @admin.register(BaseFood)
@@ -7,3 +8,7 @@ class BaseFoodAdmin(admin.ModelAdmin):
     readonly_fields = ("kcal",)
     list_display = ("id", "name", "proteins", "fats", "carbohydrates", "kcal")
     search_fields = ("name",)
+
+    def delete_queryset(self, request, queryset):
+        # Данные продуктов копируются в записи пользователей одним запросом на таблицу
+        FoodSourceDelete.delete(queryset)
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from common.filters.FuzzySearchFilter import FuzzySearchFilter
+from nutrition_trecker.models import BaseFood
+from statistics import median
+import random
+import time
+
+SYLLABLES = [
+    "ка", "ро", "ма", "ли", "на", "то", "ве", "су", "пе", "ла",
+    "ри", "до", "го", "ты", "бу", "ше", "ць", "ан", "ор", "ек",
+]  # fmt: skip
+
+
+class _Request:
+    def __init__(self, search: str):
+        self.query_params = {"search": search}
+
+
+class _View:
+    action = "list"
+    search_fields = ["name"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures FuzzySearchFilter latency on BaseFood while the catalog grows "
+        "with synthetic rows. All inserted rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--query", default="курица")
+
+    def _random_name(self, rnd: random.Random, index: int) -> str:
+        words = [
+            "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+            for _ in range(rnd.randint(1, 3))
+        ]
+        return f"{' '.join(words)} {index}"
+
+    def _measure(self, query: str, repeat: int) -> float:
+        """Медианное время выполнения поиска (мс)."""
+        timings = []
+        for _ in range(repeat):
+            queryset = FuzzySearchFilter().filter_queryset(
+                _Request(query), BaseFood.objects.all(), _View()
+            )
+            start = time.perf_counter()
+            list(queryset[:20])
+            timings.append((time.perf_counter() - start) * 1000)
+        return median(timings)
+
+    def _plan(self, query: str) -> str:
+        queryset = FuzzySearchFilter().filter_queryset(
+            _Request(query), BaseFood.objects.all(), _View()
+        )
+        plan = queryset[:20].explain()
+        return "index" if "base_food_name_trgm_idx" in plan else "seq scan"
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        rnd = random.Random(42)
+
+        with transaction.atomic():
+            created = BaseFood.objects.count()
+            for size in sizes:
+                batch = [
+                    BaseFood(
+                        name=self._random_name(rnd, index),
+                        proteins=10,
+                        fats=10,
+                        carbohydrates=10,
+                        kcal=170,
+                    )
+                    for index in range(created, size)
+                ]
+                BaseFood.objects.bulk_create(batch, batch_size=5000)
+                created = max(created, size)
+
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {BaseFood._meta.db_table}")
+
+                latency = self._measure(options["query"], options["repeat"])
+                self.stdout.write(
+                    f"{created:>8} rows: {latency:8.2f} ms ({self._plan(options['query'])})"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished, data rolled back."))
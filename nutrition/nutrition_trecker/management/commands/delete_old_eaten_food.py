@@ -1,13 +1,38 @@
-from django.conf import settings
 from django.core.management.base import BaseCommand
-from nutrition_trecker.models import EatenFood
-from django.utils import timezone
+from nutrition_trecker.services.EatenFoodRetention import EatenFoodRetention
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        days_to_keep = settings.MAX_EATEN_FOOD_AGE_DAYS
-        threshold = timezone.now() - timezone.timedelta(days=days_to_keep)
+    help = (
+        "Deletes EatenFood rows older than MAX_EATEN_FOOD_AGE_DAYS in bounded batches. "
+        "With --archive daily totals of deleted days are kept in DailyNutritionTotal "
+        "and compacted into weekly totals after NUTRITION_HISTORY_DAILY_DAYS. "
+        "With --dump deleted rows are written to EATEN_FOOD_ARCHIVE_DIR as .npz files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--sleep", type=float, default=None, help="Pause between batches, seconds"
+        )
+        parser.add_argument(
+            "--lock-timeout",
+            type=int,
+            default=None,
+            help="Lock timeout for each batch, milliseconds (PostgreSQL)",
+        )
+        parser.add_argument("--archive", action="store_true")
+        parser.add_argument("--dump", action="store_true")
 
-        deleted_count, _ = EatenFood.objects.filter(eaten_at__lt=threshold).delete()
-        self.stdout.write(f"{deleted_count} old rows was deleted.")
+    def handle(self, *args, **options):
+        stats = EatenFoodRetention.run(
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+            lock_timeout_ms=options["lock_timeout"],
+            archive=options["archive"],
+            dump=options["dump"],
+        )
+        self.stdout.write(
+            f"{stats['deleted']} old rows was deleted "
+            f"({stats['batches']} batches, {stats['users']} users)."
+        )
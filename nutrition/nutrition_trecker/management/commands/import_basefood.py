@@ -1,26 +1,55 @@
-from django.core.management.base import BaseCommand
-from nutrition_trecker.models import BaseFood
-import csv
+from django.core.management.base import BaseCommand, CommandError
+from nutrition_trecker.services.BaseFoodImport import BaseFoodImport
 
 
 class Command(BaseCommand):
-    help = "Imports base food data from CSV"
+    help = (
+        "Imports base food data from CSV (name, proteins, fats, carbohydrates). "
+        "Existing products are updated by name, unchanged ones are skipped."
+    )
+
+    MAX_REPORTED = 20
 
     def add_arguments(self, parser):
         parser.add_argument("csv_file", type=str)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and show what would change without writing",
+        )
+
+    def _report_names(self, title, names):
+        if not names:
+            return
+        self.stdout.write(f"{title}:")
+        for name in names[: self.MAX_REPORTED]:
+            self.stdout.write(f"  {name}")
+        if len(names) > self.MAX_REPORTED:
+            self.stdout.write(f"  ... and {len(names) - self.MAX_REPORTED} more")
 
     def handle(self, *args, **options):
-        with open(options["csv_file"], "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row["name"].startswith("#"):
-                    continue
-                if BaseFood.objects.filter(name=row["name"]).exists():
-                    continue
-                BaseFood.objects.create(
-                    name=row["name"],
-                    proteins=float(row["proteins"]),
-                    fats=float(row["fats"]),
-                    carbohydrates=float(row["carbohydrates"]),
-                )
-        self.stdout.write(self.style.SUCCESS("Data imported successfully"))
+        with open(options["csv_file"], "r", encoding="utf-8", newline="") as file:
+            rows, errors = BaseFoodImport.read(file)
+
+        if errors:
+            for error in errors[: self.MAX_REPORTED]:
+                self.stderr.write(error)
+            raise CommandError(f"{len(errors)} invalid rows, nothing was imported.")
+
+        if options["dry_run"]:
+            diff = BaseFoodImport.diff(rows)
+            self._report_names("Would be created", diff["created"])
+            self._report_names("Would be updated", diff["updated"])
+        else:
+            diff = BaseFoodImport.save(rows)
+
+        summary = (
+            f"{len(diff['created'])} created, {len(diff['updated'])} updated, "
+            f"{diff['unchanged']} unchanged"
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run: {summary}")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Data imported successfully: {summary}")
+            )
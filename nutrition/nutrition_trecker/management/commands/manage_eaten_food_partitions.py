@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from nutrition_trecker.services.EatenFoodPartitions import EatenFoodPartitions
+from nutrition_trecker.services.EatenFoodRetention import EatenFoodRetention
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates monthly EatenFood partitions ahead of time and detaches or drops "
+        "expired ones (PostgreSQL, see migration 0011)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=EatenFoodPartitions.MONTHS_AHEAD
+        )
+        parser.add_argument(
+            "--expire",
+            choices=["detach", "drop"],
+            default=None,
+            help="Run retention: detach or drop expired partitions",
+        )
+        parser.add_argument("--archive", action="store_true")
+        parser.add_argument("--dump", action="store_true")
+
+    def handle(self, *args, **options):
+        if not EatenFoodPartitions.is_partitioned():
+            raise CommandError("EatenFood table is not partitioned.")
+
+        created = EatenFoodPartitions.ensure(options["months_ahead"])
+        self.stdout.write(f"{len(created)} partitions created: {', '.join(created)}")
+
+        if options["expire"]:
+            stats = EatenFoodRetention.run(
+                archive=options["archive"],
+                dump=options["dump"],
+                drop_partitions=options["expire"] == "drop",
+            )
+            self.stdout.write(
+                f"{stats['deleted']} old rows was deleted "
+                f"({stats['batches']} batches, {stats['users']} users)."
+            )
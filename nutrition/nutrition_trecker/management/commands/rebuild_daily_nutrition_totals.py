@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuilds DailyNutritionTotal rollup from EatenFood"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user_id", type=int, default=None)
+
+    def handle(self, *args, **options):
+        created = DailyNutritionRollup.rebuild(options["user_id"])
+        self.stdout.write(self.style.SUCCESS(f"{created} daily totals rebuilt."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+
+
+class Command(BaseCommand):
+    help = "Rebuilds FrequentFood (decayed per-user food frequencies) from EatenFood"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user_id", type=int, default=None)
+
+    def handle(self, *args, **options):
+        created = FrequentFoods.rebuild(options["user_id"])
+        self.stdout.write(self.style.SUCCESS(f"{created} frequent foods rebuilt."))
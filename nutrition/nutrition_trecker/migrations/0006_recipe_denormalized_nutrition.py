@@ -0,0 +1,127 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+def fill_recipe_nutrition(apps, schema_editor):
+    """Заполняет денормализованное кбжу для существующих рецептов."""
+    Recipe = apps.get_model("nutrition_trecker", "Recipe")
+    RecipeIngredient = apps.get_model("nutrition_trecker", "RecipeIngredient")
+
+    for recipe in Recipe.objects.all():
+        total = {"weight": 0.0, "proteins": 0.0, "fats": 0.0, "carbohydrates": 0.0}
+        total_kcal = 0.0
+        ingredients = RecipeIngredient.objects.filter(recipe=recipe).select_related(
+            "base_food", "custom_food"
+        )
+        for ing in ingredients:
+            source = ing.base_food or ing.custom_food or ing
+            coeff = ing.weight_grams / 100
+            total["weight"] += ing.weight_grams
+            for key in ("proteins", "fats", "carbohydrates"):
+                total[key] += round(float(getattr(source, key)) * coeff, 1)
+            if ing.base_food or ing.custom_food:
+                kcal_per_100g = float(source.kcal)
+            else:
+                kcal_per_100g = float(
+                    ing.proteins * 4 + ing.fats * 9 + ing.carbohydrates * 4
+                )
+            total_kcal += round(kcal_per_100g * coeff, 1)
+
+        if total["weight"] == 0:
+            continue
+
+        weight = total["weight"]
+        Recipe.objects.filter(pk=recipe.pk).update(
+            total_weight=round(weight, 1),
+            total_proteins=round(total["proteins"], 1),
+            total_fats=round(total["fats"], 1),
+            total_carbohydrates=round(total["carbohydrates"], 1),
+            total_kcal=round(total_kcal, 1),
+            proteins=round(total["proteins"] * 100 / weight, 1),
+            fats=round(total["fats"] * 100 / weight, 1),
+            carbohydrates=round(total["carbohydrates"] * 100 / weight, 1),
+            kcal=round(
+                (4 * total["proteins"] + 9 * total["fats"] + 4 * total["carbohydrates"])
+                * 100
+                / weight,
+                1,
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "nutrition_trecker",
+            "0005_alter_basefood_options_alter_customfood_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="carbohydrates",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=4
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="fats",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=4
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="kcal",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=6
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="proteins",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=4
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_carbohydrates",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=9
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_fats",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=9
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_kcal",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=10
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_proteins",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=9
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="total_weight",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=9
+            ),
+        ),
+        migrations.RunPython(fill_recipe_nutrition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:41
+
+from django.db import migrations, models
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Sum,
+    When,
+)
+from django.db.models.functions import Cast, Round, TruncDate
+
+
+def fill_daily_totals(apps, schema_editor):
+    """Заполняет сводную таблицу по уже существующим записям EatenFood."""
+    EatenFood = apps.get_model("nutrition_trecker", "EatenFood")
+    DailyNutritionTotal = apps.get_model("nutrition_trecker", "DailyNutritionTotal")
+
+    def nutrition(key):
+        if key == "kcal":
+            manual = F("proteins") * 4 + F("fats") * 9 + F("carbohydrates") * 4
+        else:
+            manual = F(key)
+        per_100g = Case(
+            When(base_food__isnull=False, then=F(f"base_food__{key}")),
+            When(custom_food__isnull=False, then=F(f"custom_food__{key}")),
+            When(recipe_food__isnull=False, then=F(f"recipe_food__{key}")),
+            default=manual,
+            output_field=DecimalField(),
+        )
+        return Sum(
+            ExpressionWrapper(
+                Round(
+                    Cast(Round(per_100g * 10) * F("weight_grams"), FloatField()) / 100
+                )
+                / 10,
+                output_field=DecimalField(),
+            )
+        )
+
+    keys = ("proteins", "fats", "carbohydrates", "kcal")
+    rows = (
+        EatenFood.objects.order_by()
+        .annotate(day=TruncDate("eaten_at"))
+        .values("user_id", "day")
+        .annotate(**{f"total_{key}": nutrition(key) for key in keys})
+    )
+    DailyNutritionTotal.objects.bulk_create(
+        (
+            DailyNutritionTotal(
+                user_id=row["user_id"],
+                day=row["day"],
+                **{key: row[f"total_{key}"] or 0 for key in keys},
+            )
+            for row in rows.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0006_recipe_denormalized_nutrition"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyNutritionTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("day", models.DateField()),
+                (
+                    "proteins",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=10),
+                ),
+                (
+                    "fats",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=10),
+                ),
+                (
+                    "carbohydrates",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=10),
+                ),
+                (
+                    "kcal",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=10),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Кбжу за день",
+                "verbose_name_plural": "Кбжу по дням",
+                "ordering": ["day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_id", "day"), name="unique_daily_nutrition_total"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_daily_totals, migrations.RunPython.noop),
+    ]
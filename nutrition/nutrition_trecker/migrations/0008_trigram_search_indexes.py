@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:54
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0007_dailynutritiontotal"),
+        # Расширение pg_trgm создаётся в миграции training
+        ("training", "0009_auto_20260116_1952"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="basefood",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="base_food_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customfood",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["custom_name"],
+                name="custom_food_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name", "description"],
+                name="recipe_name_trgm_idx",
+                opclasses=["gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ),
+    ]
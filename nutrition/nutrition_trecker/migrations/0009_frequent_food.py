@@ -0,0 +1,166 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:02
+
+import math
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_frequent_foods(apps, schema_editor):
+    """
+    Заполняет FrequentFood по уже существующим записям EatenFood
+    (та же формула, что в FrequentFoods.rebuild: вес приёма удваивается
+    каждые 14 дней от 2024-01-01, score — логарифм суммы весов).
+    """
+    EatenFood = apps.get_model("nutrition_trecker", "EatenFood")
+    FrequentFood = apps.get_model("nutrition_trecker", "FrequentFood")
+
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    half_life = 14 * 24 * 60 * 60
+    grouped = dict()
+    rows = (
+        EatenFood.objects.order_by()
+        .values_list(
+            "user_id", "base_food_id", "custom_food_id", "recipe_food_id", "eaten_at"
+        )
+        .iterator(chunk_size=1000)
+    )
+    for user_id, base_food_id, custom_food_id, recipe_food_id, eaten_at in rows:
+        log_weight = (eaten_at - epoch).total_seconds() * math.log(2) / half_life
+        sources = {
+            "base_food_id": base_food_id,
+            "custom_food_id": custom_food_id,
+            "recipe_food_id": recipe_food_id,
+        }
+        for field, food_id in sources.items():
+            if food_id is None:
+                continue
+            key = (user_id, field, food_id)
+            if key not in grouped:
+                grouped[key] = {
+                    "score": log_weight,
+                    "eaten_count": 1,
+                    "last_eaten_at": eaten_at,
+                }
+                continue
+            row = grouped[key]
+            # log(exp(a) + exp(b)) = max(a, b) + log(1 + exp(-|a - b|))
+            row["score"] = max(row["score"], log_weight) + math.log1p(
+                math.exp(-abs(row["score"] - log_weight))
+            )
+            row["eaten_count"] += 1
+            row["last_eaten_at"] = max(row["last_eaten_at"], eaten_at)
+
+    FrequentFood.objects.bulk_create(
+        (
+            FrequentFood(user_id=user_id, **{field: food_id}, **row)
+            for (user_id, field, food_id), row in grouped.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0008_trigram_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FrequentFood",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("score", models.FloatField(default=0)),
+                ("eaten_count", models.PositiveIntegerField(default=0)),
+                ("last_eaten_at", models.DateTimeField()),
+                (
+                    "base_food",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="nutrition_trecker.basefood",
+                    ),
+                ),
+                (
+                    "custom_food",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="nutrition_trecker.customfood",
+                    ),
+                ),
+                (
+                    "recipe_food",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="nutrition_trecker.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Частый продукт",
+                "verbose_name_plural": "Частые продукты",
+                "ordering": ["-score"],
+                "indexes": [
+                    models.Index(
+                        fields=["user_id", "-score"],
+                        name="nutrition_t_user_id_4adb3c_idx",
+                    )
+                ],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("base_food__isnull", False),
+                                ("custom_food__isnull", True),
+                                ("recipe_food__isnull", True),
+                            ),
+                            models.Q(
+                                ("base_food__isnull", True),
+                                ("custom_food__isnull", False),
+                                ("recipe_food__isnull", True),
+                            ),
+                            models.Q(
+                                ("base_food__isnull", True),
+                                ("custom_food__isnull", True),
+                                ("recipe_food__isnull", False),
+                            ),
+                            _connector="OR",
+                        ),
+                        name="frequentfood_has_one_source",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("base_food__isnull", False)),
+                        fields=("user_id", "base_food"),
+                        name="unique_frequent_base_food",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("custom_food__isnull", False)),
+                        fields=("user_id", "custom_food"),
+                        name="unique_frequent_custom_food",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("recipe_food__isnull", False)),
+                        fields=("user_id", "recipe_food"),
+                        name="unique_frequent_recipe_food",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_frequent_foods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0009_frequent_food"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eatenfood",
+            index=models.Index(fields=["eaten_at"], name="eatenfood_eaten_at_idx"),
+        ),
+    ]
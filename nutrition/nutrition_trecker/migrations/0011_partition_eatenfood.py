@@ -0,0 +1,132 @@
+from datetime import date, datetime, time
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = "nutrition_trecker_eatenfood"
+OLD_TABLE = f"{TABLE}_old"
+MONTHS_AHEAD = 3
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_start(month):
+    return timezone.make_aware(datetime.combine(month, time.min)).isoformat()
+
+
+def copy_indexes_and_foreign_keys(cursor, source, target):
+    """Переносит индексы (кроме первичного ключа) и внешние ключи с теми же именами."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE tablename = %s AND indexname <> %s",
+        [source, f"{source}_pkey"],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [source],
+    )
+    foreign_keys = cursor.fetchall()
+
+    for name, definition in indexes:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+        on_source = definition.index(" ON ")
+        using = definition.index(" USING ")
+        cursor.execute(definition[:on_source] + f' ON "{target}"' + definition[using:])
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{target}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def swap_table(cursor, create_sql, primary_key):
+    """Переименовывает таблицу, создаёт новую по create_sql и переносит в неё данные."""
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+    cursor.execute(
+        f'ALTER TABLE "{OLD_TABLE}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{OLD_TABLE}_pkey"'
+    )
+    cursor.execute(create_sql)
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ({primary_key})'
+    )
+    copy_indexes_and_foreign_keys(cursor, OLD_TABLE, TABLE)
+
+
+def finish_swap(cursor):
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+        f'COALESCE((SELECT max(id) FROM "{TABLE}"), 0) + 1, false)'
+    )
+    cursor.execute(f'DROP TABLE "{OLD_TABLE}"')
+
+
+def partition_eatenfood(apps, schema_editor):
+    """
+    Переводит EatenFood на помесячные секции по eaten_at (только PostgreSQL).
+    Первичный ключ секционированной таблицы должен включать eaten_at: (id, eaten_at).
+    Создаются секции от самого раннего месяца с данными до MONTHS_AHEAD месяцев вперёд
+    и секция по умолчанию; дальше секции поддерживает manage_eaten_food_partitions.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        swap_table(
+            cursor,
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING ALL EXCLUDING INDEXES) '
+            "PARTITION BY RANGE (eaten_at)",
+            "id, eaten_at",
+        )
+
+        cursor.execute(f'SELECT min(eaten_at) FROM "{OLD_TABLE}"')
+        (first,) = cursor.fetchone()
+        today = timezone.localdate()
+        month = (timezone.localdate(first) if first else today).replace(day=1)
+        last = today.replace(day=1)
+        for _ in range(MONTHS_AHEAD):
+            last = next_month(last)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{month_start(month)}') "
+                f"TO ('{month_start(next_month(month))}')"
+            )
+            month = next_month(month)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        finish_swap(cursor)
+
+
+def unpartition_eatenfood(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        swap_table(
+            cursor,
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING ALL EXCLUDING INDEXES)',
+            "id",
+        )
+        finish_swap(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0010_eatenfood_eaten_at_idx"),
+    ]
+
+    # Секционирование и составной ключ (id, eaten_at) существуют только в БД:
+    # в состоянии EatenFood остаётся обычной моделью с ключом id, чтобы ORM
+    # продолжал работать с одним полем. Дальнейшие изменения схемы EatenFood
+    # нельзя получать через makemigrations — только вручную написанные
+    # SeparateDatabaseAndState с SQL для секционированной таблицы.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(partition_eatenfood, unpartition_eatenfood),
+            ],
+            state_operations=[],
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("nutrition_trecker", "0011_partition_eatenfood"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklyNutritionTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("week_start", models.DateField()),
+                ("days_logged", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "proteins",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=12),
+                ),
+                (
+                    "fats",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=12),
+                ),
+                (
+                    "carbohydrates",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=12),
+                ),
+                (
+                    "kcal",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=12),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Кбжу за неделю",
+                "verbose_name_plural": "Кбжу по неделям",
+                "ordering": ["week_start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_id", "week_start"),
+                        name="unique_weekly_nutrition_total",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -5,7 +5,19 @@ from django.db.models.functions import Now
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from common.models.TimeStampedModel import TimeStampedModel
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def nutrient_for_weight(per_100g, weight_grams: int) -> float:
+    """
+    Значение нутриента (или ккал) для веса в граммах, округлённое до 0.1 половиной
+    вверх в десятичной арифметике — так же, как Round в SQL (сводное кбжу по дням)
+    и список приёмов пищи (FoodDataBuilder).
+    """
+    value = Decimal(str(per_100g)) * weight_grams / 100
+    return float(value.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
 
 
 class BaseFood(TimeStampedModel):
@@ -36,6 +48,13 @@ class BaseFood(TimeStampedModel):
     class Meta:
         verbose_name = "Базовый продукт"
         verbose_name_plural = "Базовые продукты"
+        indexes = [
+            GinIndex(
+                name="base_food_name_trgm_idx",
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 condition=Q(proteins__lte=100 - F("fats") - F("carbohydrates")),
@@ -115,6 +134,11 @@ class CustomFood(TimeStampedModel):
         verbose_name_plural = "Пользовательские продукты"
         indexes = [
             models.Index(fields=["user_id", "custom_name"]),
+            GinIndex(
+                name="custom_food_name_trgm_idx",
+                fields=["custom_name"],
+                opclasses=["gin_trgm_ops"],
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -153,11 +177,68 @@ class Recipe(TimeStampedModel):
     name = models.CharField(max_length=255, verbose_name="Название рецепта")
     description = models.TextField(blank=True, verbose_name="Описание")
 
+    # Денормализованное кбжу рецепта, поддерживается сигналами ингредиентов
+    # и продуктов (см. update_nutrition)
+    total_weight = models.DecimalField(
+        max_digits=9, decimal_places=1, default=0, editable=False
+    )
+    total_proteins = models.DecimalField(
+        max_digits=9, decimal_places=1, default=0, editable=False
+    )
+    total_fats = models.DecimalField(
+        max_digits=9, decimal_places=1, default=0, editable=False
+    )
+    total_carbohydrates = models.DecimalField(
+        max_digits=9, decimal_places=1, default=0, editable=False
+    )
+    total_kcal = models.DecimalField(
+        max_digits=10, decimal_places=1, default=0, editable=False
+    )
+    proteins = models.DecimalField(
+        max_digits=4, decimal_places=1, default=0, editable=False
+    )
+    fats = models.DecimalField(
+        max_digits=4, decimal_places=1, default=0, editable=False
+    )
+    carbohydrates = models.DecimalField(
+        max_digits=4, decimal_places=1, default=0, editable=False
+    )
+    kcal = models.DecimalField(
+        max_digits=6, decimal_places=1, default=0, editable=False
+    )
+
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            GinIndex(
+                name="recipe_name_trgm_idx",
+                fields=["name", "description"],
+                opclasses=["gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ]
         ordering = ["created_at"]
 
+    @staticmethod
+    def empty_nutrition() -> dict:
+        """Кбжу рецепта без ингредиентов."""
+        return {
+            "per_100g": {
+                "weight": 0.0,
+                "proteins": 0.0,
+                "fats": 0.0,
+                "carbohydrates": 0.0,
+                "kcal": 0.0,
+            },
+            "total": {
+                "weight": 0.0,
+                "proteins": 0.0,
+                "fats": 0.0,
+                "carbohydrates": 0.0,
+                "kcal": 0.0,
+            },
+        }
+
     def calculate_nutrition(self) -> dict:
         """
         Возвращает суммарное и средние на 100 г БЖУ и калории для рецепта.
@@ -170,7 +251,7 @@ class Recipe(TimeStampedModel):
             "kcal": 0.0,
         }
 
-        ingredients = self.ingredients.all()
+        ingredients = self.ingredients.select_related("base_food", "custom_food")
 
         for ing in ingredients:
             total["weight"] += ing.weight_grams  # Суммируем вес
@@ -184,22 +265,7 @@ class Recipe(TimeStampedModel):
 
         # Нормируем на 100 г (если вес рецепта > 0)
         if total["weight"] == 0:
-            return {
-                "per_100g": {
-                    "weight": 0.0,
-                    "proteins": 0.0,
-                    "fats": 0.0,
-                    "carbohydrates": 0.0,
-                    "kcal": 0.0,
-                },
-                "total": {
-                    "weight": 0.0,
-                    "proteins": 0.0,
-                    "fats": 0.0,
-                    "carbohydrates": 0.0,
-                    "kcal": 0.0,
-                },
-            }
+            return self.empty_nutrition()
 
         result = {
             "total_weight": round(total["weight"], 1),
@@ -224,6 +290,51 @@ class Recipe(TimeStampedModel):
 
         return result
 
+    def update_nutrition(self) -> None:
+        """
+        Пересчитывает кбжу по ингредиентам и сохраняет его в денормализованные поля.
+        Сохраняет через update(), чтобы не вызывать сигналы Recipe и не воссоздавать
+        рецепт, удаляемый каскадом вместе с ингредиентами.
+        """
+        nutrition = self.calculate_nutrition()
+        fields = {
+            "total_weight": nutrition.get("total_weight", 0.0),
+            "total_proteins": nutrition["total"]["proteins"],
+            "total_fats": nutrition["total"]["fats"],
+            "total_carbohydrates": nutrition["total"]["carbohydrates"],
+            "total_kcal": nutrition["total"]["kcal"],
+            "proteins": nutrition["per_100g"]["proteins"],
+            "fats": nutrition["per_100g"]["fats"],
+            "carbohydrates": nutrition["per_100g"]["carbohydrates"],
+            "kcal": nutrition["per_100g"]["kcal"],
+        }
+        for field, value in fields.items():
+            setattr(self, field, value)
+        Recipe.objects.filter(pk=self.pk).update(**fields)
+
+    def get_nutrition(self) -> dict:
+        """
+        Возвращает суммарное и средние на 100 г БЖУ и калории для рецепта
+        из денормализованных полей (без обхода ингредиентов).
+        """
+        if not self.total_weight:
+            return self.empty_nutrition()
+        return {
+            "total_weight": float(self.total_weight),
+            "total": {
+                "proteins": float(self.total_proteins),
+                "fats": float(self.total_fats),
+                "carbohydrates": float(self.total_carbohydrates),
+                "kcal": float(self.total_kcal),
+            },
+            "per_100g": {
+                "proteins": float(self.proteins),
+                "fats": float(self.fats),
+                "carbohydrates": float(self.carbohydrates),
+                "kcal": float(self.kcal),
+            },
+        }
+
     def get_ingredients_with_details(self) -> list:
         """
         Возвращает список ингредиентов с деталями.
@@ -456,12 +567,11 @@ class RecipeIngredient(TimeStampedModel):
                 (self.proteins * 4) + (self.fats * 9) + (self.carbohydrates * 4)
             )
 
-        return round(kcal_per_100g * self.weight_grams / 100, 1)
+        return nutrient_for_weight(kcal_per_100g, self.weight_grams)
 
     def get_nutrition(self) -> dict:
         """Возвращает полную информацию о нутриентах"""
         nutrition = {"kcal": float(self.calculate_total_kcal())}
-        coeff = self.weight_grams / 100
         if self.base_food:
             source = self.base_food
         elif self.custom_food:
@@ -469,18 +579,22 @@ class RecipeIngredient(TimeStampedModel):
         else:
             nutrition.update(
                 {
-                    "proteins": round(float(self.proteins) * coeff, 1),
-                    "fats": round(float(self.fats) * coeff, 1),
-                    "carbohydrates": round(float(self.carbohydrates) * coeff, 1),
+                    "proteins": nutrient_for_weight(self.proteins, self.weight_grams),
+                    "fats": nutrient_for_weight(self.fats, self.weight_grams),
+                    "carbohydrates": nutrient_for_weight(
+                        self.carbohydrates, self.weight_grams
+                    ),
                 }
             )
             return nutrition
 
         nutrition.update(
             {
-                "proteins": round(float(source.proteins) * coeff, 1),
-                "fats": round(float(source.fats) * coeff, 1),
-                "carbohydrates": round(float(source.carbohydrates) * coeff, 1),
+                "proteins": nutrient_for_weight(source.proteins, self.weight_grams),
+                "fats": nutrient_for_weight(source.fats, self.weight_grams),
+                "carbohydrates": nutrient_for_weight(
+                    source.carbohydrates, self.weight_grams
+                ),
             }
         )
         return nutrition
@@ -507,7 +621,15 @@ class RecipeIngredient(TimeStampedModel):
 
 
 class EatenFood(TimeStampedModel):
-    """Записи о потреблённых продуктах."""
+    """
+    Записи о потреблённых продуктах.
+
+    В PostgreSQL таблица секционирована по eaten_at (миграция 0011) с первичным
+    ключом (id, eaten_at), а состояние миграций по-прежнему описывает обычную
+    таблицу с ключом id. Поэтому изменения схемы этой модели makemigrations
+    сгенерирует неверно: их нужно писать вручную (SeparateDatabaseAndState
+    с SQL для секционированной таблицы и её секций).
+    """
 
     user_id = models.BigIntegerField(db_index=True)
     eaten_at = models.DateTimeField(
@@ -565,6 +687,8 @@ class EatenFood(TimeStampedModel):
         verbose_name_plural = "Приёмы пищи"
         indexes = [
             models.Index(fields=["user_id", "eaten_at"]),
+            # Для удаления устаревших записей пакетами по eaten_at
+            models.Index(fields=["eaten_at"], name="eatenfood_eaten_at_idx"),
         ]
         constraints = [
             models.CheckConstraint(
@@ -680,7 +804,9 @@ class EatenFood(TimeStampedModel):
                     "При выборе base_food, custom_food или recipe_food нельзя указывать ручные значения БЖУ."
                 )
 
-        if self.recipe_food is not None and not self.recipe_food.ingredients.exists():
+        # Вес рецепта денормализован (Recipe.update_nutrition) и равен нулю,
+        # только пока у рецепта нет ингредиентов
+        if self.recipe_food is not None and not self.recipe_food.total_weight:
             raise ValidationError(
                 "При выборе recipe_food нельзя выбирать рецепт без ингредиентов."
             )
@@ -692,47 +818,42 @@ class EatenFood(TimeStampedModel):
         elif self.custom_food:
             kcal_per_100g = self.custom_food.kcal
         elif self.recipe_food:
-            kcal_per_100g = self.recipe_food.calculate_nutrition()["per_100g"]["kcal"]
+            kcal_per_100g = self.recipe_food.kcal
         else:
             kcal_per_100g = (
                 (self.proteins * 4) + (self.fats * 9) + (self.carbohydrates * 4)
             )
 
-        return round(kcal_per_100g * self.weight_grams / 100, 1)
+        return nutrient_for_weight(kcal_per_100g, self.weight_grams)
 
     def get_nutrition(self) -> dict:
         """Возвращает полную информацию о нутриентах"""
         nutrition = {"kcal": float(self.calculate_total_kcal())}
-        coeff = self.weight_grams / 100
         if self.base_food:
             source = self.base_food
         elif self.custom_food:
             source = self.custom_food
         elif self.recipe_food:
-            source = self.recipe_food.calculate_nutrition()["per_100g"]
-            nutrition.update(
-                {
-                    "proteins": round(source["proteins"] * coeff, 1),
-                    "fats": round(source["fats"] * coeff, 1),
-                    "carbohydrates": round(source["carbohydrates"] * coeff, 1),
-                }
-            )
-            return nutrition
+            source = self.recipe_food
         else:
             nutrition.update(
                 {
-                    "proteins": round(float(self.proteins) * coeff, 1),
-                    "fats": round(float(self.fats) * coeff, 1),
-                    "carbohydrates": round(float(self.carbohydrates) * coeff, 1),
+                    "proteins": nutrient_for_weight(self.proteins, self.weight_grams),
+                    "fats": nutrient_for_weight(self.fats, self.weight_grams),
+                    "carbohydrates": nutrient_for_weight(
+                        self.carbohydrates, self.weight_grams
+                    ),
                 }
             )
             return nutrition
 
         nutrition.update(
             {
-                "proteins": round(float(source.proteins) * coeff, 1),
-                "fats": round(float(source.fats) * coeff, 1),
-                "carbohydrates": round(float(source.carbohydrates) * coeff, 1),
+                "proteins": nutrient_for_weight(source.proteins, self.weight_grams),
+                "fats": nutrient_for_weight(source.fats, self.weight_grams),
+                "carbohydrates": nutrient_for_weight(
+                    source.carbohydrates, self.weight_grams
+                ),
             }
         )
         return nutrition
@@ -760,3 +881,132 @@ class EatenFood(TimeStampedModel):
         if None not in [self.name, self.proteins, self.fats, self.carbohydrates]:
             self.kcal = self.calculate_total_kcal()
         super().save(*args, **kwargs)
+
+
+class DailyNutritionTotal(models.Model):
+    """
+    Сводное кбжу пользователя по дням (локальная дата приёма пищи).
+    Поддерживается сигналами EatenFood и источников продуктов,
+    полностью пересобирается командой rebuild_daily_nutrition_totals.
+    """
+
+    user_id = models.BigIntegerField()
+    day = models.DateField()
+    proteins = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    fats = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    carbohydrates = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    kcal = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Кбжу за день"
+        verbose_name_plural = "Кбжу по дням"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "day"], name="unique_daily_nutrition_total"
+            ),
+        ]
+        ordering = ["day"]
+
+    def __str__(self):
+        return f"{self.day} (Б: {self.proteins}, Ж: {self.fats}, У: {self.carbohydrates}, ккал: {self.kcal}) [user: {self.user_id}]"
+
+
+class WeeklyNutritionTotal(models.Model):
+    """
+    Архивное кбжу пользователя по неделям (week_start — понедельник): суммы за неделю
+    и число дней с записями. Заполняется NutritionArchive при сжатии
+    DailyNutritionTotal старше NUTRITION_HISTORY_DAILY_DAYS дней и хранится бессрочно.
+    """
+
+    user_id = models.BigIntegerField()
+    week_start = models.DateField()
+    days_logged = models.PositiveSmallIntegerField(default=0)
+    proteins = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    fats = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    carbohydrates = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    kcal = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Кбжу за неделю"
+        verbose_name_plural = "Кбжу по неделям"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "week_start"], name="unique_weekly_nutrition_total"
+            ),
+        ]
+        ordering = ["week_start"]
+
+    def __str__(self):
+        return f"{self.week_start} ({self.days_logged} дн., ккал: {self.kcal}) [user: {self.user_id}]"
+
+
+class FrequentFood(models.Model):
+    """
+    Часто и недавно съедаемые пользователем продукты и рецепты.
+    score — логарифм суммы весов приёмов пищи, вес убывает вдвое каждые
+    FrequentFoods.HALF_LIFE_DAYS дней. Поддерживается сигналами EatenFood,
+    полностью пересобирается командой rebuild_frequent_foods.
+    """
+
+    user_id = models.BigIntegerField()
+    base_food = models.ForeignKey(
+        BaseFood, on_delete=models.CASCADE, null=True, blank=True
+    )
+    custom_food = models.ForeignKey(
+        CustomFood, on_delete=models.CASCADE, null=True, blank=True
+    )
+    recipe_food = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, null=True, blank=True
+    )
+    score = models.FloatField(default=0)
+    eaten_count = models.PositiveIntegerField(default=0)
+    last_eaten_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Частый продукт"
+        verbose_name_plural = "Частые продукты"
+        indexes = [
+            models.Index(fields=["user_id", "-score"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    Q(base_food__isnull=False)
+                    & Q(custom_food__isnull=True)
+                    & Q(recipe_food__isnull=True)
+                )
+                | (
+                    Q(base_food__isnull=True)
+                    & Q(custom_food__isnull=False)
+                    & Q(recipe_food__isnull=True)
+                )
+                | (
+                    Q(base_food__isnull=True)
+                    & Q(custom_food__isnull=True)
+                    & Q(recipe_food__isnull=False)
+                ),
+                name="frequentfood_has_one_source",
+            ),
+            models.UniqueConstraint(
+                fields=["user_id", "base_food"],
+                condition=Q(base_food__isnull=False),
+                name="unique_frequent_base_food",
+            ),
+            models.UniqueConstraint(
+                fields=["user_id", "custom_food"],
+                condition=Q(custom_food__isnull=False),
+                name="unique_frequent_custom_food",
+            ),
+            models.UniqueConstraint(
+                fields=["user_id", "recipe_food"],
+                condition=Q(recipe_food__isnull=False),
+                name="unique_frequent_recipe_food",
+            ),
+        ]
+        ordering = ["-score"]
+
+    def __str__(self):
+        source = self.base_food_id or self.custom_food_id or self.recipe_food_id
+        return f"{source} (score: {self.score:.2f}, count: {self.eaten_count}) [user: {self.user_id}]"
@@ -1,7 +1,14 @@
 from common.mixins.ModelCleanMixin import ModelCleanMixin
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from nutrition_trecker import models
 from common.custom.OwnedPrimaryKeyRelatedField import OwnedPrimaryKeyRelatedField
+from common.custom.BulkPrimaryKeyRelatedField import BulkPrimaryKeyRelatedField
+from common.custom.BulkListSerializer import BulkListSerializer
+from nutrition_trecker.services.EatenFoodBulk import EatenFoodBulk
+from nutrition_trecker.services.RecipeIngredientBulk import RecipeIngredientBulk
+from datetime import datetime, time, timedelta
 
 
 class BaseFoodSerializer(serializers.ModelSerializer):
@@ -62,11 +69,35 @@ class RecipeSerializer(ModelCleanMixin, serializers.ModelSerializer):
         ]  # user_id задаем во view через self.request.user
 
 
+class RecipeIngredientListSerializer(BulkListSerializer):
+    """
+    Пакетное сохранение ингредиентов рецепта через RecipeIngredientBulk.
+    Элементы с id изменяют существующие ингредиенты, без id - добавляются.
+    При полном обновлении (PUT) ингредиенты, которых нет в списке, удаляются.
+    """
+
+    allow_create_on_update = True
+
+    def update(self, instance, validated_data):
+        objs = []
+        for attrs in validated_data:
+            pk = attrs.pop("id", None)
+            if pk is None:
+                objs.append(self.child.Meta.model(**attrs))
+                continue
+            obj = self._instances[pk]
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            objs.append(obj)
+        recipe = self.context["view"]._get_recipe()
+        return RecipeIngredientBulk.save(recipe, objs, replace=not self.partial)
+
+
 class RecipeIngredientSerializer(ModelCleanMixin, serializers.ModelSerializer):
     source_type = serializers.SerializerMethodField(read_only=True)
     source_data = serializers.SerializerMethodField(read_only=True)
 
-    base_food_id = serializers.PrimaryKeyRelatedField(
+    base_food_id = BulkPrimaryKeyRelatedField(
         queryset=models.BaseFood.objects.all(),
         source="base_food",
         write_only=True,
@@ -138,13 +169,36 @@ class RecipeIngredientSerializer(ModelCleanMixin, serializers.ModelSerializer):
             "source_data",
         ]
         read_only_fields = ["id", "user_id", "recipe"]
+        list_serializer_class = RecipeIngredientListSerializer
+
+
+class EatenFoodListSerializer(BulkListSerializer):
+    """
+    Пакетная валидация и сохранение EatenFood (см. BulkListSerializer),
+    сохранение идёт через EatenFoodBulk.
+    """
+
+    def create(self, validated_data):
+        objs = [self.child.Meta.model(**attrs) for attrs in validated_data]
+        user_id = self.context["request"].user.telegram_id
+        return EatenFoodBulk.create(user_id, objs)
+
+    def update(self, instance, validated_data):
+        objs = []
+        for attrs in validated_data:
+            obj = self._instances[attrs.pop("id")]
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            objs.append(obj)
+        user_id = self.context["request"].user.telegram_id
+        return EatenFoodBulk.update(user_id, objs)
 
 
 class EatenFoodSerializer(ModelCleanMixin, serializers.ModelSerializer):
     source_type = serializers.SerializerMethodField(read_only=True)
     source_data = serializers.SerializerMethodField(read_only=True)
 
-    base_food_id = serializers.PrimaryKeyRelatedField(
+    base_food_id = BulkPrimaryKeyRelatedField(
         queryset=models.BaseFood.objects.all(),
         source="base_food",
         write_only=True,
@@ -198,15 +252,14 @@ class EatenFoodSerializer(ModelCleanMixin, serializers.ModelSerializer):
                     },
                 }
             case "recipe":
-                nutrition = obj.recipe_food.calculate_nutrition()["per_100g"]
                 data = {
                     "recipe_food_id": obj.recipe_food.id,
                     "name": obj.recipe_food.name,
                     "per_100g": {
-                        "proteins": nutrition["proteins"],
-                        "fats": nutrition["fats"],
-                        "carbohydrates": nutrition["carbohydrates"],
-                        "kcal": nutrition["kcal"],
+                        "proteins": obj.recipe_food.proteins,
+                        "fats": obj.recipe_food.fats,
+                        "carbohydrates": obj.recipe_food.carbohydrates,
+                        "kcal": obj.recipe_food.kcal,
                     },
                 }
             case "manual":
@@ -237,3 +290,52 @@ class EatenFoodSerializer(ModelCleanMixin, serializers.ModelSerializer):
             "source_data",
         ]
         read_only_fields = ["id", "user_id"]
+        list_serializer_class = EatenFoodListSerializer
+
+
+class EatenFoodCopySerializer(serializers.Serializer):
+    """
+    Параметры копирования приёмов пищи: список id или день (с необязательным
+    интервалом времени) и дата/время, на которое переносится самая ранняя запись.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=200,
+    )
+    date = serializers.DateField(required=False)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
+    target = serializers.DateTimeField()
+
+    def validate_target(self, value):
+        if value < timezone.now() - timedelta(days=settings.MAX_EATEN_FOOD_AGE_DAYS):
+            raise serializers.ValidationError(
+                f"Дата не может быть старше {settings.MAX_EATEN_FOOD_AGE_DAYS} дней."
+            )
+        return value
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("date" in attrs):
+            raise serializers.ValidationError("Нужно указать либо ids, либо date.")
+        if "date" not in attrs and ("start_time" in attrs or "end_time" in attrs):
+            raise serializers.ValidationError(
+                "Интервал времени указывается только вместе с date."
+            )
+        return attrs
+
+    def get_source_queryset(self, queryset):
+        """Возвращает копируемые записи из queryset пользователя."""
+        attrs = self.validated_data
+        if "ids" in attrs:
+            return queryset.filter(pk__in=attrs["ids"])
+
+        start = timezone.make_aware(
+            datetime.combine(attrs["date"], attrs.get("start_time", time.min))
+        )
+        end = timezone.make_aware(
+            datetime.combine(attrs["date"], attrs.get("end_time", time.max))
+        )
+        return queryset.filter(eaten_at__gte=start, eaten_at__lte=end)
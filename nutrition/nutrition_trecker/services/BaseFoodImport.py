@@ -0,0 +1,198 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from common.utils.CacheHelper import CacheHelper
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from io import StringIO
+from typing import Dict, List, TextIO, Tuple, TypedDict
+import csv
+import logging
+
+logger = logging.getLogger("nutrition")
+
+Macros = Tuple[Decimal, Decimal, Decimal]
+
+
+class ImportDiff(TypedDict):
+    created: List[str]
+    updated: List[str]
+    unchanged: int
+
+
+class BaseFoodImport:
+    """
+    Идемпотентный импорт базы продуктов из CSV (колонки name, proteins, fats,
+    carbohydrates). Все строки проверяются до записи, в БД пишутся только новые
+    и изменившиеся продукты: в PostgreSQL через COPY во временную таблицу
+    и INSERT ... ON CONFLICT (name) DO UPDATE с расчётом kcal в SQL.
+    Сигналы BaseFood не вызываются: рецепты и сводное кбжу пересчитываются
+    по изменённым продуктам, версия кэша base_food увеличивается один раз.
+    """
+
+    BATCH_SIZE = 1000
+    FIELDS = ("proteins", "fats", "carbohydrates")
+    STAGING_TABLE = "basefood_import"
+
+    @classmethod
+    def _parse_macro(cls, value: str) -> Decimal:
+        return Decimal(value.strip().replace(",", ".")).quantize(
+            Decimal("0.1"), rounding=ROUND_HALF_UP
+        )
+
+    @classmethod
+    def read(cls, file: TextIO) -> Tuple[Dict[str, Macros], List[str]]:
+        """
+        Читает CSV построчно и проверяет строки как BaseFood.clean.
+        Строки, где name начинается с #, пропускаются.
+        Возвращает {name: (proteins, fats, carbohydrates)} и список ошибок.
+        """
+        reader = csv.DictReader(file)
+        missing = {"name", *cls.FIELDS} - set(reader.fieldnames or [])
+        if missing:
+            return dict(), [f"Missing columns: {', '.join(sorted(missing))}"]
+
+        max_length = models.BaseFood._meta.get_field("name").max_length
+        rows = dict()
+        errors = []
+        for row in reader:
+            name = row["name"] or ""
+            if name.startswith("#"):
+                continue
+            line = f"Line {reader.line_num}"
+            if not name or len(name) > max_length:
+                errors.append(f"{line}: name must be 1-{max_length} characters")
+                continue
+            try:
+                macros = tuple(
+                    cls._parse_macro(row[field] or "") for field in cls.FIELDS
+                )
+            except InvalidOperation:
+                errors.append(
+                    f"{line}: proteins, fats and carbohydrates must be numbers"
+                )
+                continue
+            if any(value < 0 or value > 100 for value in macros):
+                errors.append(f"{line}: nutrients must be between 0 and 100")
+            elif sum(macros) > 100:
+                errors.append(f"{line}: nutrients sum exceeds 100 g per 100 g")
+            elif name in rows:
+                errors.append(f"{line}: duplicate name {name!r}")
+            else:
+                rows[name] = macros
+        return rows, errors
+
+    @classmethod
+    def diff(cls, rows: Dict[str, Macros]) -> ImportDiff:
+        """Сравнивает строки с текущей базой продуктов (одним запросом)."""
+        existing = {
+            name: tuple(macros)
+            for name, *macros in models.BaseFood.objects.order_by()
+            .values_list("name", *cls.FIELDS)
+            .iterator(chunk_size=cls.BATCH_SIZE * 10)
+        }
+        created, updated = [], []
+        for name, macros in rows.items():
+            if name not in existing:
+                created.append(name)
+            elif existing[name] != macros:
+                updated.append(name)
+        return {
+            "created": created,
+            "updated": updated,
+            "unchanged": len(rows) - len(created) - len(updated),
+        }
+
+    @classmethod
+    def _copy_upsert(cls, rows: Dict[str, Macros], now: datetime) -> None:
+        """COPY во временную таблицу и один INSERT ... ON CONFLICT из неё (PostgreSQL)."""
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        for name, macros in rows.items():
+            writer.writerow([name, *macros])
+        buffer.seek(0)
+
+        qn = connection.ops.quote_name
+        table = qn(models.BaseFood._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {cls.STAGING_TABLE} (name varchar(255), "
+                "proteins numeric(4, 1), fats numeric(4, 1), "
+                "carbohydrates numeric(4, 1)) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY {cls.STAGING_TABLE} (name, proteins, fats, carbohydrates) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"INSERT INTO {table} AS t "
+                "(name, proteins, fats, carbohydrates, kcal, created_at, updated_at) "
+                "SELECT name, proteins, fats, carbohydrates, "
+                "round(proteins * 4 + fats * 9 + carbohydrates * 4, 1), %s, %s "
+                f"FROM {cls.STAGING_TABLE} "
+                "ON CONFLICT (name) DO UPDATE SET proteins = EXCLUDED.proteins, "
+                "fats = EXCLUDED.fats, carbohydrates = EXCLUDED.carbohydrates, "
+                "kcal = EXCLUDED.kcal, updated_at = EXCLUDED.updated_at "
+                "WHERE (t.proteins, t.fats, t.carbohydrates) IS DISTINCT FROM "
+                "(EXCLUDED.proteins, EXCLUDED.fats, EXCLUDED.carbohydrates)",
+                [now, now],
+            )
+
+    @classmethod
+    def _bulk_upsert(cls, rows: Dict[str, Macros]) -> None:
+        objs = []
+        for name, (proteins, fats, carbohydrates) in rows.items():
+            obj = models.BaseFood(
+                name=name, proteins=proteins, fats=fats, carbohydrates=carbohydrates
+            )
+            obj.kcal = obj.calculate_kcal()
+            objs.append(obj)
+        models.BaseFood.objects.bulk_create(
+            objs,
+            batch_size=cls.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=[*cls.FIELDS, "kcal", "updated_at"],
+        )
+
+    @classmethod
+    def _refresh_dependents(cls, updated: Q) -> None:
+        """Повторяет сигналы BaseFood для изменённых продуктов одним проходом."""
+        foods = models.BaseFood.objects.filter(updated)
+        recipes = list(
+            models.Recipe.objects.filter(ingredients__base_food__in=foods).distinct()
+        )
+        for recipe in recipes:
+            recipe.update_nutrition()
+        DailyNutritionRollup.refresh_for_sources(
+            Q(base_food__in=foods) | Q(recipe_food__in=recipes)
+        )
+        for user_id in {recipe.user_id for recipe in recipes}:
+            CacheHelper.invalidate(["recipe"], user_id)
+
+    @classmethod
+    def save(cls, rows: Dict[str, Macros]) -> ImportDiff:
+        """Записывает новые и изменившиеся продукты, возвращает diff импорта."""
+        diff = cls.diff(rows)
+        changed = {name: rows[name] for name in diff["created"] + diff["updated"]}
+        if not changed:
+            return diff
+
+        now = timezone.now()
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                cls._copy_upsert(changed, now)
+            else:
+                cls._bulk_upsert(changed)
+            if diff["updated"]:
+                cls._refresh_dependents(Q(updated_at__gte=now, created_at__lt=now))
+            CacheHelper.invalidate(["base_food"])
+
+        logger.info(
+            f"BaseFood import: {len(diff['created'])} created, "
+            f"{len(diff['updated'])} updated, {diff['unchanged']} unchanged"
+        )
+        return diff
@@ -0,0 +1,286 @@
+from django.conf import settings
+from django.core.cache import cache
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from datetime import date
+from io import BytesIO
+from typing import TypedDict, List, Optional, Dict
+import multiprocessing
+import threading
+import hashlib
+import time
+import base64
+import json
+
+
+class ChartSeries(TypedDict):
+    title: str
+    color: str
+    target: Optional[float]
+    values: List[float]
+
+
+class ChartsData(TypedDict):
+    dates: List[str]
+    labels: List[str]
+    charts: Dict[str, ChartSeries]
+
+
+class RenderedChart(TypedDict):
+    image: bytes
+    content_type: str
+    etag: str
+    last_modified: float
+
+
+class ChartValidators(TypedDict):
+    etag: str
+    last_modified: Optional[float]
+
+
+def _render_chart(
+    title: str,
+    color: str,
+    labels: List[str],
+    values: List[float],
+    target: Optional[float],
+    image_format: str,
+) -> bytes:
+    """
+    Рисует один столбчатый график через объектный API matplotlib (без глобального
+    состояния pyplot), поэтому функция потокобезопасна и может выполняться в пуле процессов.
+    """
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+
+    bars = ax.bar(labels, values, color=color, edgecolor="black", alpha=0.7)
+
+    # Добавляем линию уровня (если указана)
+    if target is not None:
+        ax.axhline(
+            y=target,
+            color="red",
+            linestyle="--",
+            linewidth=1,
+            label=f"Цель: {target}",
+        )
+        ax.legend()
+
+    # Настройки графика
+    ax.set_title(title, fontsize=14)
+    ax.set_xlabel("Дата", fontsize=12)
+    ax.set_ylabel(title.split(" (")[0], fontsize=12)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    ax.tick_params(axis="x", labelrotation=45)
+
+    # Добавляем значения на столбцы
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(
+            bar.get_x() + bar.get_width() / 2.0,
+            height,
+            f"{height}",
+            ha="center",
+            va="bottom",
+            fontsize=9,
+        )
+
+    buf = BytesIO()
+    fig.savefig(buf, format=image_format, dpi=100, bbox_inches="tight")
+    return buf.getvalue()
+
+
+class ChartRenderer:
+    """
+    Класс для построения графиков кбжу по дням: кэширует готовые изображения
+    по хэшу входных данных и при необходимости рендерит их в пуле процессов.
+    """
+
+    NUTRIENTS = {
+        "proteins": {"title": "Белки (г)", "color": "skyblue"},
+        "fats": {"title": "Жиры (г)", "color": "gold"},
+        "carbohydrates": {"title": "Углеводы (г)", "color": "lightgreen"},
+        "kcal": {"title": "Калории (ккал)", "color": "lightcoral"},
+    }
+    IMAGE_FORMATS = ("png", "svg")
+    CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+    CACHE_PREFIX = "nutrition_chart"
+    MODIFIED_PREFIX = "nutrition_chart_modified"
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def series_build(
+        cls,
+        days_data: Dict[str, Dict[str, float]],
+        targets: Dict[str, Optional[float]],
+    ) -> ChartsData:
+        """Возвращает данные графиков (даты, подписи, значения и цели), чтобы клиент мог нарисовать их сам."""
+        sorted_dates = sorted(days_data.keys())
+        return {
+            "dates": sorted_dates,
+            "labels": [date.fromisoformat(d).strftime("%d.%m") for d in sorted_dates],
+            "charts": {
+                key: {
+                    "title": nutrient["title"],
+                    "color": nutrient["color"],
+                    "target": targets.get(key),
+                    "values": [days_data[d][key] for d in sorted_dates],
+                }
+                for key, nutrient in cls.NUTRIENTS.items()
+            },
+        }
+
+    @classmethod
+    def chart_digest(
+        cls, user_id: int | str, series: ChartsData, key: str, image_format: str
+    ) -> str:
+        """
+        Возвращает хэш пользователя, диапазона дат, цели и значений графика.
+        Используется как ключ кэша изображения и как его ETag.
+        """
+        payload = json.dumps(
+            {
+                "user_id": user_id,
+                "dates": series["dates"],
+                "chart": series["charts"][key],
+                "format": image_format,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def chart_validators(
+        cls, user_id: int | str, series: ChartsData, key: str, image_format: str
+    ) -> ChartValidators:
+        """
+        Возвращает ETag и время первого рендеринга графика без рендеринга
+        (last_modified равно None, если график ещё не в кэше).
+        """
+        digest = cls.chart_digest(user_id, series, key, image_format)
+        return {
+            "etag": digest,
+            "last_modified": cache.get(f"{cls.MODIFIED_PREFIX}:{digest}"),
+        }
+
+    @classmethod
+    def _get_executor(cls) -> Optional[ProcessPoolExecutor]:
+        """Возвращает общий пул процессов для рендеринга (None, если пул отключён в настройках)."""
+        workers = settings.NUTRITION_CHARTS_RENDER_WORKERS
+        if workers <= 0:
+            return None
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return cls._executor
+
+    @classmethod
+    def _render_many(
+        cls,
+        user_id: int | str,
+        series: ChartsData,
+        keys: List[str],
+        image_format: str,
+    ) -> Dict[str, RenderedChart]:
+        """
+        Возвращает графики выбранных нутриентов. Готовые изображения берутся из кэша,
+        недостающие рендерятся синхронно: пул процессов (если он включён) лишь
+        распараллеливает пакет из нескольких графиков, вызывающий поток ждёт их все.
+        """
+        if image_format not in cls.IMAGE_FORMATS:
+            raise ValueError(f"Unsupported chart format: {image_format}")
+
+        digests = {
+            key: cls.chart_digest(user_id, series, key, image_format) for key in keys
+        }
+        cache_keys = {
+            key: f"{cls.CACHE_PREFIX}:{digest}" for key, digest in digests.items()
+        }
+        cached = cache.get_many(list(cache_keys.values()))
+
+        missing = [key for key in keys if cache_keys[key] not in cached]
+        if missing:
+            jobs = [
+                (
+                    series["charts"][key]["title"],
+                    series["charts"][key]["color"],
+                    series["labels"],
+                    series["charts"][key]["values"],
+                    series["charts"][key]["target"],
+                    image_format,
+                )
+                for key in missing
+            ]
+            executor = cls._get_executor() if len(jobs) > 1 else None
+            if executor is not None:
+                # Первый график рендерится в этом потоке, пока пул рисует остальные
+                futures = [executor.submit(_render_chart, *job) for job in jobs[1:]]
+                images = [_render_chart(*jobs[0])]
+                images += [future.result() for future in futures]
+            else:
+                images = [_render_chart(*job) for job in jobs]
+
+            rendered_at = time.time()
+            new_charts = {
+                cache_keys[key]: {"image": image, "rendered_at": rendered_at}
+                for key, image in zip(missing, images)
+            }
+            # Время рендеринга хранится и отдельно, чтобы условный запрос
+            # не забирал из кэша само изображение
+            modified = {
+                f"{cls.MODIFIED_PREFIX}:{digests[key]}": rendered_at for key in missing
+            }
+            cache.set_many(
+                {**new_charts, **modified}, settings.NUTRITION_CHARTS_CACHE_TTL
+            )
+            cached.update(new_charts)
+
+        return {
+            key: {
+                "image": cached[cache_keys[key]]["image"],
+                "content_type": cls.CONTENT_TYPES[image_format],
+                "etag": digests[key],
+                "last_modified": cached[cache_keys[key]]["rendered_at"],
+            }
+            for key in keys
+        }
+
+    @classmethod
+    def render(
+        cls,
+        user_id: int | str,
+        series: ChartsData,
+        image_format: str = "png",
+    ) -> List[bytes]:
+        """Возвращает изображения всех графиков в порядке NUTRIENTS."""
+        charts = cls._render_many(user_id, series, list(cls.NUTRIENTS), image_format)
+        return [chart["image"] for chart in charts.values()]
+
+    @classmethod
+    def render_chart(
+        cls,
+        user_id: int | str,
+        series: ChartsData,
+        key: str,
+        image_format: str = "png",
+    ) -> RenderedChart:
+        """Возвращает один график с типом содержимого, ETag и временем первого рендеринга."""
+        return cls._render_many(user_id, series, [key], image_format)[key]
+
+    @classmethod
+    def render_encoded(
+        cls,
+        user_id: int | str,
+        series: ChartsData,
+        image_format: str = "png",
+    ) -> List[str]:
+        """Возвращает графики строками: PNG в base64, SVG как текст разметки."""
+        images = cls.render(user_id, series, image_format)
+        if image_format == "svg":
+            return [image.decode("utf-8") for image in images]
+        return [base64.b64encode(image).decode("utf-8") for image in images]
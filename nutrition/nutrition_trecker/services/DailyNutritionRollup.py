@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.FoodDataBuilder import FoodDataBuilder
+from common.utils.CacheHelper import CacheHelper
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+
+class DailyNutritionRollup:
+    """Класс для поддержки сводной таблицы DailyNutritionTotal (кбжу пользователей по дням)"""
+
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def _upsert(cls, rows: Iterable[dict]) -> int:
+        """Вставляет или обновляет строки сводной таблицы из результата FoodDataBuilder._eaten_food_days_totals."""
+        objs = [
+            models.DailyNutritionTotal(
+                user_id=row["user_id"],
+                day=row["day"],
+                **{
+                    key: row[f"total_{key}"] or 0
+                    for key in FoodDataBuilder.NUTRITION_KEYS
+                },
+            )
+            for row in rows
+        ]
+        models.DailyNutritionTotal.objects.bulk_create(
+            objs,
+            batch_size=cls.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["user_id", "day"],
+            update_fields=[*FoodDataBuilder.NUTRITION_KEYS, "updated_at"],
+        )
+        return len(objs)
+
+    @classmethod
+    def refresh_days(cls, user_id: int, days: Iterable[date]) -> None:
+        """Пересчитывает кбжу пользователя за выбранные дни по записям EatenFood."""
+        days = set(days)
+        if not days:
+            return
+
+        rows = list(
+            FoodDataBuilder._eaten_food_days_totals(
+                models.EatenFood.objects.filter(
+                    FoodDataBuilder.eaten_at_day_range(min(days), max(days)),
+                    user_id=user_id,
+                    eaten_at__date__in=days,
+                ),
+                "user_id",
+            )
+        )
+        cls._upsert(rows)
+
+        empty_days = days - {row["day"] for row in rows}
+        if empty_days:
+            models.DailyNutritionTotal.objects.filter(
+                user_id=user_id, day__in=empty_days
+            ).delete()
+
+    @classmethod
+    def refresh_for_sources(cls, condition: Q) -> None:
+        """
+        Пересчитывает дни всех пользователей, в которые есть записи EatenFood,
+        подходящие под условие (например, ссылающиеся на изменённый продукт).
+        Кбжу этих записей читается из источника, поэтому версия кэша eatenfood
+        таких пользователей тоже увеличивается (иначе ETag списка не изменится).
+        """
+        pairs = (
+            models.EatenFood.objects.filter(condition)
+            .order_by()
+            .annotate(day=TruncDate("eaten_at"))
+            .values_list("user_id", "day")
+            .distinct()
+        )
+        days_by_user = dict()
+        for user_id, day in pairs:
+            days_by_user.setdefault(user_id, set()).add(day)
+
+        for user_id, days in days_by_user.items():
+            cls.refresh_days(user_id, days)
+            CacheHelper.invalidate(["eatenfood"], user_id)
+
+    @classmethod
+    def rebuild(cls, user_id: Optional[int] = None) -> int:
+        """
+        Полностью пересобирает сводную таблицу (для всех или для одного пользователя).
+        Архивные дни старше MAX_EATEN_FOOD_AGE_DAYS, записи которых уже удалены,
+        сохраняются: пересчитываются только дни, которые ещё есть в EatenFood.
+        """
+        first_day = timezone.localdate() - timedelta(
+            days=settings.MAX_EATEN_FOOD_AGE_DAYS
+        )
+        eaten = models.EatenFood.objects.all()
+        totals = models.DailyNutritionTotal.objects.filter(day__gte=first_day)
+        if user_id is not None:
+            eaten = eaten.filter(user_id=user_id)
+            totals = totals.filter(user_id=user_id)
+
+        rows = FoodDataBuilder._eaten_food_days_totals(eaten, "user_id")
+
+        created = 0
+        with transaction.atomic():
+            totals.delete()
+            batch = []
+            for row in rows.iterator(chunk_size=cls.BATCH_SIZE):
+                batch.append(row)
+                if len(batch) >= cls.BATCH_SIZE:
+                    created += cls._upsert(batch)
+                    batch = []
+            created += cls._upsert(batch)
+
+        return created
@@ -0,0 +1,206 @@
+from django.db import connection, transaction
+from django.db.models import (
+    QuerySet,
+    F,
+    Value,
+    DateTimeField,
+    DurationField,
+    ExpressionWrapper,
+)
+from django.db.models.functions import Now
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+from common.utils.BulkDelete import BulkDelete
+from common.utils.CacheHelper import CacheHelper
+from rest_framework.exceptions import ValidationError
+from datetime import date, datetime
+from typing import Iterable, List, Set, Tuple
+
+
+class EatenFoodBulk:
+    """
+    Пакетные операции с EatenFood: один INSERT/UPDATE/DELETE (или INSERT ... SELECT
+    при копировании) на пакет в одной транзакции.
+    Сигналы модели при этом не вызываются, поэтому сводные таблицы пересчитываются
+    только по затронутым дням и продуктам, а версия кэша eatenfood увеличивается один раз.
+    """
+
+    BATCH_SIZE = 500
+    UPDATE_FIELDS = [
+        "eaten_at",
+        "weight_grams",
+        "base_food",
+        "custom_food",
+        "recipe_food",
+        "name",
+        "proteins",
+        "fats",
+        "carbohydrates",
+        "kcal",
+        "updated_at",
+    ]
+
+    @classmethod
+    def _prepare(cls, obj: models.EatenFood) -> models.EatenFood:
+        """Повторяет EatenFood.save(): пересчёт kcal для ручного ввода."""
+        if None not in [obj.name, obj.proteins, obj.fats, obj.carbohydrates]:
+            obj.kcal = obj.calculate_total_kcal()
+        return obj
+
+    @classmethod
+    def _rows_changes(cls, rows: Iterable[dict]) -> Tuple[Set[date], Set[Tuple]]:
+        """Дни и источники записей (словари с eaten_at и *_id полями источников)."""
+        days = set()
+        sources = set()
+        for row in rows:
+            days.add(timezone.localdate(row["eaten_at"]))
+            sources.update(FrequentFoods.sources_of(row))
+        return days, sources
+
+    @classmethod
+    def _snapshot(cls, queryset: QuerySet, *fields: str) -> List[dict]:
+        return list(
+            queryset.values(
+                "eaten_at", "base_food_id", "custom_food_id", "recipe_food_id", *fields
+            ).order_by()
+        )
+
+    @classmethod
+    def _objs_rows(cls, objs: Iterable[models.EatenFood]) -> List[dict]:
+        return [
+            {
+                "eaten_at": obj.eaten_at,
+                "base_food_id": obj.base_food_id,
+                "custom_food_id": obj.custom_food_id,
+                "recipe_food_id": obj.recipe_food_id,
+            }
+            for obj in objs
+        ]
+
+    @classmethod
+    def _after_change(cls, user_id: int, rows: Iterable[dict]) -> None:
+        days, sources = cls._rows_changes(rows)
+        DailyNutritionRollup.refresh_days(user_id, days)
+        FrequentFoods.refresh(user_id, sources)
+        CacheHelper.invalidate(["eatenfood"], user_id)
+
+    @classmethod
+    def create(
+        cls, user_id: int, objs: List[models.EatenFood]
+    ) -> List[models.EatenFood]:
+        """Создаёт записи пользователя одним INSERT."""
+        for obj in objs:
+            obj.user_id = user_id
+            cls._prepare(obj)
+
+        with transaction.atomic():
+            created = models.EatenFood.objects.bulk_create(
+                objs, batch_size=cls.BATCH_SIZE
+            )
+            cls._after_change(user_id, cls._objs_rows(created))
+        return created
+
+    @classmethod
+    def update(
+        cls, user_id: int, objs: List[models.EatenFood]
+    ) -> List[models.EatenFood]:
+        """Сохраняет изменённые записи пользователя одним UPDATE."""
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+            cls._prepare(obj)
+
+        with transaction.atomic():
+            previous = cls._snapshot(
+                models.EatenFood.objects.filter(
+                    user_id=user_id, pk__in=[obj.pk for obj in objs]
+                )
+            )
+            models.EatenFood.objects.bulk_update(
+                objs, cls.UPDATE_FIELDS, batch_size=cls.BATCH_SIZE
+            )
+            cls._after_change(user_id, previous + cls._objs_rows(objs))
+        return objs
+
+    @classmethod
+    def delete(cls, user_id: int, ids: Iterable[int]) -> int:
+        """Удаляет записи пользователя одним DELETE, возвращает число удалённых."""
+        queryset = models.EatenFood.objects.filter(user_id=user_id, pk__in=ids)
+
+        with transaction.atomic():
+            previous = cls._snapshot(queryset, "pk")
+            deleted = BulkDelete.delete_pks(
+                models.EatenFood, [row["pk"] for row in previous]
+            )
+            cls._after_change(user_id, previous)
+        return deleted
+
+    # Колонки, которые переносятся при копировании записей без изменений
+    COPY_FIELDS = [
+        "user_id",
+        "weight_grams",
+        "base_food_id",
+        "custom_food_id",
+        "recipe_food_id",
+        "name",
+        "proteins",
+        "fats",
+        "carbohydrates",
+        "kcal",
+    ]
+
+    @classmethod
+    def copy(cls, user_id: int, queryset: QuerySet, target: datetime) -> int:
+        """
+        Копирует выбранные записи пользователя так, чтобы самая ранняя из них пришлась
+        на target (остальные сдвигаются на тот же интервал), одним INSERT ... SELECT.
+        Возвращает число созданных записей.
+        """
+        queryset = queryset.filter(user_id=user_id).order_by()
+        rows = cls._snapshot(queryset)
+        if not rows:
+            return 0
+
+        shift = target - min(row["eaten_at"] for row in rows)
+        if max(row["eaten_at"] for row in rows) + shift > timezone.now():
+            # То же ограничение, что и eatenfood_date_valid, но с понятной ошибкой
+            raise ValidationError(
+                {"target": "Дата приёма пищи не может быть в будущем."}
+            )
+
+        copied = [{**row, "eaten_at": row["eaten_at"] + shift} for row in rows]
+
+        meta = models.EatenFood._meta
+        select = queryset.annotate(
+            copy_eaten_at=ExpressionWrapper(
+                F("eaten_at") + Value(shift, output_field=DurationField()),
+                output_field=DateTimeField(),
+            ),
+            copy_created_at=Now(),
+            copy_updated_at=Now(),
+            **{f"copy_{field}": F(field) for field in cls.COPY_FIELDS},
+        ).values_list(
+            "copy_eaten_at",
+            "copy_created_at",
+            "copy_updated_at",
+            *(f"copy_{field}" for field in cls.COPY_FIELDS),
+        )
+        columns = ["eaten_at", "created_at", "updated_at", *cls.COPY_FIELDS]
+        select_sql, params = select.query.sql_with_params()
+        sql = "INSERT INTO {} ({}) {}".format(
+            connection.ops.quote_name(meta.db_table),
+            ", ".join(
+                connection.ops.quote_name(meta.get_field(column).column)
+                for column in columns
+            ),
+            select_sql,
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                created = cursor.rowcount
+            cls._after_change(user_id, copied)
+        return created
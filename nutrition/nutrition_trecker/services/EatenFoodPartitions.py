@@ -0,0 +1,154 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from nutrition_trecker import models
+from datetime import date, datetime, time as dt_time
+from typing import Dict, List, Optional, Set, Tuple
+import re
+
+
+class EatenFoodPartitions:
+    """
+    Помесячное секционирование таблицы EatenFood по eaten_at (PostgreSQL,
+    таблица переводится на секции миграцией 0011). Секция <таблица>_pYYYYMM хранит
+    месяц по местному времени, строки вне созданных секций попадают в <таблица>_default.
+    Устаревшие секции отсоединяются (и удаляются) целиком, без удаления строк.
+    """
+
+    MONTHS_AHEAD = 3
+
+    @classmethod
+    def table(cls) -> str:
+        return models.EatenFood._meta.db_table
+
+    @classmethod
+    def default_partition(cls) -> str:
+        return f"{cls.table()}_default"
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f"{cls.table()}_p{month:%Y%m}"
+
+    @classmethod
+    def next_month(cls, month: date) -> date:
+        return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+    @classmethod
+    def month_bounds(cls, month: date) -> Tuple[datetime, datetime]:
+        """Границы месяца по местному времени: [начало, начало следующего)."""
+        start = timezone.make_aware(datetime.combine(month.replace(day=1), dt_time.min))
+        end = timezone.make_aware(datetime.combine(cls.next_month(month), dt_time.min))
+        return start, end
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        if connection.vendor != "postgresql":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+                [cls.table()],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def partitions(cls) -> Dict[date, str]:
+        """Месячные секции: {первый день месяца: имя секции}."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass",
+                [cls.table()],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        pattern = re.compile(rf"^{re.escape(cls.table())}_p(\d{{4}})(\d{{2}})$")
+        result = dict()
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                result[date(int(match[1]), int(match[2]), 1)] = name
+        return result
+
+    @classmethod
+    def _create(cls, month: date) -> None:
+        """
+        Создаёт секцию месяца. Строки этого месяца, уже попавшие в секцию по умолчанию,
+        переносятся в новую секцию (иначе PostgreSQL не даст её создать).
+        """
+        qn = connection.ops.quote_name
+        table, default = qn(cls.table()), qn(cls.default_partition())
+        start, end = (value.isoformat() for value in cls.month_bounds(month))
+        in_month = f"eaten_at >= '{start}' AND eaten_at < '{end}'"
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})")
+            (has_rows,) = cursor.fetchone()
+            if has_rows:
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+            cursor.execute(
+                f"CREATE TABLE {qn(cls.partition_name(month))} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+            if has_rows:
+                cursor.execute(
+                    f"INSERT INTO {table} SELECT * FROM {default} WHERE {in_month}"
+                )
+                cursor.execute(f"DELETE FROM {default} WHERE {in_month}")
+                cursor.execute(
+                    f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"
+                )
+
+    @classmethod
+    def ensure(
+        cls, months_ahead: Optional[int] = None, today: Optional[date] = None
+    ) -> List[str]:
+        """Создаёт секции текущего и months_ahead следующих месяцев, возвращает созданные."""
+        months_ahead = cls.MONTHS_AHEAD if months_ahead is None else months_ahead
+        month = (today or timezone.localdate()).replace(day=1)
+        existing = cls.partitions()
+
+        created = []
+        for _ in range(months_ahead + 1):
+            if month not in existing:
+                cls._create(month)
+                created.append(cls.partition_name(month))
+            month = cls.next_month(month)
+        return created
+
+    @classmethod
+    def expired(cls, threshold: datetime) -> List[str]:
+        """Секции, все строки которых старше threshold."""
+        return [
+            name
+            for month, name in sorted(cls.partitions().items())
+            if cls.month_bounds(month)[1] <= threshold
+        ]
+
+    @classmethod
+    def detach_expired(
+        cls, threshold: datetime, drop: bool = True
+    ) -> Tuple[int, Dict[int, Set[Tuple]]]:
+        """
+        Отсоединяет (и при drop=True удаляет) устаревшие секции.
+        Возвращает число строк в них и источники записей по пользователям
+        {user_id: {(base_food_id, custom_food_id, recipe_food_id), ...}}.
+        """
+        qn = connection.ops.quote_name
+        removed = 0
+        sources: Dict[int, Set[Tuple]] = dict()
+        for name in cls.expired(threshold):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT user_id, base_food_id, custom_food_id, recipe_food_id, "
+                    f"count(*) FROM {qn(name)} GROUP BY 1, 2, 3, 4"
+                )
+                for user_id, *source, count in cursor.fetchall():
+                    sources.setdefault(user_id, set()).add(tuple(source))
+                    removed += count
+                cursor.execute(
+                    f"ALTER TABLE {qn(cls.table())} DETACH PARTITION {qn(name)}"
+                )
+                if drop:
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+        return removed, sources
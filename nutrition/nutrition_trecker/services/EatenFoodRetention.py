@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+from nutrition_trecker.services.EatenFoodPartitions import EatenFoodPartitions
+from nutrition_trecker.services.NutritionArchive import NutritionArchive
+from common.utils.BulkDelete import BulkDelete
+from common.utils.CacheHelper import CacheHelper
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Optional, Set, Tuple, TypedDict
+import logging
+import time
+
+logger = logging.getLogger("nutrition")
+
+
+class RetentionStats(TypedDict):
+    deleted: int
+    batches: int
+    users: int
+
+
+class EatenFoodRetention:
+    """
+    Удаление устаревших записей EatenFood (старше MAX_EATEN_FOOD_AGE_DAYS) пакетами
+    ограниченного размера в порядке индекса по eaten_at. Каждый пакет удаляется в своей
+    короткой транзакции (заблокированные приложением строки пропускаются до следующего
+    запуска), между пакетами делается пауза. Сигналы на каждую запись не вызываются:
+    частые продукты пересчитываются и версия кэша eatenfood увеличивается
+    один раз на каждого затронутого пользователя.
+    Удаляются только целые (по местному времени) дни, поэтому сводное кбжу за них
+    можно сохранить в DailyNutritionTotal как компактный архив (archive=True),
+    который дальше сжимается по неделям (см. NutritionArchive).
+    Если таблица секционирована (см. EatenFoodPartitions), целиком устаревшие месяцы
+    удаляются сразу секциями.
+    """
+
+    MAX_RETRIES = 3
+
+    @classmethod
+    def threshold(cls, today: Optional[date] = None) -> datetime:
+        """Начало самого раннего хранимого дня (по местному времени)."""
+        today = today or timezone.localdate()
+        first_day = today - timedelta(days=settings.MAX_EATEN_FOOD_AGE_DAYS)
+        return timezone.make_aware(datetime.combine(first_day, dt_time.min))
+
+    @classmethod
+    def _set_lock_timeout(cls, lock_timeout_ms: int) -> None:
+        if lock_timeout_ms and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = %s", [f"{lock_timeout_ms}ms"])
+
+    @classmethod
+    def _delete_batch(
+        cls, threshold: datetime, batch_size: int, lock_timeout_ms: int
+    ) -> list:
+        with transaction.atomic():
+            cls._set_lock_timeout(lock_timeout_ms)
+            queryset = models.EatenFood.objects.filter(eaten_at__lt=threshold)
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            rows = list(
+                queryset.order_by("eaten_at", "id").values_list(
+                    "id",
+                    "user_id",
+                    "base_food_id",
+                    "custom_food_id",
+                    "recipe_food_id",
+                )[:batch_size]
+            )
+            if rows:
+                BulkDelete.delete_pks(models.EatenFood, [row[0] for row in rows])
+        return rows
+
+    @classmethod
+    def _add_sources(
+        cls, sources: Dict[int, Set[Tuple[str, int]]], user_id: int, source
+    ) -> None:
+        """Добавляет источники записи (base_food_id, custom_food_id, recipe_food_id)."""
+        base_food_id, custom_food_id, recipe_food_id = source
+        sources.setdefault(user_id, set()).update(
+            FrequentFoods.sources_of(
+                {
+                    "base_food_id": base_food_id,
+                    "custom_food_id": custom_food_id,
+                    "recipe_food_id": recipe_food_id,
+                }
+            )
+        )
+
+    @classmethod
+    def run(
+        cls,
+        batch_size: Optional[int] = None,
+        sleep: Optional[float] = None,
+        lock_timeout_ms: Optional[int] = None,
+        archive: bool = False,
+        threshold: Optional[datetime] = None,
+        drop_partitions: bool = True,
+        dump: bool = False,
+    ) -> RetentionStats:
+        """
+        Удаляет устаревшие записи, возвращает статистику запуска.
+        При drop_partitions=False устаревшие секции только отсоединяются от таблицы,
+        при dump=True записи перед удалением выгружаются на диск (NutritionArchive.dump).
+        """
+        batch_size = batch_size or settings.EATEN_FOOD_RETENTION_BATCH_SIZE
+        sleep = settings.EATEN_FOOD_RETENTION_SLEEP if sleep is None else sleep
+        if lock_timeout_ms is None:
+            lock_timeout_ms = settings.EATEN_FOOD_RETENTION_LOCK_TIMEOUT_MS
+        threshold = threshold or cls.threshold()
+
+        if archive and not NutritionArchive.daily_totals_complete(threshold):
+            # Кбжу удаляемых дней сохранилось бы в архиве нулями
+            logger.error(
+                "EatenFood retention skipped: DailyNutritionTotal is missing days "
+                "to archive, run rebuild_daily_nutrition_totals"
+            )
+            return {"deleted": 0, "batches": 0, "users": 0}
+
+        sources: Dict[int, Set[Tuple[str, int]]] = dict()
+        deleted = 0
+        batches = 0
+        retries = 0
+
+        if dump:
+            NutritionArchive.dump(threshold)
+
+        if EatenFoodPartitions.is_partitioned():
+            # Целиком устаревшие месяцы удаляются вместе с секциями,
+            # пакетами удаляется только остаток в текущих секциях
+            deleted, partition_sources = EatenFoodPartitions.detach_expired(
+                threshold, drop=drop_partitions
+            )
+            for user_id, user_sources in partition_sources.items():
+                for source in user_sources:
+                    cls._add_sources(sources, user_id, source)
+
+        while True:
+            try:
+                rows = cls._delete_batch(threshold, batch_size, lock_timeout_ms)
+            except OperationalError as e:
+                # Например, истёк lock_timeout: пробуем позже, не задерживая приложение
+                retries += 1
+                logger.warning(f"EatenFood retention batch failed ({retries}): {e}")
+                if retries > cls.MAX_RETRIES:
+                    break
+                time.sleep(sleep)
+                continue
+
+            retries = 0
+            if not rows:
+                break
+            for _, user_id, *source in rows:
+                cls._add_sources(sources, user_id, source)
+            deleted += len(rows)
+            batches += 1
+            if len(rows) < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+
+        with transaction.atomic():
+            if not archive:
+                models.DailyNutritionTotal.objects.filter(
+                    day__lt=timezone.localdate(threshold)
+                ).delete()
+            for user_id, user_sources in sources.items():
+                FrequentFoods.refresh(user_id, user_sources)
+                CacheHelper.invalidate(["eatenfood"], user_id)
+        if archive:
+            NutritionArchive.compact()
+
+        logger.info(
+            f"EatenFood retention: {deleted} rows deleted in {batches} batches "
+            f"for {len(sources)} users"
+        )
+        return {"deleted": deleted, "batches": batches, "users": len(sources)}
@@ -1,17 +1,29 @@
+from django.conf import settings
+from django.utils import timezone
 from django.utils.dateparse import parse_date
-from django.db.models import QuerySet
+from django.db.models import (
+    QuerySet,
+    Q,
+    Case,
+    When,
+    F,
+    Sum,
+    DecimalField,
+    ExpressionWrapper,
+    FloatField,
+)
+from django.db.models.functions import Cast, Coalesce, Round, TruncDate
 from nutrition_trecker import models
+from nutrition_trecker.services.ChartRenderer import (
+    ChartRenderer,
+    ChartsData,
+)
 from rest_framework.request import Request
 from rest_framework.exceptions import ValidationError
-from datetime import timedelta, date
-import matplotlib
+from datetime import timedelta, date, datetime, time
+import numpy as np
 from typing import TypedDict, List, Optional, Tuple, Union, Dict
 
-matplotlib.use("Agg")
-from matplotlib import pyplot as plt
-from io import BytesIO
-import base64
-
 
 class NutritionInfo(TypedDict):
     proteins: float
@@ -46,12 +58,17 @@ class RecipeInfo(TypedDict):
 class FoodDataBuilder:
     """Класс для получения данных из моделей nutrition_trecker"""
 
+    NUTRITION_KEYS = ("proteins", "fats", "carbohydrates", "kcal")
+
     @classmethod
-    def parse_date_range(cls, request: Request) -> Dict[str, Optional[date]]:
+    def parse_date_range(
+        cls, request: Request, max_days: int = 31
+    ) -> Dict[str, Optional[date]]:
         """
         Парсит диапазон дат или одну конкретную дату из request.
         Возвращает словарь {"date": date, "start_date": start_date, "end_date": end_date},
         где значения - datetime.date объекты или None.
+        Диапазон не может превышать max_days дней.
         """
         date_str = request.query_params.get("date")
         start_date_str = request.query_params.get("start_date")
@@ -76,9 +93,9 @@ class FoodDataBuilder:
                     {"detail": "Начальная дата должна быть раньше конечной"}
                 )
             delta = end_date - start_date
-            if delta.days > 31:
+            if delta.days > max_days:
                 raise ValidationError(
-                    {"detail": "Диапазон дат не может превышать 31 день"}
+                    {"detail": f"Диапазон дат не может превышать {max_days} дн."}
                 )
             return {"date": None, "start_date": start_date, "end_date": end_date}
         else:
@@ -91,80 +108,210 @@ class FoodDataBuilder:
         """
         Возвращает tuple со списком продуктов и блюд с полным кбжу
         из данного queryset и суммарный кбжу в виде словаря.
+        Значения на 100 грамм забираются одним запросом (values_list),
+        кбжу строк и суммарный кбжу считаются векторно через NumPy.
         """
-        total_nutrition = {
-            "proteins": 0.0,
-            "fats": 0.0,
-            "carbohydrates": 0.0,
-            "kcal": 0.0,
-        }
+        macros = cls.NUTRITION_KEYS[:-1]
+        rows = list(
+            qs.values_list(
+                "pk",
+                "base_food_id",
+                "custom_food_id",
+                "recipe_food_id",
+                "weight_grams",
+                "eaten_at",
+                "created_at",
+                "updated_at",
+                Coalesce(
+                    "base_food__name",
+                    "custom_food__custom_name",
+                    "recipe_food__name",
+                    "name",
+                ),
+                *(
+                    Coalesce(
+                        f"base_food__{key}",
+                        f"custom_food__{key}",
+                        f"recipe_food__{key}",
+                        key,
+                    )
+                    for key in macros
+                ),
+                Coalesce("base_food__kcal", "custom_food__kcal", "recipe_food__kcal"),
+            )
+        )
+
+        # Значения на 100 г хранятся с одним знаком, поэтому считаются точно
+        # в целых десятых: x * w / 100 с округлением половины вверх, как
+        # nutrient_for_weight и Round в SQL (np.round округляет половину к чётному)
+        per_100g = np.array([row[9:] for row in rows], dtype=float).reshape(-1, 4)
+        weights = np.array([row[4] for row in rows], dtype=np.int64)
+
+        # Для ручного ввода ккал на 100 грамм считаются из БЖУ
+        manual_kcal = per_100g[:, :3] @ np.array([4.0, 9.0, 4.0])
+        per_100g[:, 3] = np.where(np.isnan(per_100g[:, 3]), manual_kcal, per_100g[:, 3])
+
+        tenths = np.rint(per_100g * 10).astype(np.int64) * weights[:, np.newaxis]
+        nutritions = ((tenths + 50) // 100) / 10
+        totals = ((tenths + 50) // 100).sum(axis=0) / 10
+
         results = []
-        for eaten in qs:
+        for row, nutrition in zip(rows, nutritions.tolist()):
+            pk, base_food_id, custom_food_id, recipe_food_id = row[:4]
             food = dict()
-            food["id"] = eaten.pk
-            food["type"] = eaten.get_type()
-            match food["type"]:
-                case "base":
-                    food["base_food_id"] = eaten.base_food_id
-                case "custom":
-                    food["custom_food_id"] = eaten.custom_food_id
-                case "recipe":
-                    food["recipe_id"] = eaten.recipe_food_id
-            food["name"] = eaten.get_name()
-            food["weight_grams"] = eaten.weight_grams
-            food["nutrition"] = eaten.get_nutrition()
-            food["eaten_at"] = eaten.eaten_at
-            food["created_at"] = eaten.created_at.isoformat()
-            food["updated_at"] = eaten.updated_at.isoformat()
-
-            total_nutrition["proteins"] += food["nutrition"]["proteins"]
-            total_nutrition["fats"] += food["nutrition"]["fats"]
-            total_nutrition["carbohydrates"] += food["nutrition"]["carbohydrates"]
-            total_nutrition["kcal"] += food["nutrition"]["kcal"]
-
-            for key, value in total_nutrition.items():
-                total_nutrition[key] = round(value, 1)
-
+            food["id"] = pk
+            if base_food_id is not None:
+                food["type"] = "base"
+                food["base_food_id"] = base_food_id
+            elif custom_food_id is not None:
+                food["type"] = "custom"
+                food["custom_food_id"] = custom_food_id
+            elif recipe_food_id is not None:
+                food["type"] = "recipe"
+                food["recipe_id"] = recipe_food_id
+            else:
+                food["type"] = "manual"
+            food["name"] = row[8]
+            food["weight_grams"] = row[4]
+            food["nutrition"] = dict(zip(cls.NUTRITION_KEYS, nutrition))
+            food["eaten_at"] = row[5]
+            food["created_at"] = row[6].isoformat()
+            food["updated_at"] = row[7].isoformat()
             results.append(food)
 
+        total_nutrition = dict(zip(cls.NUTRITION_KEYS, totals.tolist()))
+
         return (results, total_nutrition)
 
+    @classmethod
+    def _eaten_food_nutrition_expression(cls, key: str) -> ExpressionWrapper:
+        """
+        Возвращает SQL-выражение значения нутриента (или ккал) одной записи EatenFood
+        с учётом источника (base/custom/recipe/ручной ввод) и округлением,
+        повторяющим EatenFood.get_nutrition(): значение на 100 г переводится в целые
+        десятые и умножается на вес; целое, делённое на 100 в float, даёт точную
+        половину, поэтому она округляется вверх и в PostgreSQL, и в SQLite
+        (где после CAST AS NUMERIC целые делились бы нацело).
+        """
+        if key == "kcal":
+            manual_per_100g = F("proteins") * 4 + F("fats") * 9 + F("carbohydrates") * 4
+        else:
+            manual_per_100g = F(key)
+
+        per_100g = Case(
+            When(base_food__isnull=False, then=F(f"base_food__{key}")),
+            When(custom_food__isnull=False, then=F(f"custom_food__{key}")),
+            When(recipe_food__isnull=False, then=F(f"recipe_food__{key}")),
+            default=manual_per_100g,
+            output_field=DecimalField(),
+        )
+        return ExpressionWrapper(
+            Round(Cast(Round(per_100g * 10) * F("weight_grams"), FloatField()) / 100)
+            / 10,
+            output_field=DecimalField(),
+        )
+
+    @classmethod
+    def eaten_at_day_range(cls, start_date: date, end_date: date) -> Q:
+        """
+        Условие на приёмы пищи за дни с start_date по end_date (по местному времени).
+        В отличие от eaten_at__date сравнивает сам eaten_at, поэтому использует индексы
+        по eaten_at и отсекает лишние секции таблицы EatenFood.
+        """
+        start = timezone.make_aware(datetime.combine(start_date, time.min))
+        end = timezone.make_aware(
+            datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+        return Q(eaten_at__gte=start, eaten_at__lt=end)
+
+    @classmethod
+    def _eaten_food_days_totals(
+        cls, qs: QuerySet[models.EatenFood], *group_by: str
+    ) -> QuerySet:
+        """
+        Возвращает values-queryset с суммарным кбжу (поля total_<нутриент>) из данного queryset,
+        сгруппированным по локальной дате приёма пищи (поле day) и дополнительным полям group_by.
+        """
+        return (
+            qs.prefetch_related(None)
+            .order_by()
+            .annotate(day=TruncDate("eaten_at"))
+            .values(*group_by, "day")
+            .annotate(
+                **{
+                    f"total_{key}": Sum(cls._eaten_food_nutrition_expression(key))
+                    for key in cls.NUTRITION_KEYS
+                }
+            )
+        )
+
     @classmethod
     def _eaten_food_range_days_total_list_build(
         cls, qs: QuerySet[models.EatenFood], start_date: date, end_date: date
     ) -> Dict[date, NutritionInfo]:
-        """Возвращает словарь с суммарным кбжу из данного queryset по каждому дню из данного диапазона."""
+        """
+        Возвращает словарь с суммарным кбжу из данного queryset по каждому дню из данного диапазона.
+        Суммы считаются в БД одним запросом с группировкой по локальной дате приёма пищи.
+        """
         if start_date > end_date:
             raise ValidationError(
                 {"detail": "Начальная дата должна быть раньше конечной"}
             )
+
+        rows = cls._eaten_food_days_totals(
+            qs.filter(cls.eaten_at_day_range(start_date, end_date))
+        )
+        totals_by_day = {row["day"]: row for row in rows}
+
         days = (end_date - start_date).days + 1
         days_list = [start_date + timedelta(days=i) for i in range(days)]
         results = dict()
         for day in days_list:
-            total_nutrition = {
-                "proteins": 0.0,
-                "fats": 0.0,
-                "carbohydrates": 0.0,
-                "kcal": 0.0,
+            row = totals_by_day.get(day, {})
+            results[day.isoformat()] = {
+                key: round(float(row.get(f"total_{key}") or 0), 1)
+                for key in cls.NUTRITION_KEYS
             }
-            for eaten in qs.filter(eaten_at__date=day):
-                nutrition = eaten.get_nutrition()
-                total_nutrition["proteins"] += nutrition["proteins"]
-                total_nutrition["fats"] += nutrition["fats"]
-                total_nutrition["carbohydrates"] += nutrition["carbohydrates"]
-                total_nutrition["kcal"] += nutrition["kcal"]
 
-            for key, value in total_nutrition.items():
-                total_nutrition[key] = round(value, 1)
+        return results
+
+    @classmethod
+    def daily_nutrition_totals_build(
+        cls, user_id: int, start_date: date, end_date: date
+    ) -> Dict[date, NutritionInfo]:
+        """
+        Возвращает словарь с суммарным кбжу пользователя по каждому дню из данного диапазона
+        (как _eaten_food_range_days_total_list_build), читая сводную таблицу DailyNutritionTotal.
+        """
+        if start_date > end_date:
+            raise ValidationError(
+                {"detail": "Начальная дата должна быть раньше конечной"}
+            )
+
+        totals_by_day = {
+            row["day"]: row
+            for row in models.DailyNutritionTotal.objects.filter(
+                user_id=user_id, day__range=(start_date, end_date)
+            ).values("day", *cls.NUTRITION_KEYS)
+        }
 
-            results[day.isoformat()] = total_nutrition
+        days = (end_date - start_date).days + 1
+        days_list = [start_date + timedelta(days=i) for i in range(days)]
+        results = dict()
+        for day in days_list:
+            row = totals_by_day.get(day, {})
+            results[day.isoformat()] = {
+                key: round(float(row.get(key) or 0), 1) for key in cls.NUTRITION_KEYS
+            }
 
         return results
 
     @classmethod
     def eaten_food_list_data_build(
-        cls, queryset: QuerySet[models.EatenFood], dates: dict
+        cls,
+        queryset: QuerySet[models.EatenFood],
+        dates: dict,
+        user_id: Optional[int] = None,
     ) -> Union[
         Dict[str, Union[str, List[EatenFoodInfo], NutritionInfo]],
         Dict[date, NutritionInfo],
@@ -173,7 +320,7 @@ class FoodDataBuilder:
         Возвращает словарь с данными о приёмах пищи из EatenFood за выбранную дату,
         полностью подготовленными к ответу (без ForeignKey и т.д. - только данные).
         Если Выбран диапазон дат, то возвращает словарь с суммарным кбжу на
-        каждый день из диапазона.
+        каждый день из диапазона (из DailyNutritionTotal, если передан user_id).
         """
 
         response = dict()
@@ -181,12 +328,14 @@ class FoodDataBuilder:
         date_flag = False
 
         if dates["date"]:
-            queryset = queryset.filter(eaten_at__date=dates["date"])
+            queryset = queryset.filter(
+                cls.eaten_at_day_range(dates["date"], dates["date"])
+            )
             response["date"] = dates["date"].isoformat()
             date_flag = True
         elif dates["start_date"] and dates["end_date"]:
             queryset = queryset.filter(
-                eaten_at__date__range=(dates["start_date"], dates["end_date"])
+                cls.eaten_at_day_range(dates["start_date"], dates["end_date"])
             )
             response["start_date"] = dates["start_date"].isoformat()
             response["end_date"] = dates["end_date"].isoformat()
@@ -204,6 +353,10 @@ class FoodDataBuilder:
             results, total_nutrition = cls._eaten_food_nutritions_list_build(queryset)
             response["eaten"] = results
             response["total_nutrition"] = total_nutrition
+        elif user_id is not None:
+            response["days"] = cls.daily_nutrition_totals_build(
+                user_id, dates["start_date"], dates["end_date"]
+            )
         else:
             results = cls._eaten_food_range_days_total_list_build(
                 queryset, dates["start_date"], dates["end_date"]
@@ -226,147 +379,104 @@ class FoodDataBuilder:
                 "description": recipe.description,
                 "created_at": recipe.created_at.isoformat(),
                 "updated_at": recipe.updated_at.isoformat(),
-                "nutrition": recipe.calculate_nutrition(),
+                "nutrition": recipe.get_nutrition(),
             }
             result.append(rc)
 
         return result
 
     @classmethod
-    def eaten_food_stats_graph_draw(
+    def _user_nutrition_targets(
+        cls, user_id: Optional[int]
+    ) -> Dict[str, Optional[float]]:
+        """Возвращает целевые уровни кбжу из профиля пользователя (None, если цель не задана)."""
+        # Локальный импорт, чтобы избежать циклических зависимостей
+        from profiles.models import UserProfile
+
+        targets = dict.fromkeys(cls.NUTRITION_KEYS)
+        try:
+            # Получаем профиль по telegram_id текущего пользователя
+            profile = UserProfile.objects.get(user_id=user_id)
+        except UserProfile.DoesNotExist:
+            # Если профиля нет, графики построятся без красных линий
+            return targets
+
+        # Используем значения только если они больше 0
+        levels = {
+            "proteins": profile.target_proteins,
+            "fats": profile.target_fats,
+            "carbohydrates": profile.target_carbs,
+            "kcal": profile.target_calories,
+        }
+        for key, level in levels.items():
+            targets[key] = float(level) if level and level > 0 else None
+        return targets
+
+    @classmethod
+    def eaten_food_stats_series_build(
         cls, queryset: QuerySet[models.EatenFood], request: Request
-    ) -> List[str]:
+    ) -> ChartsData:
         """
-        Возвращает 4 графика в формате base64 с демонстрацией суммарного количества
-        каждого нутриента в приёмах пищи за каждый день из данного диапазона.
+        Возвращает данные для графиков суммарного количества каждого нутриента
+        в приёмах пищи за каждый день из данного диапазона.
+        С параметром group=week строит средние за день по неделям из архива
+        (диапазон до NUTRITION_HISTORY_MAX_DAYS дней).
         Целевые уровни (БЖУ и ккал) берутся из профиля текущего пользователя.
         """
-        # Локальный импорт, чтобы избежать циклических зависимостей
-        # Убедитесь, что путь до приложения profiles указан верно для вашего проекта!
-        from profiles.models import UserProfile
+        group = request.query_params.get("group", "day")
+        if group not in ("day", "week"):
+            raise ValidationError({"detail": "Параметр group может быть day или week."})
 
-        dates = cls.parse_date_range(request)
+        dates = cls.parse_date_range(
+            request,
+            max_days=settings.NUTRITION_HISTORY_MAX_DAYS if group == "week" else 31,
+        )
         if not dates["start_date"] or not dates["end_date"]:
             raise ValidationError(
                 "Для построения статистики нужно предоставить начальную и конечную даты."
             )
 
-        days_data = cls._eaten_food_range_days_total_list_build(
-            queryset, dates["start_date"], dates["end_date"]
-        )
-
-        if not days_data:
-            raise ValidationError(
-                "Нет данных для построения графиков в указанном диапазоне дат."
-            )
-
-        # 1. Получаем профиль пользователя
-        proteins_level = None
-        fats_level = None
-        carbohydrates_level = None
-        kcal_level = None
-
-        try:
-            # Получаем профиль по telegram_id текущего пользователя
-            profile = UserProfile.objects.get(user_id=request.user.telegram_id)
+        user_id = getattr(request.user, "telegram_id", None)
+        if group == "week":
+            if user_id is None:
+                raise ValidationError(
+                    "Статистика по неделям доступна только пользователям."
+                )
+            # Локальный импорт, чтобы избежать циклических зависимостей
+            from nutrition_trecker.services.NutritionArchive import NutritionArchive
 
-            # Используем значения только если они больше 0
-            proteins_level = (
-                profile.target_proteins if profile.target_proteins > 0 else None
+            days_data = NutritionArchive.weekly_totals(
+                user_id, dates["start_date"], dates["end_date"]
             )
-            fats_level = profile.target_fats if profile.target_fats > 0 else None
-            carbohydrates_level = (
-                profile.target_carbs if profile.target_carbs > 0 else None
+        elif user_id is not None:
+            days_data = cls.daily_nutrition_totals_build(
+                user_id, dates["start_date"], dates["end_date"]
             )
-            kcal_level = (
-                profile.target_calories if profile.target_calories > 0 else None
+        else:
+            days_data = cls._eaten_food_range_days_total_list_build(
+                queryset, dates["start_date"], dates["end_date"]
             )
 
-        except (UserProfile.DoesNotExist, AttributeError):
-            # Если профиля нет (или у юзера нет telegram_id), графики построятся без красных линий
-            pass
-
-        sorted_dates = sorted(days_data.keys())
-        dates_str = [date.fromisoformat(d).strftime("%d.%m") for d in sorted_dates]
-
-        # 2. Подставляем полученные значения в настройки графиков
-        nutrients = [
-            {
-                "key": "proteins",
-                "title": "Белки (г)",
-                "color": "skyblue",
-                "level": float(proteins_level) if proteins_level else None,
-            },
-            {
-                "key": "fats",
-                "title": "Жиры (г)",
-                "color": "gold",
-                "level": float(fats_level) if fats_level else None,
-            },
-            {
-                "key": "carbohydrates",
-                "title": "Углеводы (г)",
-                "color": "lightgreen",
-                "level": float(carbohydrates_level) if carbohydrates_level else None,
-            },
-            {
-                "key": "kcal",
-                "title": "Калории (ккал)",
-                "color": "lightcoral",
-                "level": float(kcal_level) if kcal_level else None,
-            },
-        ]
-
-        images_base64 = []
-
-        for nutrient in nutrients:
-            # Подготовка данных для текущего нутриента
-            values = [days_data[d][nutrient["key"]] for d in sorted_dates]
-
-            # Создаем график
-            plt.figure(figsize=(10, 5))
-            bars = plt.bar(
-                dates_str, values, color=nutrient["color"], edgecolor="black", alpha=0.7
+        if not days_data:
+            raise ValidationError(
+                "Нет данных для построения графиков в указанном диапазоне дат."
             )
 
-            # Добавляем линию уровня (если указана)
-            if nutrient["level"] is not None:
-                plt.axhline(
-                    y=nutrient["level"],
-                    color="red",
-                    linestyle="--",
-                    linewidth=1,
-                    label=f'Цель: {nutrient["level"]}',
-                )
-                plt.legend()
-
-            # Настройки графика
-            plt.title(nutrient["title"], fontsize=14)
-            plt.xlabel("Дата", fontsize=12)
-            plt.ylabel(nutrient["title"].split(" (")[0], fontsize=12)
-            plt.grid(axis="y", linestyle="--", alpha=0.5)
-            plt.xticks(rotation=45)
-
-            # Добавляем значения на столбцы
-            for bar in bars:
-                height = bar.get_height()
-                plt.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    height,
-                    f"{height}",
-                    ha="center",
-                    va="bottom",
-                    fontsize=9,
-                )
-
-            # Сохраняем в base64
-            buf = BytesIO()
-            plt.savefig(buf, format="png", dpi=100, bbox_inches="tight")
-            plt.close()
-
-            buf.seek(0)
-            image_base64 = base64.b64encode(buf.read()).decode("utf-8")
-            images_base64.append(image_base64)
-            buf.close()
+        return ChartRenderer.series_build(
+            days_data, cls._user_nutrition_targets(user_id)
+        )
 
-        return images_base64
+    @classmethod
+    def eaten_food_stats_graph_draw(
+        cls,
+        queryset: QuerySet[models.EatenFood],
+        request: Request,
+        image_format: str = "png",
+    ) -> List[str]:
+        """
+        Возвращает 4 графика (PNG в base64 или SVG) с демонстрацией суммарного количества
+        каждого нутриента в приёмах пищи за каждый день из данного диапазона.
+        """
+        series = cls.eaten_food_stats_series_build(queryset, request)
+        user_id = getattr(request.user, "telegram_id", "anonymous")
+        return ChartRenderer.render_encoded(user_id, series, image_format)
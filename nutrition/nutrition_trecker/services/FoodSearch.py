@@ -0,0 +1,167 @@
+from django.db.models import (
+    QuerySet,
+    Exists,
+    OuterRef,
+    F,
+    Value,
+    Case,
+    When,
+    FloatField,
+    CharField,
+    BooleanField,
+)
+from common.filters.FuzzySearchFilter import FuzzySearchFilter
+from nutrition_trecker import models
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+from typing import TypedDict, List
+
+
+class FoodSearchResult(TypedDict):
+    type: str
+    id: int
+    name: str
+    proteins: float
+    fats: float
+    carbohydrates: float
+    kcal: float
+    is_favorite: bool
+    is_recent: bool
+    score: float
+
+
+class FoodSearch:
+    """
+    Поиск по всему, что пользователь может записать в съеденное: базовые продукты,
+    свои продукты и рецепты. Все источники объединяются одним запросом (UNION ALL),
+    результаты ранжируются по похожести с бонусом для избранного и часто съедаемого
+    (см. FrequentFoods).
+    """
+
+    THRESHOLD = 0.1
+    FAVORITE_BOOST = 0.3
+
+    @classmethod
+    def _boost(cls, condition, boost: float) -> Case:
+        return Case(
+            When(condition, then=Value(boost)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+    @classmethod
+    def _source_queryset(
+        cls,
+        queryset: QuerySet,
+        food_type: str,
+        name_field: str,
+        source_field: str,
+        search_query: str,
+        user_id: int,
+        is_favorite,
+    ) -> QuerySet:
+        """Приводит источник к общему набору колонок для объединения."""
+        is_recent = FrequentFoods.recent_condition(user_id, source_field)
+
+        return (
+            queryset.annotate(
+                similarity=FuzzySearchFilter.similarity_expression(
+                    search_query, [name_field]
+                )
+            )
+            .filter(
+                FuzzySearchFilter.search_condition(
+                    search_query, [name_field], cls.THRESHOLD
+                )
+            )
+            .annotate(
+                food_type=Value(food_type, output_field=CharField()),
+                food_id=F("pk"),
+                food_name=F(name_field),
+                food_proteins=F("proteins"),
+                food_fats=F("fats"),
+                food_carbohydrates=F("carbohydrates"),
+                food_kcal=F("kcal"),
+                food_is_favorite=is_favorite,
+                food_is_recent=is_recent,
+                score=F("similarity")
+                + cls._boost(is_favorite, cls.FAVORITE_BOOST)
+                + FrequentFoods.boost_expression(user_id, source_field),
+            )
+            .order_by()
+            .values(
+                "food_type",
+                "food_id",
+                "food_name",
+                "food_proteins",
+                "food_fats",
+                "food_carbohydrates",
+                "food_kcal",
+                "food_is_favorite",
+                "food_is_recent",
+                "score",
+            )
+        )
+
+    @classmethod
+    def search(
+        cls, search_query: str, user_id: int, limit: int = 20
+    ) -> List[FoodSearchResult]:
+        """Возвращает limit лучших совпадений со значениями кбжу на 100 г."""
+        is_favorite = Exists(
+            models.UserFavorite.objects.filter(
+                user_id=user_id, base_food=OuterRef("pk")
+            )
+        )
+        not_favorite = Value(False, output_field=BooleanField())
+
+        sources = [
+            cls._source_queryset(
+                models.BaseFood.objects.all(),
+                "base",
+                "name",
+                "base_food",
+                search_query,
+                user_id,
+                is_favorite,
+            ),
+            cls._source_queryset(
+                models.CustomFood.objects.filter(user_id=user_id),
+                "custom",
+                "custom_name",
+                "custom_food",
+                search_query,
+                user_id,
+                not_favorite,
+            ),
+            cls._source_queryset(
+                models.Recipe.objects.filter(user_id=user_id),
+                "recipe",
+                "name",
+                "recipe_food",
+                search_query,
+                user_id,
+                not_favorite,
+            ),
+        ]
+
+        queryset = (
+            sources[0]
+            .union(*sources[1:], all=True)
+            .order_by("-score", "food_type", "food_id")[:limit]
+        )
+
+        return [
+            {
+                "type": row["food_type"],
+                "id": row["food_id"],
+                "name": row["food_name"],
+                "proteins": float(row["food_proteins"] or 0),
+                "fats": float(row["food_fats"] or 0),
+                "carbohydrates": float(row["food_carbohydrates"] or 0),
+                "kcal": float(row["food_kcal"] or 0),
+                "is_favorite": bool(row["food_is_favorite"]),
+                "is_recent": bool(row["food_is_recent"]),
+                "score": round(row["score"], 3),
+            }
+            for row in queryset
+        ]
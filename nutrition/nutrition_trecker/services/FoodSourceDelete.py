@@ -0,0 +1,121 @@
+from django.db import connection, transaction
+from django.db.models import Model, QuerySet
+from nutrition_trecker import models
+from common.utils.CacheHelper import CacheHelper
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+# Модель, записи которой сейчас удаляются пакетно (см. FoodSourceDelete.delete)
+_deleting: ContextVar[Optional[Type[Model]]] = ContextVar(
+    "food_source_deleting", default=None
+)
+
+
+class FoodSourceDelete:
+    """
+    Удаление источников кбжу (BaseFood, CustomFood, Recipe) с сохранением данных
+    в ссылающихся на них записях: перед удалением название и кбжу на 100 г
+    копируются в EatenFood и RecipeIngredient, и записи становятся ручным вводом.
+    Копирование выполняется одним UPDATE ... FROM на зависимую таблицу для всего пакета,
+    для рецептов используются денормализованные значения на 100 г.
+    """
+
+    # Модель источника: (поле ссылки в зависимых записях, поле названия, зависимые модели)
+    SOURCES: Dict[Type[Model], Tuple[str, str, List[Type[Model]]]] = {
+        models.BaseFood: (
+            "base_food",
+            "name",
+            [models.EatenFood, models.RecipeIngredient],
+        ),
+        models.CustomFood: (
+            "custom_food",
+            "custom_name",
+            [models.EatenFood, models.RecipeIngredient],
+        ),
+        models.Recipe: ("recipe_food", "name", [models.EatenFood]),
+    }
+    NUTRITION_FIELDS = ["proteins", "fats", "carbohydrates", "kcal"]
+    # Кэш, который устаревает у владельцев изменённых зависимых записей
+    CACHE_ENTITIES: Dict[Type[Model], List[str]] = {
+        models.EatenFood: ["eatenfood"],
+        models.RecipeIngredient: ["recipe_ingredient", "recipe"],
+    }
+
+    @classmethod
+    def snapshot(
+        cls,
+        dependent_model: Type[Model],
+        source_model: Type[Model],
+        ids: Iterable[int],
+    ) -> int:
+        """
+        Копирует данные источников ids в записи dependent_model и убирает ссылку на них
+        одним UPDATE ... FROM с соединением по источнику. Возвращает число изменённых записей.
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+
+        field, name_field, _ = cls.SOURCES[source_model]
+        qn = connection.ops.quote_name
+        dependent = dependent_model._meta
+        source = source_model._meta
+
+        def column(meta, name: str) -> str:
+            return qn(meta.get_field(name).column)
+
+        table = qn(dependent.db_table)
+        link = column(dependent, field)
+        pk = column(source, source.pk.name)
+        assignments = [
+            f"{column(dependent, 'name')} = s.{column(source, name_field)}",
+            *(
+                f"{column(dependent, key)} = s.{column(source, key)}"
+                for key in cls.NUTRITION_FIELDS
+            ),
+            f"{link} = NULL",
+        ]
+        sql = (
+            f"UPDATE {table} SET {', '.join(assignments)} "
+            f"FROM {qn(source.db_table)} AS s "
+            f"WHERE {table}.{link} = s.{pk} AND s.{pk} IN ({', '.join(['%s'] * len(ids))}) "
+            f"RETURNING {table}.{column(dependent, 'user_id')}"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, ids)
+            user_ids = [row[0] for row in cursor.fetchall()]
+
+        for user_id in set(user_ids):
+            CacheHelper.invalidate(cls.CACHE_ENTITIES[dependent_model], user_id)
+        return len(user_ids)
+
+    @classmethod
+    def is_deleting(cls, model: Type[Model]) -> bool:
+        """Удаляются ли сейчас пакетно записи model (данные уже скопированы)."""
+        return _deleting.get() is model
+
+    @classmethod
+    def delete(cls, queryset: QuerySet) -> int:
+        """Удаляет источники из queryset, возвращает число удалённых источников."""
+        model = queryset.model
+        _, _, dependents = cls.SOURCES[model]
+        ids = list(queryset.order_by().values_list("pk", flat=True))
+        if not ids:
+            return 0
+
+        with transaction.atomic():
+            for dependent_model in dependents:
+                cls.snapshot(dependent_model, model, ids)
+
+            # Сигналы pre_delete по каждому объекту пропускают копирование
+            token = _deleting.set(model)
+            try:
+                deleted = (
+                    model.objects.filter(pk__in=ids)
+                    .delete()[1]
+                    .get(model._meta.label, 0)
+                )
+            finally:
+                _deleting.reset(token)
+        return deleted
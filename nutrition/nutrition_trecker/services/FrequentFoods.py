@@ -0,0 +1,248 @@
+from django.db import transaction
+from django.db.models import (
+    Q,
+    Exists,
+    OuterRef,
+    F,
+    Value,
+    Subquery,
+    FloatField,
+    DateTimeField,
+)
+from django.db.models.functions import Abs, Coalesce, Exp, Greatest, Least, Ln
+from django.utils import timezone
+from nutrition_trecker import models
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
+import math
+
+
+class FrequentFoodInfo(TypedDict):
+    type: str
+    id: int
+    name: str
+    proteins: float
+    fats: float
+    carbohydrates: float
+    kcal: float
+    eaten_count: int
+    last_eaten_at: str
+
+
+class FrequentFoods:
+    """
+    Класс для поддержки таблицы FrequentFood (частые и недавние продукты пользователя).
+    Частота считается с затуханием: вклад приёма пищи убывает вдвое каждые HALF_LIFE_DAYS дней.
+    Чтобы не пересчитывать все строки со временем, веса отсчитываются от фиксированной
+    даты EPOCH и хранятся в логарифмической шкале: более новый приём весит больше,
+    а порядок строк по score совпадает с порядком по затухающей частоте на любой момент.
+    """
+
+    HALF_LIFE_DAYS = 14
+    RECENT_DAYS = 30
+    EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    BOOST_PER_MEAL = 0.1
+    MAX_BOOST = 0.3
+    BATCH_SIZE = 1000
+
+    SOURCE_TYPES = {
+        "base_food": "base",
+        "custom_food": "custom",
+        "recipe_food": "recipe",
+    }
+
+    @classmethod
+    def _log_weight(cls, eaten_at: datetime) -> float:
+        seconds = (eaten_at - cls.EPOCH).total_seconds()
+        return seconds * math.log(2) / (cls.HALF_LIFE_DAYS * 24 * 60 * 60)
+
+    @classmethod
+    def _log_sum(cls, log_weights: List[float]) -> float:
+        """Логарифм суммы весов без переполнения (log-sum-exp)."""
+        top = max(log_weights)
+        return top + math.log(sum(math.exp(w - top) for w in log_weights))
+
+    @classmethod
+    def sources_of(cls, values: Dict[str, Optional[int]]) -> List[Tuple[str, int]]:
+        """Возвращает источники записи EatenFood в виде пар (поле, id); ручной ввод не учитывается."""
+        return [
+            (field, values[f"{field}_id"])
+            for field in cls.SOURCE_TYPES
+            if values.get(f"{field}_id") is not None
+        ]
+
+    @classmethod
+    def instance_sources(cls, instance: models.EatenFood) -> List[Tuple[str, int]]:
+        return cls.sources_of(
+            {
+                f"{field}_id": getattr(instance, f"{field}_id")
+                for field in cls.SOURCE_TYPES
+            }
+        )
+
+    @classmethod
+    def record(cls, user_id: int, field: str, food_id: int, eaten_at: datetime) -> None:
+        """Учитывает новый приём пищи одним UPDATE (или INSERT для первого приёма)."""
+        log_weight = Value(cls._log_weight(eaten_at), output_field=FloatField())
+        with transaction.atomic():
+            frequent, created = models.FrequentFood.objects.get_or_create(
+                user_id=user_id,
+                **{f"{field}_id": food_id},
+                defaults={
+                    "score": log_weight.value,
+                    "eaten_count": 1,
+                    "last_eaten_at": eaten_at,
+                },
+            )
+            if created:
+                return
+            models.FrequentFood.objects.filter(pk=frequent.pk).update(
+                # log(exp(a) + exp(b)) = max(a, b) + log(1 + exp(-|a - b|))
+                score=Greatest(F("score"), log_weight)
+                + Ln(Value(1.0) + Exp(-Abs(F("score") - log_weight))),
+                eaten_count=F("eaten_count") + 1,
+                last_eaten_at=Greatest(
+                    F("last_eaten_at"),
+                    Value(eaten_at, output_field=DateTimeField()),
+                ),
+            )
+
+    @classmethod
+    def refresh(cls, user_id: int, sources: Iterable[Tuple[str, int]]) -> None:
+        """
+        Пересчитывает строки продуктов по оставшимся записям EatenFood
+        (после изменения или удаления): один запрос на чтение и одна перезапись.
+        """
+        ids_by_field = dict()
+        for field, food_id in sources:
+            ids_by_field.setdefault(field, set()).add(food_id)
+        if not ids_by_field:
+            return
+
+        condition = Q()
+        for field, ids in ids_by_field.items():
+            condition |= Q(**{f"{field}_id__in": ids})
+
+        rows = (
+            models.EatenFood.objects.filter(condition, user_id=user_id)
+            .values_list(
+                "user_id",
+                "base_food_id",
+                "custom_food_id",
+                "recipe_food_id",
+                "eaten_at",
+            )
+            .order_by()
+        )
+        objs = cls._build(rows)
+
+        with transaction.atomic():
+            models.FrequentFood.objects.filter(condition, user_id=user_id).delete()
+            models.FrequentFood.objects.bulk_create(objs, batch_size=cls.BATCH_SIZE)
+
+    @classmethod
+    def _build(cls, rows: Iterable[Tuple]) -> List[models.FrequentFood]:
+        """Строит строки FrequentFood из (user_id, base_food_id, custom_food_id, recipe_food_id, eaten_at)."""
+        grouped = dict()
+        for user_id, base_food_id, custom_food_id, recipe_food_id, eaten_at in rows:
+            values = {
+                "base_food_id": base_food_id,
+                "custom_food_id": custom_food_id,
+                "recipe_food_id": recipe_food_id,
+            }
+            for field, food_id in cls.sources_of(values):
+                grouped.setdefault((user_id, field, food_id), []).append(eaten_at)
+
+        return [
+            models.FrequentFood(
+                user_id=user_id,
+                **{f"{field}_id": food_id},
+                score=cls._log_sum([cls._log_weight(at) for at in eaten]),
+                eaten_count=len(eaten),
+                last_eaten_at=max(eaten),
+            )
+            for (user_id, field, food_id), eaten in grouped.items()
+        ]
+
+    @classmethod
+    def rebuild(cls, user_id: Optional[int] = None) -> int:
+        """Полностью пересобирает таблицу (для всех или для одного пользователя)."""
+        eaten = models.EatenFood.objects.all()
+        frequent = models.FrequentFood.objects.all()
+        if user_id is not None:
+            eaten = eaten.filter(user_id=user_id)
+            frequent = frequent.filter(user_id=user_id)
+
+        rows = eaten.values_list(
+            "user_id", "base_food_id", "custom_food_id", "recipe_food_id", "eaten_at"
+        ).iterator(chunk_size=cls.BATCH_SIZE)
+        objs = cls._build(rows)
+
+        with transaction.atomic():
+            frequent.delete()
+            models.FrequentFood.objects.bulk_create(objs, batch_size=cls.BATCH_SIZE)
+
+        return len(objs)
+
+    @classmethod
+    def top(cls, user_id: int, limit: int = 20) -> List[FrequentFoodInfo]:
+        """Возвращает самые частые продукты пользователя с кбжу на 100 г."""
+        rows = (
+            models.FrequentFood.objects.filter(user_id=user_id)
+            .select_related(*cls.SOURCE_TYPES)
+            .order_by("-score", "id")[:limit]
+        )
+
+        result = []
+        for row in rows:
+            field = next(f for f in cls.SOURCE_TYPES if getattr(row, f"{f}_id"))
+            food = getattr(row, field)
+            result.append(
+                {
+                    "type": cls.SOURCE_TYPES[field],
+                    "id": food.id,
+                    "name": food.custom_name if field == "custom_food" else food.name,
+                    "proteins": float(food.proteins or 0),
+                    "fats": float(food.fats or 0),
+                    "carbohydrates": float(food.carbohydrates or 0),
+                    "kcal": float(food.kcal or 0),
+                    "eaten_count": row.eaten_count,
+                    "last_eaten_at": row.last_eaten_at.isoformat(),
+                }
+            )
+        return result
+
+    @classmethod
+    def recent_condition(cls, user_id: int, field: str) -> Exists:
+        """Условие для queryset продуктов (BaseFood, CustomFood, Recipe): пользователь ел продукт за RECENT_DAYS дней."""
+        return Exists(cls._recent_queryset(user_id, field))
+
+    @classmethod
+    def _recent_queryset(cls, user_id: int, field: str):
+        return models.FrequentFood.objects.filter(
+            user_id=user_id,
+            last_eaten_at__gte=timezone.now() - timedelta(days=cls.RECENT_DAYS),
+            **{field: OuterRef("pk")},
+        )
+
+    @classmethod
+    def boost_expression(cls, user_id: int, field: str) -> Coalesce:
+        """
+        Бонус к похожести в поиске: BOOST_PER_MEAL за каждый приём пищи с учётом затухания,
+        но не больше MAX_BOOST. Учитываются только продукты, съеденные за RECENT_DAYS дней,
+        поэтому затухшая частота не бывает исчезающе малой.
+        """
+        decayed_count = Exp(
+            F("score")
+            - Value(cls._log_weight(timezone.now()), output_field=FloatField())
+        )
+        boost = cls._recent_queryset(user_id, field).annotate(
+            boost=Least(
+                Value(cls.MAX_BOOST, output_field=FloatField()),
+                Value(cls.BOOST_PER_MEAL, output_field=FloatField()) * decayed_count,
+            )
+        )
+        return Coalesce(
+            Subquery(boost.values("boost")[:1]),
+            Value(0.0, output_field=FloatField()),
+        )
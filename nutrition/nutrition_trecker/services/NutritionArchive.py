@@ -0,0 +1,259 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.FoodDataBuilder import FoodDataBuilder
+from nutrition_trecker.services.EatenFoodPartitions import EatenFoodPartitions
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("nutrition")
+
+
+class NutritionArchive:
+    """
+    Архивный уровень истории питания. Записи EatenFood хранятся
+    MAX_EATEN_FOOD_AGE_DAYS дней, кбжу по дням (DailyNutritionTotal) —
+    NUTRITION_HISTORY_DAILY_DAYS дней, после чего сжимается в кбжу по неделям
+    (WeeklyNutritionTotal), которое хранится бессрочно. Дополнительно удаляемые
+    записи можно выгрузить на диск в сжатом поколоночном виде (NumPy .npz).
+    """
+
+    BATCH_SIZE = 1000
+    DUMP_COLUMNS = (
+        "id",
+        "user_id",
+        "eaten_at",
+        "weight_grams",
+        "base_food_id",
+        "custom_food_id",
+        "recipe_food_id",
+        "name",
+        *FoodDataBuilder.NUTRITION_KEYS,
+    )
+
+    @classmethod
+    def week_start(cls, day: date) -> date:
+        return day - timedelta(days=day.weekday())
+
+    @classmethod
+    def daily_cutoff(cls, today: Optional[date] = None) -> date:
+        """
+        Первый день, кбжу по дням которого ещё хранится. Граница выравнивается
+        на понедельник, чтобы неделя никогда не хранилась частично по дням.
+        """
+        today = today or timezone.localdate()
+        return cls.week_start(
+            today - timedelta(days=settings.NUTRITION_HISTORY_DAILY_DAYS)
+        )
+
+    @classmethod
+    def _weekly_rows(cls, daily_rows) -> Dict[Tuple[int, date], dict]:
+        """Складывает строки кбжу по дням в суммы по (user_id, неделя)."""
+        weeks = dict()
+        for row in daily_rows:
+            key = (row["user_id"], cls.week_start(row["day"]))
+            week = weeks.setdefault(
+                key, dict.fromkeys(FoodDataBuilder.NUTRITION_KEYS, 0)
+            )
+            week["days_logged"] = week.get("days_logged", 0) + 1
+            for nutrient in FoodDataBuilder.NUTRITION_KEYS:
+                week[nutrient] += row[nutrient]
+        return weeks
+
+    @classmethod
+    def daily_totals_complete(cls, before: Optional[datetime] = None) -> bool:
+        """
+        Проверяет, что для каждого дня с записями EatenFood (старше before)
+        есть строка DailyNutritionTotal. Иначе сводная таблица не заполнена
+        (rebuild_daily_nutrition_totals) и архив по ней сохранил бы нули.
+        """
+        eaten = models.EatenFood.objects.order_by()
+        if before is not None:
+            eaten = eaten.filter(eaten_at__lt=before)
+        missing = eaten.annotate(day=TruncDate("eaten_at")).filter(
+            ~Exists(
+                models.DailyNutritionTotal.objects.filter(
+                    user_id=OuterRef("user_id"), day=OuterRef("day")
+                )
+            )
+        )
+        return not missing.exists()
+
+    @classmethod
+    def compact(cls, today: Optional[date] = None) -> int:
+        """
+        Сжимает кбжу по дням старше daily_cutoff в кбжу по неделям и удаляет
+        сжатые дни. Возвращает число записанных недель.
+        Не выполняется, пока сводная таблица по дням не заполнена.
+        """
+        if not cls.daily_totals_complete():
+            logger.error(
+                "Nutrition history compaction skipped: DailyNutritionTotal is missing "
+                "days that have EatenFood rows, run rebuild_daily_nutrition_totals"
+            )
+            return 0
+
+        cutoff = cls.daily_cutoff(today)
+        daily = models.DailyNutritionTotal.objects.filter(day__lt=cutoff)
+        weeks = cls._weekly_rows(
+            daily.order_by()
+            .values("user_id", "day", *FoodDataBuilder.NUTRITION_KEYS)
+            .iterator(chunk_size=cls.BATCH_SIZE)
+        )
+
+        objs = [
+            models.WeeklyNutritionTotal(user_id=user_id, week_start=week_start, **week)
+            for (user_id, week_start), week in weeks.items()
+        ]
+        with transaction.atomic():
+            models.WeeklyNutritionTotal.objects.bulk_create(
+                objs,
+                batch_size=cls.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["user_id", "week_start"],
+                update_fields=[
+                    "days_logged",
+                    *FoodDataBuilder.NUTRITION_KEYS,
+                    "updated_at",
+                ],
+            )
+            daily.delete()
+
+        logger.info(f"Nutrition history: {len(objs)} weeks compacted before {cutoff}")
+        return len(objs)
+
+    @classmethod
+    def weekly_totals(
+        cls, user_id: int, start_date: date, end_date: date, clip: bool = False
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Возвращает средние за день с записями кбжу пользователя по неделям
+        (ключ — понедельник недели) для недель, пересекающихся с диапазоном.
+        Недели, хранящиеся по дням, считаются из DailyNutritionTotal,
+        более старые — берутся из WeeklyNutritionTotal; записи EatenFood не читаются.
+        При clip=True учитываются только дни самого диапазона: неполные крайние
+        недели считаются по дням, WeeklyNutritionTotal — только для целых недель.
+        """
+        first_week = cls.week_start(start_date)
+        last_week = cls.week_start(end_date)
+        if clip:
+            days = (start_date, end_date)
+            whole_weeks = (start_date, end_date - timedelta(days=6))
+        else:
+            days = (first_week, last_week + timedelta(days=6))
+            whole_weeks = (first_week, last_week)
+
+        weeks = cls._weekly_rows(
+            {"user_id": user_id, **row}
+            for row in models.DailyNutritionTotal.objects.filter(
+                user_id=user_id, day__range=days
+            ).values("day", *FoodDataBuilder.NUTRITION_KEYS)
+        )
+        for row in models.WeeklyNutritionTotal.objects.filter(
+            user_id=user_id, week_start__range=whole_weeks
+        ).values("week_start", "days_logged", *FoodDataBuilder.NUTRITION_KEYS):
+            weeks.setdefault((user_id, row.pop("week_start")), row)
+
+        results = dict()
+        week = first_week
+        while week <= last_week:
+            row = weeks.get((user_id, week), {})
+            days_logged = row.get("days_logged") or 0
+            results[week.isoformat()] = {
+                key: round(float(row[key]) / days_logged, 1) if days_logged else 0.0
+                for key in FoodDataBuilder.NUTRITION_KEYS
+            }
+            results[week.isoformat()]["days_logged"] = days_logged
+            week += timedelta(days=7)
+        return results
+
+    @classmethod
+    def _dump_rows(cls, start: datetime, end: datetime) -> List[tuple]:
+        return list(
+            models.EatenFood.objects.filter(eaten_at__gte=start, eaten_at__lt=end)
+            .order_by("eaten_at", "id")
+            .values_list(
+                "id",
+                "user_id",
+                "eaten_at",
+                "weight_grams",
+                "base_food_id",
+                "custom_food_id",
+                "recipe_food_id",
+                Coalesce(
+                    "base_food__name",
+                    "custom_food__custom_name",
+                    "recipe_food__name",
+                    "name",
+                ),
+                *(
+                    FoodDataBuilder._eaten_food_nutrition_expression(key)
+                    for key in FoodDataBuilder.NUTRITION_KEYS
+                ),
+            )
+            .iterator(chunk_size=cls.BATCH_SIZE)
+        )
+
+    @classmethod
+    def dump(cls, threshold: datetime, directory: Optional[Path] = None) -> List[Path]:
+        """
+        Выгружает записи EatenFood старше threshold (по одному файлу на месяц)
+        в сжатые .npz с колонками DUMP_COLUMNS: eaten_at — unix-время,
+        отсутствующие id источников — -1, кбжу посчитано на момент выгрузки.
+        Повторные запуски пишут новые файлы, дубликаты отсеиваются по id.
+        """
+        directory = Path(directory or settings.EATEN_FOOD_ARCHIVE_DIR)
+        first = (
+            models.EatenFood.objects.filter(eaten_at__lt=threshold)
+            .order_by("eaten_at")
+            .values_list("eaten_at", flat=True)
+            .first()
+        )
+        if first is None:
+            return []
+
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.now().strftime("%Y%m%d%H%M%S")
+        month = timezone.localdate(first).replace(day=1)
+        paths = []
+        while True:
+            start, end = EatenFoodPartitions.month_bounds(month)
+            if start >= threshold:
+                break
+            rows = cls._dump_rows(start, min(end, threshold))
+            if rows:
+                columns = dict(zip(cls.DUMP_COLUMNS, zip(*rows)))
+                path = directory / f"eatenfood_{month:%Y%m}_{stamp}.npz"
+                np.savez_compressed(
+                    path,
+                    id=np.array(columns["id"], dtype=np.int64),
+                    user_id=np.array(columns["user_id"], dtype=np.int64),
+                    eaten_at=np.array(
+                        [int(value.timestamp()) for value in columns["eaten_at"]],
+                        dtype=np.int64,
+                    ),
+                    weight_grams=np.array(columns["weight_grams"], dtype=float),
+                    name=np.array([name or "" for name in columns["name"]], dtype=str),
+                    **{
+                        key: np.array(
+                            [-1 if pk is None else pk for pk in columns[key]],
+                            dtype=np.int64,
+                        )
+                        for key in ("base_food_id", "custom_food_id", "recipe_food_id")
+                    },
+                    **{
+                        key: np.array(columns[key], dtype=float)
+                        for key in FoodDataBuilder.NUTRITION_KEYS
+                    },
+                )
+                paths.append(path)
+            month = EatenFoodPartitions.next_month(month)
+
+        logger.info(f"EatenFood archive: {len(paths)} dumps written to {directory}")
+        return paths
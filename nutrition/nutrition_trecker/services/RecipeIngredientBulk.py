@@ -0,0 +1,136 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from nutrition_trecker import models
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from common.utils.BulkDelete import BulkDelete
+from common.utils.CacheHelper import CacheHelper
+from rest_framework.exceptions import ValidationError
+from typing import List, Tuple
+
+
+class RecipeIngredientBulk:
+    """
+    Пакетное сохранение списка ингредиентов рецепта: список сравнивается с текущими
+    ингредиентами, изменения применяются одним DELETE, UPDATE и INSERT в одной транзакции.
+    Сигналы модели при этом не вызываются, поэтому кбжу рецепта, сводные таблицы
+    и версии кэша обновляются один раз на весь пакет.
+    """
+
+    BATCH_SIZE = 500
+    # Поля, которые сравниваются с текущими значениями и сохраняются при изменении
+    DIFF_FIELDS = [
+        "weight_grams",
+        "base_food_id",
+        "custom_food_id",
+        "name",
+        "proteins",
+        "fats",
+        "carbohydrates",
+        "kcal",
+    ]
+    UPDATE_FIELDS = [
+        "weight_grams",
+        "base_food",
+        "custom_food",
+        "name",
+        "proteins",
+        "fats",
+        "carbohydrates",
+        "kcal",
+        "updated_at",
+    ]
+
+    @classmethod
+    def _prepare(cls, obj: models.RecipeIngredient) -> models.RecipeIngredient:
+        """Повторяет RecipeIngredient.save(): пересчёт kcal для ручного ввода."""
+        if None not in [obj.name, obj.proteins, obj.fats, obj.carbohydrates]:
+            obj.kcal = obj.calculate_total_kcal()
+        return obj
+
+    @classmethod
+    def _unique_key(cls, values: dict) -> Tuple:
+        """Ключ ограничений уникальности ингредиента внутри рецепта."""
+        if values["base_food_id"] is not None:
+            return ("base", values["base_food_id"])
+        if values["custom_food_id"] is not None:
+            return ("custom", values["custom_food_id"])
+        return (
+            "manual",
+            values["name"],
+            values["proteins"],
+            values["fats"],
+            values["carbohydrates"],
+        )
+
+    @classmethod
+    def _values(cls, obj: models.RecipeIngredient) -> dict:
+        return {field: getattr(obj, field) for field in cls.DIFF_FIELDS}
+
+    @classmethod
+    def save(
+        cls,
+        recipe: models.Recipe,
+        objs: List[models.RecipeIngredient],
+        replace: bool = True,
+    ) -> List[models.RecipeIngredient]:
+        """
+        Сохраняет ингредиенты рецепта: объекты без pk создаются, изменённые обновляются.
+        При replace=True удаляются ингредиенты рецепта, которых нет в objs.
+        """
+        now = timezone.now()
+        for obj in objs:
+            obj.user_id = recipe.user_id
+            obj.recipe = recipe
+            cls._prepare(obj)
+
+        with transaction.atomic():
+            existing = {
+                row["id"]: row
+                for row in recipe.ingredients.values("id", *cls.DIFF_FIELDS).order_by()
+            }
+
+            to_create = [obj for obj in objs if obj.pk is None]
+            to_update = []
+            for obj in objs:
+                if obj.pk is None:
+                    continue
+                previous = existing[obj.pk]
+                if any(previous[f] != getattr(obj, f) for f in cls.DIFF_FIELDS):
+                    obj.updated_at = now
+                    to_update.append(obj)
+
+            kept = {obj.pk for obj in objs if obj.pk is not None}
+            to_delete = [pk for pk in existing if pk not in kept] if replace else []
+
+            # Ограничения уникальности проверяются для итогового состава рецепта
+            final = [cls._values(obj) for obj in objs]
+            if not replace:
+                final += [row for pk, row in existing.items() if pk not in kept]
+            keys = [cls._unique_key(values) for values in final]
+            if len(keys) != len(set(keys)):
+                raise ValidationError(
+                    {"items": "Ингредиенты в рецепте не должны повторяться."}
+                )
+
+            if not (to_create or to_update or to_delete):
+                return objs
+
+            if to_delete:
+                BulkDelete.delete_pks(models.RecipeIngredient, to_delete)
+            if to_update:
+                models.RecipeIngredient.objects.bulk_update(
+                    to_update, cls.UPDATE_FIELDS, batch_size=cls.BATCH_SIZE
+                )
+            if to_create:
+                models.RecipeIngredient.objects.bulk_create(
+                    to_create, batch_size=cls.BATCH_SIZE
+                )
+
+            recipe.update_nutrition()
+            DailyNutritionRollup.refresh_for_sources(Q(recipe_food=recipe))
+            # Кбжу рецепта выводится и в приёмах пищи владельца (как в сигналах Recipe)
+            CacheHelper.invalidate(
+                ["recipe_ingredient", "recipe", "eatenfood"], recipe.user_id
+            )
+        return objs
@@ -1,7 +1,12 @@
-from django.db.models.signals import pre_delete, post_save, post_delete
+from django.db.models import Q
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 import logging
 from .models import EatenFood, BaseFood, CustomFood, Recipe, RecipeIngredient
+from .services.DailyNutritionRollup import DailyNutritionRollup
+from .services.FrequentFoods import FrequentFoods
+from .services.FoodSourceDelete import FoodSourceDelete
 from common.utils.CacheHelper import CacheHelper
 
 logger = logging.getLogger("nutrition")
@@ -9,50 +14,140 @@ logger = logging.getLogger("nutrition")
 
 @receiver([post_save, post_delete], sender=BaseFood)
 def invalidate_basefood_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("base_food")
+    CacheHelper.invalidate(["base_food"])
     logger.info("BaseFood version bumped (global)")
 
 
 @receiver([post_save, post_delete], sender=CustomFood)
 def invalidate_customfood_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("custom_food", instance.user_id)
+    CacheHelper.invalidate(["custom_food"], instance.user_id)
     logger.info(f"Cache version bumped for CustomFood(user_id={instance.user_id})")
 
 
 @receiver([post_save, post_delete], sender=Recipe)
 def invalidate_recipe_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("recipe", instance.user_id)
+    # Название и кбжу рецепта выводятся и в приёмах пищи владельца
+    CacheHelper.invalidate(["recipe", "eatenfood"], instance.user_id)
     logger.info(f"Cache version bumped for Recipe(user_id={instance.user_id})")
 
 
 @receiver([post_save, post_delete], sender=RecipeIngredient)
 def invalidate_recipe_ingredient_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("recipe_ingredient", instance.user_id)
-    CacheHelper.bump_cache_version("recipe", instance.user_id)
+    CacheHelper.invalidate(["recipe_ingredient", "recipe"], instance.user_id)
     logger.info(
         f"Cache version bumped for RecipeIngredient(user_id={instance.user_id})"
     )
 
 
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def update_recipe_nutrition_on_ingredient_change(sender, instance, **kwargs):
+    """Пересчёт денормализованного кбжу рецепта при изменении его ингредиентов"""
+    if FoodSourceDelete.is_deleting(Recipe):
+        # Ингредиенты удаляются каскадом вместе с рецептами, записи EatenFood
+        # уже не ссылаются на эти рецепты
+        return
+    try:
+        recipe = instance.recipe
+    except Recipe.DoesNotExist:
+        return
+    recipe.update_nutrition()
+    DailyNutritionRollup.refresh_for_sources(Q(recipe_food=recipe))
+    logger.info(f"Nutrition updated for Recipe(id={recipe.id})")
+
+
+@receiver(post_save, sender=BaseFood)
+def update_recipes_nutrition_on_base_food_save(sender, instance, created, **kwargs):
+    """Пересчёт кбжу рецептов, в которых используется изменённый продукт из BaseFood"""
+    if created:
+        return
+    recipes = list(Recipe.objects.filter(ingredients__base_food=instance).distinct())
+    for recipe in recipes:
+        recipe.update_nutrition()
+    DailyNutritionRollup.refresh_for_sources(
+        Q(base_food=instance) | Q(recipe_food__in=recipes)
+    )
+    for user_id in {recipe.user_id for recipe in recipes}:
+        CacheHelper.invalidate(["recipe"], user_id)
+    logger.info(f"Recipes nutrition updated after BaseFood(id={instance.id}) change")
+
+
+@receiver(post_save, sender=CustomFood)
+def update_recipes_nutrition_on_custom_food_save(sender, instance, created, **kwargs):
+    """Пересчёт кбжу рецептов, в которых используется изменённый продукт из CustomFood"""
+    if created:
+        return
+    recipes = list(Recipe.objects.filter(ingredients__custom_food=instance).distinct())
+    for recipe in recipes:
+        recipe.update_nutrition()
+    DailyNutritionRollup.refresh_for_sources(
+        Q(custom_food=instance) | Q(recipe_food__in=recipes)
+    )
+    for user_id in {recipe.user_id for recipe in recipes}:
+        CacheHelper.invalidate(["recipe"], user_id)
+    logger.info(f"Recipes nutrition updated after CustomFood(id={instance.id}) change")
+
+
 @receiver([post_save, post_delete], sender=EatenFood)
 def invalidate_eatenfood_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("eatenfood", instance.user_id)
+    CacheHelper.invalidate(["eatenfood"], instance.user_id)
     logger.info(f"Cache version bumped for EatenFood(user_id={instance.user_id})")
 
 
+@receiver(pre_save, sender=EatenFood)
+def remember_eaten_food_previous_day(sender, instance, **kwargs):
+    """
+    Запоминает прежний день и источник приёма пищи, чтобы пересчитать их
+    при переносе или изменении записи
+    """
+    instance._previous_day = None
+    instance._previous_sources = []
+    if instance.pk is not None:
+        previous = (
+            EatenFood.objects.filter(pk=instance.pk)
+            .values("eaten_at", "base_food_id", "custom_food_id", "recipe_food_id")
+            .first()
+        )
+        if previous is not None:
+            instance._previous_day = timezone.localdate(previous["eaten_at"])
+            instance._previous_sources = FrequentFoods.sources_of(previous)
+
+
+@receiver([post_save, post_delete], sender=EatenFood)
+def update_daily_nutrition_total(sender, instance, **kwargs):
+    """Пересчёт сводного кбжу пользователя за день изменённой записи EatenFood"""
+    days = {timezone.localdate(instance.eaten_at)}
+    previous_day = getattr(instance, "_previous_day", None)
+    if previous_day is not None:
+        days.add(previous_day)
+    DailyNutritionRollup.refresh_days(instance.user_id, days)
+    logger.info(f"Daily nutrition totals updated for user_id={instance.user_id}")
+
+
+@receiver(post_save, sender=EatenFood)
+def update_frequent_foods_on_eaten_food_save(sender, instance, created, **kwargs):
+    """Учёт приёма пищи в частых продуктах пользователя"""
+    sources = FrequentFoods.instance_sources(instance)
+    if created:
+        for field, food_id in sources:
+            FrequentFoods.record(instance.user_id, field, food_id, instance.eaten_at)
+    else:
+        previous = getattr(instance, "_previous_sources", [])
+        FrequentFoods.refresh(instance.user_id, set(sources) | set(previous))
+    logger.info(f"Frequent foods updated for user_id={instance.user_id}")
+
+
+@receiver(post_delete, sender=EatenFood)
+def update_frequent_foods_on_eaten_food_delete(sender, instance, **kwargs):
+    """Пересчёт частых продуктов после удаления приёма пищи"""
+    FrequentFoods.refresh(instance.user_id, FrequentFoods.instance_sources(instance))
+
+
 @receiver(pre_delete, sender=BaseFood)
 def update_eaten_food_on_base_food_delete(sender, instance, **kwargs):
     """Сохранение данных перед удалёнием продукта из BaseFood в связанных с ним записях в EatenFood"""
-    rows = EatenFood.objects.filter(base_food=instance)
-    if rows.exists():
-        rows.update(
-            name=instance.name,
-            proteins=instance.proteins,
-            fats=instance.fats,
-            carbohydrates=instance.carbohydrates,
-            kcal=instance.kcal,
-            base_food=None,
-        )
+    if FoodSourceDelete.is_deleting(BaseFood):
+        return
+    if FoodSourceDelete.snapshot(EatenFood, BaseFood, [instance.pk]):
         logger.info(
             f"Rows in eaten_food updated after BaseFood(id={instance.id}) was deleted"
         )
@@ -61,16 +156,9 @@ def update_eaten_food_on_base_food_delete(sender, instance, **kwargs):
 @receiver(pre_delete, sender=CustomFood)
 def update_eaten_food_on_custom_food_delete(sender, instance, **kwargs):
     """Сохранение данных перед удалёнием продукта из CustomFood в связанных с ним записях в EatenFood"""
-    rows = EatenFood.objects.filter(custom_food=instance)
-    if rows.exists():
-        rows.update(
-            name=instance.custom_name,
-            proteins=instance.proteins,
-            fats=instance.fats,
-            carbohydrates=instance.carbohydrates,
-            kcal=instance.kcal,
-            custom_food=None,
-        )
+    if FoodSourceDelete.is_deleting(CustomFood):
+        return
+    if FoodSourceDelete.snapshot(EatenFood, CustomFood, [instance.pk]):
         logger.info(
             f"Rows in eaten_food updated after CustomFood(id={instance.id}) was deleted"
         )
@@ -79,17 +167,9 @@ def update_eaten_food_on_custom_food_delete(sender, instance, **kwargs):
 @receiver(pre_delete, sender=Recipe)
 def update_eaten_food_on_recipe_food_delete(sender, instance, **kwargs):
     """Сохранение данных перед удалёнием блюда из Recipe в связанных с ним записях в EatenFood"""
-    rows = EatenFood.objects.filter(recipe_food=instance)
-    if rows.exists():
-        nutrition = instance.calculate_nutrition()["per_100g"]
-        rows.update(
-            name=instance.name,
-            proteins=nutrition["proteins"],
-            fats=nutrition["fats"],
-            carbohydrates=nutrition["carbohydrates"],
-            kcal=nutrition["kcal"],
-            recipe_food=None,
-        )
+    if FoodSourceDelete.is_deleting(Recipe):
+        return
+    if FoodSourceDelete.snapshot(EatenFood, Recipe, [instance.pk]):
         logger.info(
             f"Rows in eaten_food updated after Recipe(id={instance.id}) was deleted"
         )
@@ -98,16 +178,9 @@ def update_eaten_food_on_recipe_food_delete(sender, instance, **kwargs):
 @receiver(pre_delete, sender=BaseFood)
 def update_recipe_ingredients_on_base_food_delete(sender, instance, **kwargs):
     """Сохранение данных перед удалёнием блюда из BaseFood в связанных с ним записях в RecipeIngredient"""
-    rows = RecipeIngredient.objects.filter(base_food=instance)
-    if rows.exists():
-        rows.update(
-            name=instance.name,
-            proteins=instance.proteins,
-            fats=instance.fats,
-            carbohydrates=instance.carbohydrates,
-            kcal=instance.kcal,
-            base_food=None,
-        )
+    if FoodSourceDelete.is_deleting(BaseFood):
+        return
+    if FoodSourceDelete.snapshot(RecipeIngredient, BaseFood, [instance.pk]):
         logger.info(
             f"Rows in recipe_ingredient updated after BaseFood(id={instance.id}) was deleted"
         )
@@ -116,16 +189,9 @@ def update_recipe_ingredients_on_base_food_delete(sender, instance, **kwargs):
 @receiver(pre_delete, sender=CustomFood)
 def update_recipe_ingredients_on_custom_food_delete(sender, instance, **kwargs):
     """Сохранение данных перед удалёнием блюда из CustomFood в связанных с ним записях в RecipeIngredient"""
-    rows = RecipeIngredient.objects.filter(custom_food=instance)
-    if rows.exists():
-        rows.update(
-            name=instance.custom_name,
-            proteins=instance.proteins,
-            fats=instance.fats,
-            carbohydrates=instance.carbohydrates,
-            kcal=instance.kcal,
-            custom_food=None,
-        )
+    if FoodSourceDelete.is_deleting(CustomFood):
+        return
+    if FoodSourceDelete.snapshot(RecipeIngredient, CustomFood, [instance.pk]):
         logger.info(
             f"Rows in recipe_ingredient updated after CustomFood(id={instance.id}) was deleted"
         )
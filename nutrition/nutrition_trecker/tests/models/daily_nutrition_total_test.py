@@ -0,0 +1,114 @@
+import pytest
+from django.apps import apps
+from nutrition_trecker.models import DailyNutritionTotal, EatenFood
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+
+
+@pytest.mark.django_db
+class TestDailyNutritionTotalModel:
+    """Класс для тестирования сводной таблицы DailyNutritionTotal"""
+
+    def test_daily_total_created_on_eaten_food_create(self, base_food):
+        eaten_food = EatenFood.objects.create(
+            user_id=1, base_food=base_food, weight_grams=200
+        )
+        EatenFood.objects.create(
+            user_id=1,
+            name="Qwerty",
+            proteins=10,
+            fats=10,
+            carbohydrates=10,
+            weight_grams=100,
+        )
+
+        total = DailyNutritionTotal.objects.get(
+            user_id=1, day=timezone.localdate(eaten_food.eaten_at)
+        )
+
+        assert total.proteins == Decimal("50.0")
+        assert total.fats == Decimal("20.0")
+        assert total.carbohydrates == Decimal("10.0")
+        assert total.kcal == Decimal("420.0")
+
+    def test_daily_total_deleted_with_last_eaten_food(self, base_food):
+        eaten_food = EatenFood.objects.create(
+            user_id=1, base_food=base_food, weight_grams=200
+        )
+        eaten_food.delete()
+
+        assert not DailyNutritionTotal.objects.filter(user_id=1).exists()
+
+    def test_daily_total_moved_with_eaten_food_day(self, base_food):
+        eaten_food = EatenFood.objects.create(
+            user_id=1, base_food=base_food, weight_grams=100
+        )
+        today = timezone.localdate(eaten_food.eaten_at)
+
+        eaten_food.eaten_at = eaten_food.eaten_at - timedelta(days=2)
+        eaten_food.save()
+
+        assert not DailyNutritionTotal.objects.filter(user_id=1, day=today).exists()
+        assert DailyNutritionTotal.objects.get(
+            user_id=1, day=today - timedelta(days=2)
+        ).proteins == Decimal("20.0")
+
+    def test_daily_total_updated_on_base_food_change(self, base_food):
+        eaten_food = EatenFood.objects.create(
+            user_id=1, base_food=base_food, weight_grams=100
+        )
+        base_food.proteins = 30
+        base_food.save()
+
+        total = DailyNutritionTotal.objects.get(
+            user_id=1, day=timezone.localdate(eaten_food.eaten_at)
+        )
+        assert total.proteins == Decimal("30.0")
+
+    def test_daily_total_rebuild(self, base_food):
+        EatenFood.objects.create(user_id=1, base_food=base_food, weight_grams=100)
+        EatenFood.objects.create(user_id=2, base_food=base_food, weight_grams=100)
+        DailyNutritionTotal.objects.all().delete()
+
+        assert DailyNutritionRollup.rebuild(user_id=1) == 1
+        assert list(DailyNutritionTotal.objects.values_list("user_id", flat=True)) == [
+            1
+        ]
+
+        assert DailyNutritionRollup.rebuild() == 2
+        assert DailyNutritionTotal.objects.count() == 2
+
+    def test_daily_total_migration_backfill(self, base_food, recipe_with_igredients):
+        EatenFood.objects.create(user_id=1, base_food=base_food, weight_grams=200)
+        EatenFood.objects.create(
+            user_id=1, recipe_food=recipe_with_igredients, weight_grams=100
+        )
+        EatenFood.objects.create(
+            user_id=2,
+            name="Qwerty",
+            proteins=10,
+            fats=10,
+            carbohydrates=10,
+            weight_grams=100,
+        )
+        expected = {
+            total.user_id: total
+            for total in DailyNutritionTotal.objects.only(
+                "user_id", "proteins", "fats", "carbohydrates", "kcal"
+            )
+        }
+        DailyNutritionTotal.objects.all().delete()
+
+        migration = import_module(
+            "nutrition_trecker.migrations.0007_dailynutritiontotal"
+        )
+        migration.fill_daily_totals(apps, None)
+
+        totals = {total.user_id: total for total in DailyNutritionTotal.objects.all()}
+        assert totals.keys() == expected.keys()
+        for user_id, total in totals.items():
+            for key in ("proteins", "fats", "carbohydrates", "kcal"):
+                assert getattr(total, key) == getattr(expected[user_id], key)
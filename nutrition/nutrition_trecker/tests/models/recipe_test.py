@@ -93,3 +93,43 @@ class TestRecipeModel:
         }
         missing_keys = required_keys - {k for d in details for k in d}
         assert not missing_keys
+
+    def test_recipe_denormalized_nutrition_matches_calculated(
+        self, recipe_with_igredients
+    ):
+        recipe = Recipe.objects.get(pk=recipe_with_igredients.pk)
+
+        assert recipe.get_nutrition() == recipe.calculate_nutrition()
+
+    def test_recipe_nutrition_updated_on_ingredient_delete(
+        self, recipe_with_igredients
+    ):
+        recipe_with_igredients.ingredients.get(name="Secret Ingredient").delete()
+
+        recipe = Recipe.objects.get(pk=recipe_with_igredients.pk)
+
+        assert recipe.total_weight == 300
+        assert recipe.get_nutrition() == recipe.calculate_nutrition()
+
+    def test_recipe_nutrition_updated_on_base_food_change(
+        self, recipe_with_igredients, base_food
+    ):
+        base_food.proteins = 30
+        base_food.save()
+
+        recipe = Recipe.objects.get(pk=recipe_with_igredients.pk)
+
+        assert recipe.total_proteins == 95.0
+        assert recipe.get_nutrition() == recipe.calculate_nutrition()
+
+    def test_empty_recipe_nutrition_matches_calculated(self, recipe_with_igredients):
+        recipe = Recipe.objects.create(user_id=1, name="Пустой рецепт")
+        recipe = Recipe.objects.get(pk=recipe.pk)
+
+        assert recipe.get_nutrition() == recipe.calculate_nutrition()
+        assert recipe.get_nutrition() == Recipe.empty_nutrition()
+
+        # После удаления всех ингредиентов — тот же вид, что у пустого рецепта
+        recipe_with_igredients.ingredients.all().delete()
+        recipe = Recipe.objects.get(pk=recipe_with_igredients.pk)
+        assert recipe.get_nutrition() == Recipe.empty_nutrition()
@@ -0,0 +1,103 @@
+import pytest
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from nutrition_trecker.models import BaseFood, Recipe, RecipeIngredient
+from nutrition_trecker.services.BaseFoodImport import BaseFoodImport
+from common.utils.CacheHelper import CacheHelper
+
+CSV = (
+    "name,proteins,fats,carbohydrates\n"
+    "# комментарий,0,0,0\n"
+    "Яблоко,0.3,0.2,14\n"
+    '"Гречка, ядрица",12.6,3.3,62.1\n'
+)
+
+
+class TestBaseFoodImportRead:
+    def test_read_valid_rows(self):
+        rows, errors = BaseFoodImport.read(StringIO(CSV))
+
+        assert errors == []
+        assert list(rows) == ["Яблоко", "Гречка, ядрица"]
+        assert [str(value) for value in rows["Яблоко"]] == ["0.3", "0.2", "14.0"]
+
+    def test_read_reports_all_invalid_rows(self):
+        rows, errors = BaseFoodImport.read(
+            StringIO(
+                "name,proteins,fats,carbohydrates\n"
+                "Сахар,0,0,99.8\n"
+                "Ошибка,60,30,20\n"
+                "Текст,a,1,1\n"
+                "Сахар,0,0,99.8\n"
+            )
+        )
+
+        assert list(rows) == ["Сахар"]
+        assert [error.split(":")[0] for error in errors] == [
+            "Line 3",
+            "Line 4",
+            "Line 5",
+        ]
+
+
+@pytest.mark.django_db
+class TestBaseFoodImportSave:
+    def test_save_is_idempotent(self, django_assert_max_num_queries):
+        rows, _ = BaseFoodImport.read(StringIO(CSV))
+
+        first = BaseFoodImport.save(rows)
+        with django_assert_max_num_queries(1):
+            second = BaseFoodImport.save(rows)
+
+        assert len(first["created"]) == 2
+        assert second == {"created": [], "updated": [], "unchanged": 2}
+        assert float(BaseFood.objects.get(name="Яблоко").kcal) == 59.0
+
+    def test_save_updates_changed_foods_and_recipes(
+        self, django_capture_on_commit_callbacks
+    ):
+        apple = BaseFood.objects.create(
+            name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=10
+        )
+        recipe = Recipe.objects.create(user_id=1, name="Пюре")
+        RecipeIngredient.objects.create(
+            user_id=1, recipe=recipe, base_food=apple, weight_grams=100
+        )
+        cache.clear()
+        version = CacheHelper.get_cache_version("base_food")
+
+        rows, _ = BaseFoodImport.read(StringIO(CSV))
+        with django_capture_on_commit_callbacks(execute=True):
+            diff = BaseFoodImport.save(rows)
+
+        assert diff == {
+            "created": ["Гречка, ядрица"],
+            "updated": ["Яблоко"],
+            "unchanged": 0,
+        }
+        apple.refresh_from_db()
+        recipe.refresh_from_db()
+        assert float(apple.kcal) == 59.0
+        assert float(recipe.kcal) == 59.0
+        assert CacheHelper.get_cache_version("base_food") == version + 1
+
+    def test_command_dry_run_writes_nothing(self, tmp_path):
+        path = tmp_path / "foods.csv"
+        path.write_text(CSV, encoding="utf-8")
+        out = StringIO()
+
+        call_command("import_basefood", str(path), "--dry-run", stdout=out)
+
+        assert "Dry run: 2 created, 0 updated, 0 unchanged" in out.getvalue()
+        assert not BaseFood.objects.exists()
+
+    def test_command_rejects_invalid_file(self, tmp_path):
+        path = tmp_path / "foods.csv"
+        path.write_text(CSV + "Ошибка,60,30,20\n", encoding="utf-8")
+
+        with pytest.raises(CommandError):
+            call_command("import_basefood", str(path), stderr=StringIO())
+
+        assert not BaseFood.objects.exists()
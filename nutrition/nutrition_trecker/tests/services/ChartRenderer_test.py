@@ -0,0 +1,112 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from nutrition_trecker.services.ChartRenderer import ChartRenderer, _render_chart
+from django.core.cache import cache
+
+
+@pytest.fixture
+def days_data():
+    return {
+        "2025-01-02": {
+            "proteins": 20.0,
+            "fats": 10.0,
+            "carbohydrates": 5.0,
+            "kcal": 190.0,
+        },
+        "2025-01-01": {
+            "proteins": 10.0,
+            "fats": 5.0,
+            "carbohydrates": 0.0,
+            "kcal": 85.0,
+        },
+    }
+
+
+@pytest.fixture
+def series(days_data):
+    cache.clear()
+    return ChartRenderer.series_build(days_data, {"proteins": 15.0})
+
+
+class TestChartRenderer:
+    def test_series_build(self, series):
+        assert series["dates"] == ["2025-01-01", "2025-01-02"]
+        assert series["labels"] == ["01.01", "02.01"]
+        assert list(series["charts"]) == ["proteins", "fats", "carbohydrates", "kcal"]
+        assert series["charts"]["proteins"]["values"] == [10.0, 20.0]
+        assert series["charts"]["proteins"]["target"] == 15.0
+        assert series["charts"]["kcal"]["target"] is None
+
+    def test_render_png_and_svg(self, series):
+        png = ChartRenderer.render(1, series, "png")
+        svg = ChartRenderer.render_encoded(1, series, "svg")
+
+        assert len(png) == 4
+        assert all(image.startswith(b"\x89PNG") for image in png)
+        assert all("<svg" in image for image in svg)
+
+    def test_render_uses_cache(self, series):
+        first = ChartRenderer.render(1, series)
+
+        with patch(
+            "nutrition_trecker.services.ChartRenderer._render_chart",
+            side_effect=_render_chart,
+        ) as render_chart:
+            assert ChartRenderer.render(1, series) == first
+            assert render_chart.call_count == 0
+
+            series["charts"]["fats"]["values"] = [1.0, 2.0]
+            ChartRenderer.render(1, series)
+            assert render_chart.call_count == 1
+
+    def test_render_chart_etag_and_last_modified(self, series):
+        chart = ChartRenderer.render_chart(1, series, "kcal", "svg")
+        cached = ChartRenderer.render_chart(1, series, "kcal", "svg")
+
+        assert chart["content_type"] == "image/svg+xml"
+        assert chart["etag"] == ChartRenderer.chart_digest(1, series, "kcal", "svg")
+        assert cached == chart
+
+        series["charts"]["kcal"]["target"] = 2000.0
+        changed = ChartRenderer.render_chart(1, series, "kcal", "svg")
+        assert changed["etag"] != chart["etag"]
+        assert changed["last_modified"] >= chart["last_modified"]
+
+    def test_chart_validators_without_render(self, series):
+        with patch(
+            "nutrition_trecker.services.ChartRenderer._render_chart",
+            side_effect=_render_chart,
+        ) as render_chart:
+            validators = ChartRenderer.chart_validators(1, series, "fats", "png")
+            assert render_chart.call_count == 0
+
+        assert validators == {
+            "etag": ChartRenderer.chart_digest(1, series, "fats", "png"),
+            "last_modified": None,
+        }
+
+        chart = ChartRenderer.render_chart(1, series, "fats", "png")
+        assert ChartRenderer.chart_validators(1, series, "fats", "png") == {
+            "etag": chart["etag"],
+            "last_modified": chart["last_modified"],
+        }
+
+    def test_render_batch_in_pool_and_caller(self, series):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with (
+                patch.object(ChartRenderer, "_get_executor", return_value=executor),
+                patch.object(executor, "submit", wraps=executor.submit) as submit,
+            ):
+                kcal = ChartRenderer.render_chart(1, series, "kcal", "svg")
+                assert submit.call_count == 0
+
+                images = ChartRenderer.render(1, series, "svg")
+                assert submit.call_count == 2
+
+        assert images[3] == kcal["image"]
+        assert all(b"<svg" in image for image in images)
+
+    def test_render_invalid_format(self, series):
+        with pytest.raises(ValueError):
+            ChartRenderer.render(1, series, "gif")
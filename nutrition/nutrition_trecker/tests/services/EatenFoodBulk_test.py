@@ -0,0 +1,258 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nutrition_trecker.models import (
+    EatenFood,
+    BaseFood,
+    CustomFood,
+    Recipe,
+    RecipeIngredient,
+    DailyNutritionTotal,
+    FrequentFood,
+)
+from nutrition_trecker.serializers import EatenFoodSerializer
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from nutrition_trecker.services.EatenFoodBulk import EatenFoodBulk
+from common.utils.CacheHelper import CacheHelper
+
+
+@pytest.fixture
+def bulk_foods():
+    apple = BaseFood.objects.create(
+        name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+    )
+    rice = BaseFood.objects.create(name="Рис", proteins=7, fats=1, carbohydrates=78)
+    salad = CustomFood.objects.create(
+        user_id=1, custom_name="Мой салат", proteins=2, fats=5, carbohydrates=10
+    )
+    foreign = CustomFood.objects.create(
+        user_id=2, custom_name="Чужой салат", proteins=2, fats=5, carbohydrates=10
+    )
+    return SimpleNamespace(apple=apple, rice=rice, salad=salad, foreign=foreign)
+
+
+@pytest.fixture
+def context():
+    return {"request": SimpleNamespace(user=SimpleNamespace(telegram_id=1))}
+
+
+def totals():
+    return list(DailyNutritionTotal.objects.values_list("day", "kcal"))
+
+
+@pytest.mark.django_db
+class TestEatenFoodBulk:
+    def test_bulk_create(
+        self,
+        bulk_foods,
+        context,
+        django_assert_max_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        cache.clear()
+        data = [
+            {"base_food_id": bulk_foods.apple.id, "weight_grams": 100},
+            {"base_food_id": bulk_foods.rice.id, "weight_grams": 150},
+            {"custom_food_id": bulk_foods.salad.id, "weight_grams": 200},
+        ] * 10
+        version = CacheHelper.get_cache_version("eatenfood", 1)
+
+        serializer = EatenFoodSerializer(data=data, many=True, context=context)
+        # Число запросов не зависит от размера пакета
+        with django_assert_max_num_queries(12):
+            with django_capture_on_commit_callbacks(execute=True):
+                assert serializer.is_valid(), serializer.errors
+                serializer.save()
+
+        assert EatenFood.objects.filter(user_id=1).count() == 30
+        assert CacheHelper.get_cache_version("eatenfood", 1) == version + 1
+        assert FrequentFood.objects.get(base_food=bulk_foods.rice).eaten_count == 10
+
+        rollup = totals()
+        DailyNutritionRollup.rebuild()
+        assert totals() == rollup
+
+    def test_bulk_create_validation(self, bulk_foods, context):
+        data = [
+            {"custom_food_id": bulk_foods.foreign.id, "weight_grams": 100},
+            {"base_food_id": 999999, "weight_grams": 100},
+            {"base_food_id": bulk_foods.apple.id, "weight_grams": 0},
+            {"base_food_id": bulk_foods.apple.id, "weight_grams": 100},
+        ]
+
+        serializer = EatenFoodSerializer(data=data, many=True, context=context)
+
+        assert not serializer.is_valid()
+        assert "custom_food_id" in serializer.errors[0]
+        assert "base_food_id" in serializer.errors[1]
+        assert "weight_grams" in serializer.errors[2]
+        assert serializer.errors[3] == {}
+
+    def test_bulk_update(self, bulk_foods, context):
+        eaten = [
+            EatenFood.objects.create(
+                user_id=1, base_food=bulk_foods.apple, weight_grams=100
+            )
+            for _ in range(3)
+        ]
+        yesterday = eaten[0].eaten_at - timedelta(days=1)
+        data = [
+            {"id": eaten[0].id, "weight_grams": 300},
+            {"id": eaten[1].id, "eaten_at": yesterday.isoformat()},
+        ]
+
+        serializer = EatenFoodSerializer(
+            EatenFood.objects.filter(user_id=1),
+            data=data,
+            many=True,
+            partial=True,
+            context=context,
+        )
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+
+        eaten[0].refresh_from_db()
+        eaten[1].refresh_from_db()
+        assert eaten[0].weight_grams == 300
+        assert eaten[1].eaten_at == yesterday
+        assert len(totals()) == 2
+
+        rollup = totals()
+        DailyNutritionRollup.rebuild()
+        assert totals() == rollup
+
+    def test_bulk_update_recipe_rows_query_count(self, bulk_foods, context):
+        recipe = Recipe.objects.create(user_id=1, name="Каша")
+        RecipeIngredient.objects.create(
+            user_id=1, recipe=recipe, weight_grams=100, base_food=bulk_foods.rice
+        )
+        empty = Recipe.objects.create(user_id=1, name="Пустой")
+        eaten = [
+            EatenFood.objects.create(user_id=1, recipe_food=recipe, weight_grams=100)
+            for _ in range(10)
+        ]
+
+        def patch(rows, weight):
+            serializer = EatenFoodSerializer(
+                EatenFood.objects.filter(user_id=1).select_related("recipe_food"),
+                data=[{"id": e.id, "weight_grams": weight} for e in rows],
+                many=True,
+                partial=True,
+                context=context,
+            )
+            with CaptureQueriesContext(connection) as queries:
+                assert serializer.is_valid(), serializer.errors
+                serializer.save()
+            return len(queries)
+
+        # Проверка ингредиентов рецепта не делает запросов на каждую запись
+        assert patch(eaten[:2], 150) == patch(eaten, 200)
+        assert set(EatenFood.objects.values_list("weight_grams", flat=True)) == {200}
+
+        serializer = EatenFoodSerializer(
+            data=[{"recipe_food_id": empty.id, "weight_grams": 100}],
+            many=True,
+            context=context,
+        )
+        assert not serializer.is_valid()
+
+    def test_bulk_update_foreign_record(self, bulk_foods, context):
+        foreign = EatenFood.objects.create(
+            user_id=2, base_food=bulk_foods.apple, weight_grams=100
+        )
+
+        serializer = EatenFoodSerializer(
+            EatenFood.objects.filter(user_id=1),
+            data=[{"id": foreign.id, "weight_grams": 300}],
+            many=True,
+            partial=True,
+            context=context,
+        )
+
+        assert not serializer.is_valid()
+        assert "id" in serializer.errors[0]
+
+    def test_bulk_delete(self, bulk_foods):
+        own = [
+            EatenFood.objects.create(
+                user_id=1, base_food=bulk_foods.apple, weight_grams=100
+            )
+            for _ in range(3)
+        ]
+        foreign = EatenFood.objects.create(
+            user_id=2, base_food=bulk_foods.apple, weight_grams=100
+        )
+
+        deleted = EatenFoodBulk.delete(1, [own[0].id, own[1].id, foreign.id])
+
+        assert deleted == 2
+        assert EatenFood.objects.filter(pk=foreign.pk).exists()
+        assert FrequentFood.objects.get(user_id=1).eaten_count == 1
+
+        rollup = totals()
+        DailyNutritionRollup.rebuild()
+        assert totals() == rollup
+
+    def test_copy_shifts_to_target(self, bulk_foods):
+        now = timezone.now()
+        breakfast = [
+            EatenFood.objects.create(
+                user_id=1,
+                base_food=bulk_foods.apple,
+                weight_grams=100,
+                eaten_at=now - timedelta(days=1, hours=3),
+            ),
+            EatenFood.objects.create(
+                user_id=1,
+                custom_food=bulk_foods.salad,
+                weight_grams=200,
+                eaten_at=now - timedelta(days=1, hours=2),
+            ),
+        ]
+        target = now - timedelta(hours=2)
+
+        copied = EatenFoodBulk.copy(
+            1, EatenFood.objects.filter(pk__in=[e.pk for e in breakfast]), target
+        )
+
+        assert copied == 2
+        new = EatenFood.objects.exclude(pk__in=[e.pk for e in breakfast]).order_by(
+            "eaten_at"
+        )
+        assert [e.eaten_at for e in new] == [target, target + timedelta(hours=1)]
+        assert [e.weight_grams for e in new] == [100, 200]
+        assert FrequentFood.objects.get(base_food=bulk_foods.apple).eaten_count == 2
+
+        rollup = totals()
+        DailyNutritionRollup.rebuild()
+        assert totals() == rollup
+
+    def test_copy_only_own_records(self, bulk_foods):
+        foreign = EatenFood.objects.create(
+            user_id=2,
+            base_food=bulk_foods.apple,
+            weight_grams=100,
+            eaten_at=timezone.now() - timedelta(days=1),
+        )
+
+        assert EatenFoodBulk.copy(1, EatenFood.objects.all(), timezone.now()) == 0
+        assert EatenFood.objects.filter(pk=foreign.pk).count() == 1
+
+    def test_copy_to_future(self, bulk_foods):
+        EatenFood.objects.create(
+            user_id=1,
+            base_food=bulk_foods.apple,
+            weight_grams=100,
+            eaten_at=timezone.now() - timedelta(hours=3),
+        )
+
+        with pytest.raises(ValidationError):
+            EatenFoodBulk.copy(
+                1, EatenFood.objects.all(), timezone.now() + timedelta(hours=1)
+            )
+        assert EatenFood.objects.count() == 1
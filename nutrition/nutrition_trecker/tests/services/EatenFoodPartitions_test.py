@@ -0,0 +1,232 @@
+import pytest
+from datetime import date, timedelta
+from importlib import import_module
+from django.apps import apps
+from django.db import connection
+from django.utils import timezone
+from nutrition_trecker.models import (
+    BaseFood,
+    EatenFood,
+    DailyNutritionTotal,
+    FrequentFood,
+)
+from nutrition_trecker.services.EatenFoodPartitions import EatenFoodPartitions
+from nutrition_trecker.services.EatenFoodRetention import EatenFoodRetention
+
+migration = import_module("nutrition_trecker.migrations.0011_partition_eatenfood")
+
+
+def previous_month(month: date) -> date:
+    return (month.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def partition_of(pk: int) -> str:
+    """Имя секции, в которой лежит запись EatenFood."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT tableoid::regclass::text FROM "
+            f"{connection.ops.quote_name(EatenFoodPartitions.table())} WHERE id = %s",
+            [pk],
+        )
+        return cursor.fetchone()[0]
+
+
+def table_exists(name: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        return cursor.fetchone()[0]
+
+
+def schema_of(table: str) -> dict:
+    """Первичный ключ, индексы и внешние ключи таблицы."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.attname FROM pg_index i JOIN pg_attribute a "
+            "ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = %s::regclass AND i.indisprimary ORDER BY a.attname",
+            [table],
+        )
+        primary_key = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+        indexes = {row[0] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = {row[0] for row in cursor.fetchall()}
+    return {
+        "primary_key": primary_key,
+        "indexes": indexes,
+        "foreign_keys": foreign_keys,
+    }
+
+
+def in_month(month: date, days: int = 1):
+    return EatenFoodPartitions.month_bounds(month)[0] + timedelta(days=days, hours=12)
+
+
+@pytest.fixture
+def partitioned(db):
+    """Секционированная таблица EatenFood (миграция 0011, только PostgreSQL)."""
+    if connection.vendor != "postgresql":
+        pytest.skip("Секционирование поддерживается только в PostgreSQL")
+    if not EatenFoodPartitions.is_partitioned():
+        with connection.schema_editor() as schema_editor:
+            migration.partition_eatenfood(apps, schema_editor)
+
+
+@pytest.fixture
+def apple():
+    return BaseFood.objects.create(
+        name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+    )
+
+
+class TestEatenFoodPartitions:
+    def test_partition_name(self):
+        assert (
+            EatenFoodPartitions.partition_name(date(2025, 3, 1))
+            == "nutrition_trecker_eatenfood_p202503"
+        )
+
+    def test_month_bounds_cross_year(self):
+        start, end = EatenFoodPartitions.month_bounds(date(2024, 12, 15))
+
+        assert start.date() == date(2024, 12, 1)
+        assert end.date() == date(2025, 1, 1)
+        assert end - start == timedelta(days=31)
+
+    @pytest.mark.django_db
+    def test_not_partitioned_outside_postgres(self):
+        if connection.vendor == "postgresql":
+            pytest.skip("Проверяется только для баз без секционирования")
+        assert EatenFoodPartitions.is_partitioned() is False
+
+
+@pytest.mark.django_db
+class TestEatenFoodPartitionsPostgres:
+    def test_migration_round_trip(self, partitioned, apple):
+        table = EatenFoodPartitions.table()
+        schema = schema_of(table)
+        month = previous_month(timezone.localdate())
+        ids = [
+            EatenFood.objects.create(
+                user_id=1, base_food=apple, weight_grams=100, eaten_at=eaten_at
+            ).pk
+            for eaten_at in (in_month(month), timezone.now() - timedelta(minutes=1))
+        ]
+
+        with connection.schema_editor() as schema_editor:
+            migration.unpartition_eatenfood(apps, schema_editor)
+        assert EatenFoodPartitions.is_partitioned() is False
+        assert schema_of(table)["primary_key"] == ["id"]
+
+        with connection.schema_editor() as schema_editor:
+            migration.partition_eatenfood(apps, schema_editor)
+        assert EatenFoodPartitions.is_partitioned() is True
+        # Первичный ключ включает ключ секционирования, индексы и внешние ключи
+        # перенесены с прежними именами, временные *_old удалены вместе со старой таблицей
+        assert schema_of(table) == {**schema, "primary_key": ["eaten_at", "id"]}
+        assert not table_exists(migration.OLD_TABLE)
+
+        assert sorted(EatenFood.objects.values_list("pk", flat=True)) == sorted(ids)
+        assert partition_of(ids[0]) == EatenFoodPartitions.partition_name(month)
+        # Последовательность id продолжается после перенесённых строк
+        new = EatenFood.objects.create(user_id=1, base_food=apple, weight_grams=50)
+        assert new.pk > max(ids)
+
+    def test_rows_routed_to_month_partition(self, partitioned, apple):
+        today = timezone.localdate()
+        month = previous_month(today)
+        EatenFoodPartitions.ensure(months_ahead=0, today=month)
+
+        old = EatenFood.objects.create(
+            user_id=1, base_food=apple, weight_grams=100, eaten_at=in_month(month)
+        )
+        new = EatenFood.objects.create(user_id=1, base_food=apple, weight_grams=100)
+
+        assert partition_of(old.pk) == EatenFoodPartitions.partition_name(month)
+        assert partition_of(new.pk) == EatenFoodPartitions.partition_name(today)
+
+    def test_ensure_moves_rows_from_default(self, partitioned, apple):
+        month = timezone.localdate().replace(day=1)
+        month = month.replace(year=month.year - 2)
+        assert month not in EatenFoodPartitions.partitions()
+
+        eaten = [
+            EatenFood.objects.create(
+                user_id=1,
+                base_food=apple,
+                weight_grams=100,
+                eaten_at=in_month(month, d),
+            )
+            for d in (0, 10)
+        ]
+        assert {partition_of(e.pk) for e in eaten} == {
+            EatenFoodPartitions.default_partition()
+        }
+
+        created = EatenFoodPartitions.ensure(months_ahead=0, today=month)
+
+        assert created == [EatenFoodPartitions.partition_name(month)]
+        assert {partition_of(e.pk) for e in eaten} == {created[0]}
+        # Секция по умолчанию снова подключена
+        later = EatenFood.objects.create(
+            user_id=1,
+            base_food=apple,
+            weight_grams=100,
+            eaten_at=in_month(EatenFoodPartitions.next_month(month)),
+        )
+        assert partition_of(later.pk) == EatenFoodPartitions.default_partition()
+
+    def test_retention_detaches_expired_months(self, partitioned, apple):
+        pear = BaseFood.objects.create(
+            name="Груша", proteins=0.4, fats=0.3, carbohydrates=10
+        )
+        threshold = EatenFoodRetention.threshold()
+        expired = previous_month(timezone.localdate(threshold))
+        EatenFoodPartitions.ensure(months_ahead=0, today=expired)
+        name = EatenFoodPartitions.partition_name(expired)
+
+        for d in (0, 5):
+            EatenFood.objects.create(
+                user_id=1,
+                base_food=apple,
+                weight_grams=100,
+                eaten_at=in_month(expired, d),
+            )
+        EatenFood.objects.create(
+            user_id=2, base_food=pear, weight_grams=100, eaten_at=in_month(expired)
+        )
+        recent = EatenFood.objects.create(user_id=1, base_food=apple, weight_grams=100)
+
+        stats = EatenFoodRetention.run(sleep=0, threshold=threshold)
+
+        assert stats["deleted"] == 3
+        assert stats["users"] == 2
+        assert name not in EatenFoodPartitions.partitions().values()
+        assert not table_exists(name)
+        assert list(EatenFood.objects.values_list("pk", flat=True)) == [recent.pk]
+        assert list(DailyNutritionTotal.objects.values_list("user_id", "day")) == [
+            (1, timezone.localdate(recent.eaten_at))
+        ]
+        assert FrequentFood.objects.get(user_id=1, base_food=apple).eaten_count == 1
+        assert not FrequentFood.objects.filter(user_id=2).exists()
+
+    def test_detach_expired_without_drop(self, partitioned, apple):
+        threshold = EatenFoodRetention.threshold()
+        expired = previous_month(timezone.localdate(threshold))
+        EatenFoodPartitions.ensure(months_ahead=0, today=expired)
+        name = EatenFoodPartitions.partition_name(expired)
+        EatenFood.objects.create(
+            user_id=1, base_food=apple, weight_grams=100, eaten_at=in_month(expired)
+        )
+
+        removed, sources = EatenFoodPartitions.detach_expired(threshold, drop=False)
+
+        assert removed == 1
+        assert sources == {1: {(apple.pk, None, None)}}
+        assert name not in EatenFoodPartitions.partitions().values()
+        assert table_exists(name)
+        assert not EatenFood.objects.exists()
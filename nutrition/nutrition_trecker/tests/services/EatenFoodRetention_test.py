@@ -0,0 +1,61 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from nutrition_trecker.models import (
+    BaseFood,
+    EatenFood,
+    DailyNutritionTotal,
+    FrequentFood,
+)
+from nutrition_trecker.services.EatenFoodRetention import EatenFoodRetention
+from common.utils.CacheHelper import CacheHelper
+
+
+@pytest.fixture
+def old_eaten_food():
+    apple = BaseFood.objects.create(
+        name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+    )
+    threshold = EatenFoodRetention.threshold()
+    for user_id in (1, 2):
+        for days in range(1, 6):
+            EatenFood.objects.create(
+                user_id=user_id,
+                base_food=apple,
+                weight_grams=100,
+                eaten_at=threshold - timedelta(days=days, hours=-1),
+            )
+        EatenFood.objects.create(
+            user_id=user_id,
+            base_food=apple,
+            weight_grams=100,
+            eaten_at=threshold + timedelta(hours=1),
+        )
+    return apple
+
+
+@pytest.mark.django_db
+class TestEatenFoodRetention:
+    def test_run_deletes_in_batches(
+        self, old_eaten_food, django_capture_on_commit_callbacks
+    ):
+        cache.clear()
+        versions = [CacheHelper.get_cache_version("eatenfood", u) for u in (1, 2)]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            stats = EatenFoodRetention.run(batch_size=3, sleep=0)
+
+        assert stats == {"deleted": 10, "batches": 4, "users": 2}
+        assert EatenFood.objects.count() == 2
+        assert DailyNutritionTotal.objects.count() == 2
+        assert FrequentFood.objects.get(user_id=1).eaten_count == 1
+        # Одно увеличение версии на пользователя, а не на каждую удалённую запись
+        assert [CacheHelper.get_cache_version("eatenfood", u) for u in (1, 2)] == [
+            v + 1 for v in versions
+        ]
+
+    def test_run_archive_keeps_daily_totals(self, old_eaten_food):
+        EatenFoodRetention.run(batch_size=100, sleep=0, archive=True)
+
+        assert EatenFood.objects.count() == 2
+        assert DailyNutritionTotal.objects.filter(user_id=1).count() == 6
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch
 import os
-from nutrition_trecker.models import EatenFood, Recipe
+from decimal import Decimal, ROUND_HALF_UP
+from nutrition_trecker.models import BaseFood, DailyNutritionTotal, EatenFood, Recipe
 from nutrition_trecker.services.FoodDataBuilder import FoodDataBuilder
 from rest_framework.request import Request
 from io import BytesIO
@@ -61,11 +62,57 @@ class TestFoodDataBuilder:
         assert len(results) == 8
         assert isinstance(results[0], dict)
         assert isinstance(total, dict)
-        assert total["proteins"] == 134.6
+        # 0.3 г белка на 100 г при 150 г = 0.45, половина округляется вверх
+        assert total["proteins"] == 134.7
         assert total["fats"] == 40.7
         assert total["carbohydrates"] == 126.6
         assert total["kcal"] == 1414.9
 
+    def test_eaten_food_nutritions_list_build_matches_get_nutrition(
+        self, active_user_food, django_assert_num_queries
+    ):
+        queryset = EatenFood.objects.filter(user_id=1).order_by("pk")
+
+        with django_assert_num_queries(1):
+            results, _ = FoodDataBuilder._eaten_food_nutritions_list_build(queryset)
+
+        for food, eaten in zip(results, queryset):
+            assert food["id"] == eaten.pk
+            assert food["type"] == eaten.get_type()
+            assert food["name"] == eaten.get_name()
+            assert food["nutrition"] == eaten.get_nutrition()
+
+    @pytest.mark.parametrize(
+        "per_100g, weight_grams",
+        [(0.1, 50), (0.3, 150), (0.7, 50), (0.9, 50), (1.5, 5), (2.5, 3), (4.5, 1)],
+    )
+    def test_rounding_ties_match_all_paths(self, per_100g, weight_grams):
+        food = BaseFood.objects.create(
+            name="Продукт", proteins=per_100g, fats=per_100g, carbohydrates=0
+        )
+        eaten = EatenFood.objects.create(
+            user_id=1, base_food=food, weight_grams=weight_grams
+        )
+        expected = float(
+            (Decimal(str(per_100g)) * weight_grams / 100).quantize(
+                Decimal("0.1"), rounding=ROUND_HALF_UP
+            )
+        )
+
+        results, total = FoodDataBuilder._eaten_food_nutritions_list_build(
+            EatenFood.objects.filter(pk=eaten.pk)
+        )
+        detail = EatenFood.objects.get(pk=eaten.pk).get_nutrition()
+        rollup = DailyNutritionTotal.objects.get(user_id=1)
+
+        assert results[0]["nutrition"]["proteins"] == expected
+        assert total["proteins"] == expected
+        assert detail["proteins"] == expected
+        assert float(rollup.proteins) == expected
+        for key in FoodDataBuilder.NUTRITION_KEYS:
+            assert results[0]["nutrition"][key] == detail[key]
+            assert float(getattr(rollup, key)) == detail[key]
+
     def test_eaten_food_nutritions_list_build_0_rows(self, active_user_food):
         queryset = EatenFood.objects.filter(user_id=2)
 
@@ -96,6 +143,36 @@ class TestFoodDataBuilder:
         assert res[start_date.isoformat()]["carbohydrates"] == 14.4
         assert res[start_date.isoformat()]["kcal"] == 255.6
 
+    def test_eaten_food_range_days_total_list_build_one_query(
+        self, dates, active_user_food, django_assert_num_queries
+    ):
+        qs = EatenFood.objects.filter(user_id=1)
+
+        with django_assert_num_queries(1):
+            res = FoodDataBuilder._eaten_food_range_days_total_list_build(
+                qs, dates[-1], dates[0]
+            )
+
+        assert len(res) == 7
+        assert res[dates[3].isoformat()] == {
+            "proteins": 0.0,
+            "fats": 0.0,
+            "carbohydrates": 0.0,
+            "kcal": 0.0,
+        }
+
+    def test_daily_nutrition_totals_build_matches_range_build(
+        self, dates, active_user_food
+    ):
+        qs = EatenFood.objects.filter(user_id=1)
+
+        expected = FoodDataBuilder._eaten_food_range_days_total_list_build(
+            qs, dates[-1], dates[0]
+        )
+        res = FoodDataBuilder.daily_nutrition_totals_build(1, dates[-1], dates[0])
+
+        assert res == expected
+
     def test_eaten_food_range_days_total_list_build_invalid_dates(self, dates):
         with pytest.raises(ValidationError):
             start_date = dates[-1]
@@ -175,6 +252,15 @@ class TestFoodDataBuilder:
         assert isinstance(recipes[0], dict)
         assert recipes[0]["name"] == "Борщ"
 
+    def test_recipe_list_data_build_empty_recipe(self):
+        recipe = Recipe.objects.create(user_id=1, name="Пустой рецепт")
+
+        recipes = FoodDataBuilder.recipe_list_data_build(
+            Recipe.objects.filter(user_id=1)
+        )
+
+        assert recipes[0]["nutrition"] == recipe.calculate_nutrition()
+
     def test_eaten_food_eaten_food_stats_graph_draw(
         self, dates, active_user_food, factory
     ):
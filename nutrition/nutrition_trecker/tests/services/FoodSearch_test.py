@@ -0,0 +1,74 @@
+import pytest
+from django.utils import timezone
+from nutrition_trecker.models import (
+    BaseFood,
+    CustomFood,
+    Recipe,
+    EatenFood,
+    UserFavorite,
+)
+from nutrition_trecker.services.FoodSearch import FoodSearch
+
+
+@pytest.fixture
+def search_foods():
+    chicken = BaseFood.objects.create(
+        name="Курица отварная", proteins=25, fats=7, carbohydrates=0
+    )
+    breast = BaseFood.objects.create(
+        name="Куриная грудка", proteins=23, fats=2, carbohydrates=0
+    )
+    custom = CustomFood.objects.create(
+        user_id=1,
+        custom_name="Курица по-домашнему",
+        proteins=20,
+        fats=10,
+        carbohydrates=5,
+    )
+    CustomFood.objects.create(
+        user_id=2, custom_name="Курица чужая", proteins=20, fats=10, carbohydrates=5
+    )
+    recipe = Recipe.objects.create(user_id=1, name="Курица с рисом")
+    return {"chicken": chicken, "breast": breast, "custom": custom, "recipe": recipe}
+
+
+@pytest.mark.django_db
+class TestFoodSearch:
+    def test_search_merges_sources(self, search_foods):
+        results = FoodSearch.search("курица", user_id=1)
+
+        found = {(row["type"], row["id"]) for row in results}
+        assert ("base", search_foods["chicken"].id) in found
+        assert ("custom", search_foods["custom"].id) in found
+        assert ("recipe", search_foods["recipe"].id) in found
+        # Чужие продукты не попадают в выдачу
+        assert all(row["name"] != "Курица чужая" for row in results)
+
+    def test_search_returns_per_100g_nutrition(self, search_foods):
+        results = FoodSearch.search("курица отварная", user_id=1)
+
+        chicken = next(row for row in results if row["type"] == "base")
+        assert chicken["proteins"] == 25.0
+        assert chicken["fats"] == 7.0
+        assert chicken["carbohydrates"] == 0.0
+        assert chicken["kcal"] == 163.0
+
+    def test_favorite_and_recent_boost(self, search_foods):
+        UserFavorite.objects.create(user_id=1, base_food=search_foods["breast"])
+        EatenFood.objects.create(
+            user_id=1,
+            recipe_food=search_foods["recipe"],
+            weight_grams=100,
+            eaten_at=timezone.now(),
+        )
+
+        results = FoodSearch.search("кур", user_id=1)
+
+        breast = next(row for row in results if row["id"] == search_foods["breast"].id)
+        recipe = next(row for row in results if row["type"] == "recipe")
+        assert breast["is_favorite"] and not breast["is_recent"]
+        assert recipe["is_recent"] and not recipe["is_favorite"]
+        assert [row["type"] for row in results[:2]] == ["base", "recipe"]
+
+    def test_limit(self, search_foods):
+        assert len(FoodSearch.search("кур", user_id=1, limit=2)) == 2
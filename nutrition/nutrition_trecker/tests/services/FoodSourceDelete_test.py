@@ -0,0 +1,106 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from nutrition_trecker.models import (
+    BaseFood,
+    CustomFood,
+    EatenFood,
+    Recipe,
+    RecipeIngredient,
+)
+from nutrition_trecker.services.FoodSourceDelete import FoodSourceDelete
+from common.utils.CacheHelper import CacheHelper
+
+
+@pytest.mark.django_db
+class TestFoodSourceDelete:
+    def test_delete_base_foods(self, django_assert_max_num_queries):
+        foods = [
+            BaseFood.objects.create(
+                name=f"Продукт {i}", proteins=10, fats=5, carbohydrates=20
+            )
+            for i in range(10)
+        ]
+        recipe = Recipe.objects.create(user_id=1, name="Салат")
+        for food in foods:
+            EatenFood.objects.create(user_id=1, base_food=food, weight_grams=100)
+            RecipeIngredient.objects.create(
+                user_id=1, recipe=recipe, base_food=food, weight_grams=50
+            )
+        recipe.refresh_from_db()
+
+        # Число запросов не зависит от числа удаляемых продуктов
+        with django_assert_max_num_queries(12):
+            deleted = FoodSourceDelete.delete(BaseFood.objects.all())
+
+        assert deleted == 10
+        eaten = EatenFood.objects.get(name="Продукт 3")
+        assert eaten.base_food_id is None
+        assert float(eaten.proteins) == 10
+        assert float(eaten.kcal) == float(foods[3].kcal)
+        assert RecipeIngredient.objects.filter(base_food__isnull=True).count() == 10
+
+        # Кбжу рецепта не меняется: ингредиенты стали ручным вводом с теми же значениями
+        kcal = recipe.kcal
+        recipe.update_nutrition()
+        assert float(recipe.kcal) == float(kcal)
+
+    def test_delete_custom_food(self):
+        food = CustomFood.objects.create(
+            user_id=1, custom_name="Мой салат", proteins=2, fats=5, carbohydrates=10
+        )
+        EatenFood.objects.create(user_id=1, custom_food=food, weight_grams=100)
+
+        FoodSourceDelete.delete(CustomFood.objects.filter(pk=food.pk))
+
+        eaten = EatenFood.objects.get(user_id=1)
+        assert eaten.name == "Мой салат"
+        assert eaten.custom_food_id is None
+
+    def test_delete_recipes_uses_per_100g(self, recipe_with_ingredients):
+        recipe = recipe_with_ingredients
+        EatenFood.objects.create(user_id=1, recipe_food=recipe, weight_grams=200)
+
+        FoodSourceDelete.delete(Recipe.objects.filter(user_id=1))
+
+        eaten = EatenFood.objects.get(user_id=1)
+        assert eaten.recipe_food_id is None
+        assert eaten.name == recipe.name
+        assert float(eaten.proteins) == float(recipe.proteins)
+        assert float(eaten.kcal) == float(recipe.kcal)
+        assert not RecipeIngredient.objects.exists()
+
+    def test_snapshot_single_update_invalidates_users(
+        self, django_capture_on_commit_callbacks
+    ):
+        foods = [
+            BaseFood.objects.create(
+                name=f"Продукт {i}", proteins=10, fats=5, carbohydrates=20
+            )
+            for i in range(3)
+        ]
+        for user_id, food in ((1, foods[0]), (1, foods[1]), (2, foods[2])):
+            EatenFood.objects.create(user_id=user_id, base_food=food, weight_grams=100)
+        cache.clear()
+        versions = {
+            user_id: CacheHelper.get_cache_version("eatenfood", user_id)
+            for user_id in (1, 2, 3)
+        }
+
+        # Как при удалении источника: копирование в транзакции удаления
+        with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                updated = FoodSourceDelete.snapshot(
+                    EatenFood, BaseFood, [food.pk for food in foods]
+                )
+
+        assert updated == 3
+        assert len(queries) == 1
+        assert not EatenFood.objects.filter(base_food__isnull=False).exists()
+        assert set(EatenFood.objects.values_list("name", flat=True)) == {
+            food.name for food in foods
+        }
+        assert CacheHelper.get_cache_version("eatenfood", 1) == versions[1] + 1
+        assert CacheHelper.get_cache_version("eatenfood", 2) == versions[2] + 1
+        assert CacheHelper.get_cache_version("eatenfood", 3) == versions[3]
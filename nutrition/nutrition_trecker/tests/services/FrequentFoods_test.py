@@ -0,0 +1,129 @@
+import pytest
+from datetime import timedelta
+from importlib import import_module
+from django.apps import apps
+from django.utils import timezone
+from nutrition_trecker.models import EatenFood, BaseFood, CustomFood, FrequentFood
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+
+
+@pytest.fixture
+def foods():
+    apple = BaseFood.objects.create(
+        name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+    )
+    salad = CustomFood.objects.create(
+        user_id=1, custom_name="Мой салат", proteins=2, fats=5, carbohydrates=10
+    )
+    return apple, salad
+
+
+def eat(user_id=1, days_ago=0, **source):
+    return EatenFood.objects.create(
+        user_id=user_id,
+        weight_grams=100,
+        eaten_at=timezone.now() - timedelta(days=days_ago),
+        **source,
+    )
+
+
+@pytest.mark.django_db
+class TestFrequentFoods:
+    def test_record_on_create(self, foods):
+        apple, _ = foods
+        eat(base_food=apple, days_ago=1)
+        eat(base_food=apple)
+
+        frequent = FrequentFood.objects.get(user_id=1, base_food=apple)
+        assert frequent.eaten_count == 2
+
+        # Инкрементальный учёт совпадает с полной пересборкой
+        score = frequent.score
+        FrequentFoods.rebuild(1)
+        rebuilt = FrequentFood.objects.get(user_id=1, base_food=apple)
+        assert rebuilt.eaten_count == 2
+        assert rebuilt.score == pytest.approx(score)
+
+    def test_manual_entry_not_recorded(self):
+        EatenFood.objects.create(
+            user_id=1,
+            weight_grams=100,
+            name="Печенье",
+            proteins=5,
+            fats=20,
+            carbohydrates=60,
+        )
+
+        assert not FrequentFood.objects.exists()
+
+    def test_refresh_on_delete(self, foods):
+        apple, _ = foods
+        first = eat(base_food=apple)
+        second = eat(base_food=apple)
+
+        first.delete()
+        assert FrequentFood.objects.get(base_food=apple).eaten_count == 1
+
+        second.delete()
+        assert not FrequentFood.objects.filter(base_food=apple).exists()
+
+    def test_refresh_on_source_change(self, foods):
+        apple, salad = foods
+        eaten = eat(base_food=apple)
+
+        eaten.base_food = None
+        eaten.custom_food = salad
+        eaten.save()
+
+        assert not FrequentFood.objects.filter(base_food=apple).exists()
+        assert FrequentFood.objects.get(custom_food=salad).eaten_count == 1
+
+    def test_top_prefers_recent_and_frequent(self, foods):
+        apple, salad = foods
+        # Три старых приёма весят меньше двух свежих
+        for days_ago in (60, 61, 62):
+            eat(base_food=apple, days_ago=days_ago)
+        eat(custom_food=salad, days_ago=1)
+        eat(custom_food=salad)
+
+        top = FrequentFoods.top(1)
+
+        assert [(row["type"], row["id"]) for row in top] == [
+            ("custom", salad.id),
+            ("base", apple.id),
+        ]
+        assert top[0]["name"] == "Мой салат"
+        assert top[0]["eaten_count"] == 2
+        assert top[1]["kcal"] == float(apple.kcal)
+
+    def test_top_only_own_foods(self, foods):
+        apple, _ = foods
+        eat(user_id=2, base_food=apple)
+
+        assert FrequentFoods.top(1) == []
+        assert len(FrequentFoods.top(2)) == 1
+
+    def test_migration_backfill(self, foods):
+        apple, salad = foods
+        eat(base_food=apple, days_ago=3)
+        eat(base_food=apple)
+        eat(custom_food=salad, days_ago=10)
+        eat(user_id=2, base_food=apple, days_ago=1)
+        expected = {
+            (row.user_id, row.base_food_id, row.custom_food_id): row
+            for row in FrequentFood.objects.all()
+        }
+        FrequentFood.objects.all().delete()
+
+        migration = import_module("nutrition_trecker.migrations.0009_frequent_food")
+        migration.fill_frequent_foods(apps, None)
+
+        rows = {
+            (row.user_id, row.base_food_id, row.custom_food_id): row
+            for row in FrequentFood.objects.all()
+        }
+        assert rows.keys() == expected.keys()
+        for key, row in rows.items():
+            assert row.eaten_count == expected[key].eaten_count
+            assert row.last_eaten_at == expected[key].last_eaten_at
+            assert row.score == pytest.approx(expected[key].score)
@@ -0,0 +1,127 @@
+import pytest
+import numpy as np
+from datetime import date, timedelta
+from nutrition_trecker.models import (
+    BaseFood,
+    EatenFood,
+    DailyNutritionTotal,
+    WeeklyNutritionTotal,
+)
+from nutrition_trecker.services.EatenFoodRetention import EatenFoodRetention
+from nutrition_trecker.services.NutritionArchive import NutritionArchive
+
+TODAY = date(2026, 6, 17)
+
+
+@pytest.fixture
+def daily_history():
+    # Три недели по дням: 2025-01-06 (пн) .. 2025-01-26 (вс), ккал = 1000 + номер дня
+    first_day = date(2025, 1, 6)
+    for i in range(21):
+        DailyNutritionTotal.objects.create(
+            user_id=1,
+            day=first_day + timedelta(days=i),
+            proteins=100,
+            fats=50,
+            carbohydrates=200,
+            kcal=1000 + i,
+        )
+    return first_day
+
+
+@pytest.mark.django_db
+class TestNutritionArchive:
+    def test_compact_moves_whole_weeks(self, daily_history, settings):
+        # Граница хранения по дням приходится на среду второй недели
+        settings.NUTRITION_HISTORY_DAILY_DAYS = (TODAY - date(2025, 1, 15)).days
+
+        assert NutritionArchive.compact(TODAY) == 1
+
+        week = WeeklyNutritionTotal.objects.get(user_id=1)
+        assert week.week_start == daily_history
+        assert week.days_logged == 7
+        assert float(week.kcal) == sum(1000 + i for i in range(7))
+        # Вторая неделя хранится по дням целиком
+        assert DailyNutritionTotal.objects.count() == 14
+        assert DailyNutritionTotal.objects.order_by("day").first().day == date(
+            2025, 1, 13
+        )
+
+    def test_weekly_totals_reads_both_tiers(self, daily_history, settings):
+        settings.NUTRITION_HISTORY_DAILY_DAYS = (TODAY - date(2025, 1, 13)).days
+        NutritionArchive.compact(TODAY)
+
+        weeks = NutritionArchive.weekly_totals(1, date(2025, 1, 8), date(2025, 2, 2))
+
+        assert list(weeks) == ["2025-01-06", "2025-01-13", "2025-01-20", "2025-01-27"]
+        assert weeks["2025-01-06"]["kcal"] == 1003.0
+        assert weeks["2025-01-13"]["kcal"] == 1010.0
+        assert weeks["2025-01-13"]["days_logged"] == 7
+        assert weeks["2025-01-27"] == {
+            "proteins": 0.0,
+            "fats": 0.0,
+            "carbohydrates": 0.0,
+            "kcal": 0.0,
+            "days_logged": 0,
+        }
+
+    def test_weekly_totals_clip_mid_week(self, daily_history, settings):
+        # Отчёт с четверга 2025-01-23: история должна закончиться средой 2025-01-22
+        settings.NUTRITION_HISTORY_DAILY_DAYS = (TODAY - date(2025, 1, 13)).days
+        NutritionArchive.compact(TODAY)
+
+        weeks = NutritionArchive.weekly_totals(
+            1, date(2025, 1, 6), date(2025, 1, 22), clip=True
+        )
+
+        assert list(weeks) == ["2025-01-06", "2025-01-13", "2025-01-20"]
+        assert weeks["2025-01-06"]["kcal"] == 1003.0
+        assert weeks["2025-01-13"]["days_logged"] == 7
+        # Неполная неделя считается только по дням до начала отчёта (пн–ср)
+        assert weeks["2025-01-20"]["days_logged"] == 3
+        assert weeks["2025-01-20"]["kcal"] == 1015.0
+
+    def test_retention_dumps_deleted_rows(self, tmp_path, settings):
+        settings.EATEN_FOOD_ARCHIVE_DIR = tmp_path
+        apple = BaseFood.objects.create(
+            name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+        )
+        threshold = EatenFoodRetention.threshold()
+        for days in (1, 2, 40):
+            EatenFood.objects.create(
+                user_id=1,
+                base_food=apple,
+                weight_grams=200,
+                eaten_at=threshold - timedelta(days=days),
+            )
+        kept = EatenFood.objects.create(user_id=1, base_food=apple, weight_grams=100)
+
+        EatenFoodRetention.run(sleep=0, archive=True, dump=True)
+
+        assert list(EatenFood.objects.all()) == [kept]
+        dumps = sorted(tmp_path.glob("eatenfood_*.npz"))
+        assert len(dumps) in (2, 3)
+        ids = np.concatenate([np.load(path)["id"] for path in dumps])
+        assert len(ids) == 3 and kept.pk not in ids
+        data = np.load(dumps[-1])
+        assert set(data["name"]) == {"Яблоко"}
+        assert (data["custom_food_id"] == -1).all()
+        assert np.allclose(data["carbohydrates"], 28.0)
+
+    def test_compact_refuses_without_daily_totals(self, daily_history, settings):
+        settings.NUTRITION_HISTORY_DAILY_DAYS = (TODAY - date(2025, 1, 15)).days
+        apple = BaseFood.objects.create(
+            name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+        )
+        eaten = EatenFood.objects.create(user_id=2, base_food=apple, weight_grams=100)
+        # Сводная таблица не заполнена для дня с записями
+        DailyNutritionTotal.objects.filter(user_id=2).delete()
+
+        assert NutritionArchive.daily_totals_complete() is False
+        assert NutritionArchive.compact(TODAY) == 0
+        assert EatenFoodRetention.run(
+            sleep=0, archive=True, threshold=eaten.eaten_at + timedelta(days=1)
+        ) == {"deleted": 0, "batches": 0, "users": 0}
+        assert not WeeklyNutritionTotal.objects.exists()
+        assert DailyNutritionTotal.objects.count() == 21
+        assert EatenFood.objects.filter(pk=eaten.pk).exists()
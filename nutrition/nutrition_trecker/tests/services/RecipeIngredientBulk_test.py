@@ -0,0 +1,165 @@
+import pytest
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from nutrition_trecker.models import (
+    BaseFood,
+    CustomFood,
+    EatenFood,
+    Recipe,
+    RecipeIngredient,
+    DailyNutritionTotal,
+)
+from nutrition_trecker.serializers import RecipeIngredientSerializer
+from nutrition_trecker.services.DailyNutritionRollup import DailyNutritionRollup
+from nutrition_trecker.services.RecipeIngredientBulk import RecipeIngredientBulk
+from common.utils.CacheHelper import CacheHelper
+
+
+@pytest.fixture
+def bulk_recipe(django_capture_on_commit_callbacks):
+    # Инвалидации при создании записей сбрасываются здесь, а не вместе с проверяемыми
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        foods = [
+            BaseFood.objects.create(
+                name=f"Продукт {i}", proteins=10, fats=5, carbohydrates=20
+            )
+            for i in range(10)
+        ]
+        salad = CustomFood.objects.create(
+            user_id=1, custom_name="Мой салат", proteins=2, fats=5, carbohydrates=10
+        )
+        foreign = CustomFood.objects.create(
+            user_id=2, custom_name="Чужой салат", proteins=2, fats=5, carbohydrates=10
+        )
+        recipe = Recipe.objects.create(user_id=1, name="Салат")
+        old = RecipeIngredient.objects.create(
+            user_id=1, recipe=recipe, weight_grams=100, base_food=foods[0]
+        )
+        EatenFood.objects.create(user_id=1, recipe_food=recipe, weight_grams=200)
+    return SimpleNamespace(
+        foods=foods, salad=salad, foreign=foreign, recipe=recipe, old=old
+    )
+
+
+def make_serializer(recipe, data, partial=False):
+    context = {
+        "request": SimpleNamespace(user=SimpleNamespace(telegram_id=1)),
+        "view": SimpleNamespace(_get_recipe=lambda: recipe),
+    }
+    return RecipeIngredientSerializer(
+        recipe.ingredients.select_related("base_food", "custom_food"),
+        data=data,
+        many=True,
+        partial=partial,
+        context=context,
+    )
+
+
+@pytest.mark.django_db
+class TestRecipeIngredientBulk:
+    def test_bulk_replace(
+        self,
+        bulk_recipe,
+        django_assert_max_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        cache.clear()
+        recipe = bulk_recipe.recipe
+        data = [
+            {"base_food_id": food.id, "weight_grams": 100}
+            for food in bulk_recipe.foods[1:]
+        ] + [
+            {"id": bulk_recipe.old.id, "weight_grams": 300},
+            {"custom_food_id": bulk_recipe.salad.id, "weight_grams": 50},
+        ]
+        version = CacheHelper.get_cache_version("recipe_ingredient", 1)
+        eaten_version = CacheHelper.get_cache_version("eatenfood", 1)
+
+        serializer = make_serializer(recipe, data)
+        # Число запросов не зависит от числа ингредиентов
+        with django_assert_max_num_queries(14):
+            with django_capture_on_commit_callbacks(execute=True):
+                assert serializer.is_valid(), serializer.errors
+                serializer.save()
+
+        assert recipe.ingredients.count() == 11
+        assert RecipeIngredient.objects.get(pk=bulk_recipe.old.pk).weight_grams == 300
+        assert CacheHelper.get_cache_version("recipe_ingredient", 1) == version + 1
+        # Кбжу рецепта в приёмах пищи изменилось: ETag списка тоже меняется
+        assert CacheHelper.get_cache_version("eatenfood", 1) == eaten_version + 1
+
+        recipe.refresh_from_db()
+        nutrition = recipe.calculate_nutrition()
+        assert float(recipe.total_weight) == 1250
+        assert float(recipe.kcal) == nutrition["per_100g"]["kcal"]
+
+        rollup = list(DailyNutritionTotal.objects.values_list("day", "kcal"))
+        DailyNutritionRollup.rebuild()
+        assert list(DailyNutritionTotal.objects.values_list("day", "kcal")) == rollup
+
+    def test_bulk_replace_deletes_missing(self, bulk_recipe):
+        recipe = bulk_recipe.recipe
+        data = [{"base_food_id": bulk_recipe.foods[1].id, "weight_grams": 100}]
+
+        serializer = make_serializer(recipe, data)
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+
+        assert list(recipe.ingredients.values_list("base_food_id", flat=True)) == [
+            bulk_recipe.foods[1].id
+        ]
+
+    def test_bulk_upsert_keeps_missing(self, bulk_recipe):
+        recipe = bulk_recipe.recipe
+        data = [{"base_food_id": bulk_recipe.foods[1].id, "weight_grams": 100}]
+
+        serializer = make_serializer(recipe, data, partial=True)
+        assert serializer.is_valid(), serializer.errors
+        serializer.save()
+
+        assert recipe.ingredients.count() == 2
+
+    def test_bulk_unchanged_skips_invalidation(
+        self, bulk_recipe, django_capture_on_commit_callbacks
+    ):
+        recipe = bulk_recipe.recipe
+        version = CacheHelper.get_cache_version("recipe", 1)
+
+        serializer = make_serializer(
+            recipe, [{"id": bulk_recipe.old.id, "weight_grams": 100}]
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            assert serializer.is_valid(), serializer.errors
+            serializer.save()
+
+        assert CacheHelper.get_cache_version("recipe", 1) == version
+
+    def test_bulk_validation(self, bulk_recipe):
+        data = [
+            {"custom_food_id": bulk_recipe.foreign.id, "weight_grams": 100},
+            {"base_food_id": 999999, "weight_grams": 100},
+            {"id": 999999, "weight_grams": 100},
+            {"base_food_id": bulk_recipe.foods[1].id, "weight_grams": 100},
+        ]
+
+        serializer = make_serializer(bulk_recipe.recipe, data)
+
+        assert not serializer.is_valid()
+        assert "custom_food_id" in serializer.errors[0]
+        assert "base_food_id" in serializer.errors[1]
+        assert "id" in serializer.errors[2]
+        assert serializer.errors[3] == {}
+
+    def test_bulk_duplicates(self, bulk_recipe):
+        recipe = bulk_recipe.recipe
+        # Продукт уже есть в рецепте и не удаляется при частичном обновлении
+        objs = [
+            RecipeIngredient(weight_grams=100, base_food=bulk_recipe.foods[0]),
+        ]
+
+        with pytest.raises(ValidationError):
+            RecipeIngredientBulk.save(recipe, objs, replace=False)
+
+        assert recipe.ingredients.count() == 1
@@ -0,0 +1,112 @@
+import pytest
+from io import StringIO
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from nutrition_trecker.models import (
+    BaseFood,
+    CustomFood,
+    EatenFood,
+    Recipe,
+    RecipeIngredient,
+)
+from nutrition_trecker.services.BaseFoodImport import BaseFoodImport
+from nutrition_trecker.views import EatenFoodViewSet
+
+USER = SimpleNamespace(telegram_id=1, is_authenticated=True)
+
+
+def get_list(etag=None):
+    """GET /eaten-food/?date=<сегодня>, при etag — условный запрос."""
+    headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+    request = APIRequestFactory().get(
+        "/", {"date": timezone.localdate().isoformat()}, **headers
+    )
+    force_authenticate(request, user=USER)
+    return EatenFoodViewSet.as_view({"get": "list"})(request)
+
+
+def proteins(response):
+    return sorted(
+        float(item["nutrition"]["proteins"]) for item in response.data["eaten"]
+    )
+
+
+@pytest.fixture
+def eaten(db, django_capture_on_commit_callbacks):
+    cache.clear()
+    # Инвалидации при создании записей сбрасываются здесь, а не вместе с проверяемыми
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        apple = BaseFood.objects.create(
+            name="Яблоко", proteins=0.3, fats=0.2, carbohydrates=14
+        )
+        salad = CustomFood.objects.create(
+            user_id=1, custom_name="Мой салат", proteins=2, fats=5, carbohydrates=10
+        )
+        recipe = Recipe.objects.create(user_id=1, name="Компот")
+        RecipeIngredient.objects.create(
+            user_id=1, recipe=recipe, base_food=apple, weight_grams=100
+        )
+        for source in (
+            {"base_food": apple},
+            {"custom_food": salad},
+            {"recipe_food": recipe},
+        ):
+            EatenFood.objects.create(user_id=1, weight_grams=100, **source)
+    return apple, salad
+
+
+@pytest.mark.django_db
+class TestEatenFoodETag:
+    def test_unchanged_list_not_modified(self, eaten):
+        first = get_list()
+
+        assert first.status_code == 200
+        assert get_list(first["ETag"]).status_code == 304
+
+    def test_base_food_edit_changes_etag(
+        self, eaten, django_capture_on_commit_callbacks
+    ):
+        apple, _ = eaten
+        first = get_list()
+
+        with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+            apple.proteins = 10
+            apple.save()
+
+        second = get_list(first["ETag"])
+        assert second.status_code == 200
+        assert second["ETag"] != first["ETag"]
+        # Продукт и рецепт из него
+        assert proteins(second) == [2.0, 10.0, 10.0]
+
+    def test_custom_food_edit_changes_etag(
+        self, eaten, django_capture_on_commit_callbacks
+    ):
+        _, salad = eaten
+        first = get_list()
+
+        with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+            salad.proteins = 7
+            salad.save()
+
+        second = get_list(first["ETag"])
+        assert second.status_code == 200
+        assert 7.0 in proteins(second)
+
+    def test_base_food_import_changes_etag(
+        self, eaten, django_capture_on_commit_callbacks
+    ):
+        first = get_list()
+
+        with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+            rows, _ = BaseFoodImport.read(
+                StringIO("name,proteins,fats,carbohydrates\nЯблоко,5,0.2,14\n")
+            )
+            BaseFoodImport.save(rows)
+
+        second = get_list(first["ETag"])
+        assert second.status_code == 200
+        assert proteins(second) == [2.0, 5.0, 5.0]
@@ -10,6 +10,7 @@ router.register(r"custom-food", views.CustomFoodViewSet, basename="custom-food")
 router.register(r"user-favorite", views.UserFavoriteViewSet, basename="user-favorite")
 router.register(r"recipes", views.RecipeViewSet, basename="recipe")
 router.register(r"eaten-food", views.EatenFoodViewSet, basename="eaten-food")
+router.register(r"search", views.FoodSearchViewSet, basename="food-search")
 
 # Вложенный роутер для ингредиентов рецепта
 recipe_router = nested_routers.NestedDefaultRouter(router, r"recipes", lookup="recipe")
@@ -3,17 +3,30 @@ from nutrition_trecker import models, serializers
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from common.permissions.IsOwner403Permission import IsOwner403Permission
-from django.db.models import Prefetch
 from django.core.cache import cache
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from django.views.decorators.vary import vary_on_headers
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
 from nutrition_trecker.services.FoodDataBuilder import FoodDataBuilder
+from nutrition_trecker.services.ChartRenderer import ChartRenderer
+from nutrition_trecker.services.FoodSearch import FoodSearch
+from nutrition_trecker.services.FrequentFoods import FrequentFoods
+from nutrition_trecker.services.EatenFoodBulk import EatenFoodBulk
+from nutrition_trecker.services.FoodSourceDelete import FoodSourceDelete
 from common.filters.FuzzySearchFilter import FuzzySearchFilter
 from common.utils.CacheHelper import CacheHelper
 from common.decorators.cache_response import cache_response
 from common.mixins.AutocompleteMixin import AutocompleteMixin
+from common.mixins.BulkDestroyMixin import BulkDestroyMixin
 
 
 class BaseFoodViewSet(AutocompleteMixin, viewsets.ReadOnlyModelViewSet):
@@ -22,6 +35,7 @@ class BaseFoodViewSet(AutocompleteMixin, viewsets.ReadOnlyModelViewSet):
 
     filter_backends = [FuzzySearchFilter]
     search_fields = ["name"]
+    autocomplete_index_entity = "base_food"
 
     @cache_response(
         entity="base_food",
@@ -39,17 +53,30 @@ class BaseFoodViewSet(AutocompleteMixin, viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class CustomFoodViewSet(AutocompleteMixin, viewsets.ModelViewSet):
+class CustomFoodViewSet(AutocompleteMixin, BulkDestroyMixin, viewsets.ModelViewSet):
     serializer_class = serializers.CustomFoodSerializer
     permission_classes = [IsOwner403Permission]
 
     filter_backends = [FuzzySearchFilter]
     search_fields = ["custom_name"]
     autocomplete_search_fields = ["custom_name"]
+    autocomplete_index_entity = "custom_food"
+    autocomplete_index_per_user = True
 
     def get_queryset(self):
         return models.CustomFood.objects.filter(user_id=self.request.user.telegram_id)
 
+    def get_search_boost(self):
+        return FrequentFoods.boost_expression(
+            self.request.user.telegram_id, "custom_food"
+        )
+
+    def perform_destroy(self, instance):
+        FoodSourceDelete.delete(self.get_queryset().filter(pk=instance.pk))
+
+    def perform_bulk_destroy(self, queryset):
+        return FoodSourceDelete.delete(queryset)
+
     def perform_create(self, serializer):
         serializer.save(user_id=self.request.user.telegram_id)
 
@@ -69,6 +96,31 @@ class CustomFoodViewSet(AutocompleteMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class FoodSearchViewSet(viewsets.ViewSet):
+    """Единый поиск по базовым продуктам, своим продуктам и рецептам пользователя."""
+
+    search_min_length = 2
+    search_default_limit = 20
+    search_max_limit = 50
+
+    def list(self, request):
+        search = request.query_params.get("search", "").strip()
+        if len(search) < self.search_min_length:
+            return Response([], status=status.HTTP_200_OK)
+
+        try:
+            limit = int(request.query_params.get("limit", self.search_default_limit))
+        except ValueError:
+            return Response(
+                {"message": "Параметр limit должен быть числом."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(max(limit, 1), self.search_max_limit)
+
+        results = FoodSearch.search(search, request.user.telegram_id, limit)
+        return Response(results, status=status.HTTP_200_OK)
+
+
 class UserFavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.UserFavoriteSerializer
     permission_classes = [IsOwner403Permission]
@@ -78,24 +130,29 @@ class UserFavoriteViewSet(viewsets.ModelViewSet):
         return models.UserFavorite.objects.filter(user_id=self.request.user.telegram_id)
 
 
-class RecipeViewSet(AutocompleteMixin, viewsets.ModelViewSet):
+class RecipeViewSet(AutocompleteMixin, BulkDestroyMixin, viewsets.ModelViewSet):
     serializer_class = serializers.RecipeSerializer
     permission_classes = [IsOwner403Permission]
 
     filter_backends = [FuzzySearchFilter]
     search_fields = ["name", "description"]
     autocomplete_search_fields = ["name"]
+    autocomplete_index_entity = "recipe"
+    autocomplete_index_per_user = True
 
     def get_queryset(self):
-        ingredients_prefetch = Prefetch(
-            "ingredients",
-            queryset=models.RecipeIngredient.objects.select_related(
-                "base_food", "custom_food"
-            ),
+        return models.Recipe.objects.filter(user_id=self.request.user.telegram_id)
+
+    def get_search_boost(self):
+        return FrequentFoods.boost_expression(
+            self.request.user.telegram_id, "recipe_food"
         )
-        return models.Recipe.objects.filter(
-            user_id=self.request.user.telegram_id
-        ).prefetch_related(ingredients_prefetch)
+
+    def perform_destroy(self, instance):
+        FoodSourceDelete.delete(self.get_queryset().filter(pk=instance.pk))
+
+    def perform_bulk_destroy(self, queryset):
+        return FoodSourceDelete.delete(queryset)
 
     @cache_response(
         entity="recipe",
@@ -118,13 +175,17 @@ class RecipeViewSet(AutocompleteMixin, viewsets.ModelViewSet):
 class RecipeIngredientViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.RecipeIngredientSerializer
     permission_classes = [IsOwner403Permission]
+    bulk_max_size = 100
 
     def _get_recipe(self):
-        return get_object_or_404(
-            models.Recipe,
-            id=self.kwargs.get("recipe_pk"),
-            user_id=self.request.user.telegram_id,
-        )
+        # Рецепт нужен и при валидации, и при сохранении: загружаем его один раз за запрос
+        if not hasattr(self, "_recipe"):
+            self._recipe = get_object_or_404(
+                models.Recipe,
+                id=self.kwargs.get("recipe_pk"),
+                user_id=self.request.user.telegram_id,
+            )
+        return self._recipe
 
     def get_queryset(self):
         recipe = self._get_recipe()
@@ -155,24 +216,47 @@ class RecipeIngredientViewSet(viewsets.ModelViewSet):
 
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["put", "patch"])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Пакетное сохранение ингредиентов рецепта в одной транзакции:
+        PUT заменяет список целиком (ингредиенты, которых нет в списке, удаляются),
+        PATCH добавляет ингредиенты без id и изменяет ингредиенты с id
+        """
+        data = request.data
+        if not isinstance(data, list):
+            return Response(
+                {"message": "Требуется список ингредиентов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(data) > self.bulk_max_size:
+            return Response(
+                {"message": f"Не больше {self.bulk_max_size} ингредиентов за запрос."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer(
+            self.get_queryset(),
+            data=data,
+            many=True,
+            partial=request.method == "PATCH",
+        )
+        if not serializer.is_valid():
+            raise ValidationError({"items": serializer.errors})
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class EatenFoodViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.EatenFoodSerializer
     permission_classes = [IsOwner403Permission]
+    bulk_max_size = 200
 
     def get_queryset(self):
-        ingredients_prefetch = Prefetch(
-            "recipe_food__ingredients",
-            queryset=models.RecipeIngredient.objects.select_related(
-                "base_food", "custom_food"
-            ),
-        )
-
-        return (
-            models.EatenFood.objects.filter(user_id=self.request.user.telegram_id)
-            .select_related("base_food", "custom_food", "recipe_food")
-            .prefetch_related(ingredients_prefetch)
-        )
+        return models.EatenFood.objects.filter(
+            user_id=self.request.user.telegram_id
+        ).select_related("base_food", "custom_food", "recipe_food")
 
     def list(self, request, *args, **kwargs):
         dates = FoodDataBuilder.parse_date_range(request)
@@ -194,21 +278,151 @@ class EatenFoodViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        etag = CacheHelper.make_etag(cache_key)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
         eatenfood = cache.get(cache_key)
         if eatenfood is None:
             qs = self.get_queryset()
-            eatenfood = FoodDataBuilder.eaten_food_list_data_build(qs, dates)
+            eatenfood = FoodDataBuilder.eaten_food_list_data_build(
+                qs, dates, user_id=user_id
+            )
             cache.set(cache_key, eatenfood, 60 * 5)
 
-        return Response(eatenfood, status=status.HTTP_200_OK)
+        return Response(eatenfood, status=status.HTTP_200_OK, headers={"ETag": etag})
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        """
+        Пакетное создание (POST, список записей), изменение (PATCH, список записей с id)
+        и удаление (DELETE, {"ids": [...]}) приёмов пищи в одной транзакции
+        """
+        data = request.data
+        if request.method == "DELETE":
+            data = data.get("ids") if isinstance(data, dict) else None
+
+        if not isinstance(data, list) or not data:
+            return Response(
+                {"message": "Требуется непустой список записей."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(data) > self.bulk_max_size:
+            return Response(
+                {"message": f"Не больше {self.bulk_max_size} записей за запрос."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user_id = request.user.telegram_id
+
+        if request.method == "DELETE":
+            try:
+                ids = {int(pk) for pk in data}
+            except (TypeError, ValueError):
+                return Response(
+                    {"message": "ids должен быть списком чисел."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            deleted = EatenFoodBulk.delete(user_id, ids)
+            return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
+        if request.method == "PATCH":
+            ids = [item.get("id") for item in data if isinstance(item, dict)]
+            instances = self.get_queryset().filter(
+                pk__in=[pk for pk in ids if isinstance(pk, int)]
+            )
+            serializer = self.get_serializer(
+                instances, data=data, many=True, partial=True
+            )
+        else:
+            serializer = self.get_serializer(data=data, many=True)
+
+        if not serializer.is_valid():
+            raise ValidationError({"items": serializer.errors})
+        serializer.save()
+
+        return Response(
+            serializer.data,
+            status=(
+                status.HTTP_201_CREATED
+                if request.method == "POST"
+                else status.HTTP_200_OK
+            ),
+        )
+
+    @action(detail=False, methods=["post"])
+    def copy(self, request):
+        """
+        Повтор приёмов пищи: копирует записи (по id или за день/интервал времени)
+        на указанную дату и время одним запросом INSERT ... SELECT
+        """
+        serializer = serializers.EatenFoodCopySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        source = serializer.get_source_queryset(
+            models.EatenFood.objects.filter(user_id=request.user.telegram_id)
+        )
+        copied = EatenFoodBulk.copy(
+            request.user.telegram_id, source, serializer.validated_data["target"]
+        )
+        return Response({"copied": copied}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def frequent(self, request):
+        """Частые и недавние продукты пользователя для быстрого добавления без поиска"""
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response(
+                {"message": "Параметр limit должен быть числом."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(max(limit, 1), 50)
+        user_id = request.user.telegram_id
+
+        cache_key = CacheHelper.make_cache_key(
+            "eatenfood", f"frequent:limit:{limit}", user_id
+        )
+        etag = CacheHelper.make_etag(cache_key)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        frequent = cache.get(cache_key)
+        if frequent is None:
+            frequent = FrequentFoods.top(user_id, limit)
+            cache.set(cache_key, frequent, 60 * 30)
+
+        return Response(frequent, status=status.HTTP_200_OK, headers={"ETag": etag})
 
     @method_decorator(cache_page(60 * 3))
     @method_decorator(vary_on_headers("Authorization"))
     @action(detail=False, methods=["get"])
     def nutrition_charts(self, request):
+        """
+        Отдаёт все 4 графика (или их данные при output=json). Недостающие в кэше
+        графики рендерятся в рамках запроса: пул процессов только распараллеливает
+        их рендеринг. Для одного графика — nutrition_charts/<nutrient> с ETag.
+        """
         qs = self.get_queryset()
+        output = request.query_params.get("output", "png")
+
+        if output == "json":
+            series = FoodDataBuilder.eaten_food_stats_series_build(qs, request)
+            return Response(series, status=status.HTTP_200_OK)
+
+        if output not in ChartRenderer.IMAGE_FORMATS:
+            return Response(
+                {"message": "Параметр output может быть png, svg или json."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        stats_graphs = FoodDataBuilder.eaten_food_stats_graph_draw(qs, request)
+        stats_graphs = FoodDataBuilder.eaten_food_stats_graph_draw(
+            qs, request, image_format=output
+        )
 
         return Response(
             {
@@ -219,3 +433,43 @@ class EatenFoodViewSet(viewsets.ModelViewSet):
             },
             status=status.HTTP_200_OK,
         )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=rf"nutrition_charts/(?P<nutrient>{'|'.join(ChartRenderer.NUTRIENTS)})",
+    )
+    def nutrition_chart(self, request, nutrient=None):
+        """Отдаёт один график в бинарном виде (PNG или SVG) с поддержкой ETag/Last-Modified"""
+        output = request.query_params.get("output", "png")
+        if output not in ChartRenderer.IMAGE_FORMATS:
+            return Response(
+                {"message": "Параметр output может быть png или svg."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # ETag и время рендеринга считаются по данным графика, без изображения:
+        # на 304 график не рендерится и не забирается из кэша
+        series = FoodDataBuilder.eaten_food_stats_series_build(
+            self.get_queryset(), request
+        )
+        user_id = getattr(request.user, "telegram_id", "anonymous")
+        validators = ChartRenderer.chart_validators(user_id, series, nutrient, output)
+        etag = quote_etag(validators["etag"])
+        last_modified = validators["last_modified"]
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=None if last_modified is None else int(last_modified),
+        )
+        if response is None:
+            chart = ChartRenderer.render_chart(user_id, series, nutrient, output)
+            last_modified = chart["last_modified"]
+            response = HttpResponse(chart["image"], content_type=chart["content_type"])
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(int(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
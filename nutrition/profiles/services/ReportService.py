@@ -3,8 +3,8 @@ from datetime import date, timedelta
 from typing import Optional, List
 from dataclasses import dataclass
 
-from nutrition_trecker.models import EatenFood
 from nutrition_trecker.services.FoodDataBuilder import FoodDataBuilder
+from nutrition_trecker.services.NutritionArchive import NutritionArchive
 from training.models import TrainingSession
 from training.services.TrainingDataBuilder import TrainingDataBuilder
 from profiles.models import UserProfile
@@ -87,6 +87,7 @@ class WeeklyReportConfig:
     include_previous_week: bool = True
     include_meals_detail: bool = False
     include_exercises_detail: bool = False
+    history_weeks: int = 0
 
 
 class WeeklyReportService:
@@ -203,13 +204,8 @@ class WeeklyReportService:
     # ============ ПИТАНИЕ (без изменений) ============
 
     def _get_nutrition_raw(self) -> List[dict]:
-        queryset = EatenFood.objects.filter(
-            user_id=self.user_id,
-            eaten_at__date__range=(self.start_date, self.end_date),
-        )
-
-        daily_totals = FoodDataBuilder._eaten_food_range_days_total_list_build(
-            queryset, self.start_date, self.end_date
+        daily_totals = FoodDataBuilder.daily_nutrition_totals_build(
+            self.user_id, self.start_date, self.end_date
         )
 
         days = []
@@ -266,11 +262,46 @@ class WeeklyReportService:
             if trends:
                 section["vs_previous_week"] = trends
 
+        if self.config.history_weeks:
+            section["history"] = self._get_nutrition_history()
+
         if self.config.include_meals_detail:
             section["daily_data"] = days
 
         return section
 
+    def _get_nutrition_history(self) -> List[dict]:
+        """
+        Средние кбжу по неделям за history_weeks недель до начала периода.
+        Читается из архива (DailyNutritionTotal и WeeklyNutritionTotal),
+        поэтому доступно и после удаления записей о приёмах пищи.
+        Если период начинается не с понедельника, последняя неделя истории
+        неполная и заканчивается накануне начала периода, не пересекаясь с ним.
+        """
+        last_day = self.start_date - timedelta(days=1)
+        first_day = NutritionArchive.week_start(last_day) - timedelta(
+            weeks=self.config.history_weeks - 1
+        )
+        weeks = NutritionArchive.weekly_totals(
+            self.user_id, first_day, last_day, clip=True
+        )
+
+        history = []
+        for week_start, data in weeks.items():
+            if not data["days_logged"]:
+                continue
+            history.append(
+                {
+                    "week_start": week_start,
+                    "days_logged": data["days_logged"],
+                    "averages": {
+                        self.MACRO_KEY_MAP[key]: round(data[key])
+                        for key in self.MACRO_KEY_MAP
+                    },
+                }
+            )
+        return history
+
     def _calc_compliance(self, averages: dict, profile: UserProfile) -> dict:
         compliance = {}
         targets = {
@@ -442,13 +473,8 @@ class WeeklyReportService:
         return alerts
 
     def _get_nutrition_trends(self, current_averages: dict) -> Optional[dict]:
-        prev_queryset = EatenFood.objects.filter(
-            user_id=self.user_id,
-            eaten_at__date__range=(self.previous_start_date, self.previous_end_date),
-        )
-
-        prev_totals = FoodDataBuilder._eaten_food_range_days_total_list_build(
-            prev_queryset, self.previous_start_date, self.previous_end_date
+        prev_totals = FoodDataBuilder.daily_nutrition_totals_build(
+            self.user_id, self.previous_start_date, self.previous_end_date
         )
 
         if not prev_totals:
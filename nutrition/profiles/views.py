@@ -52,6 +52,9 @@ def weekly_report_view(request):
                                              По умолчанию: false.
         include_exercises_detail (bool)     — детализация каждого упражнения в тренировках.
                                              По умолчанию: false.
+        history_weeks (int, optional)       — средние кбжу по неделям до начала периода
+                                             (из архива истории питания), 0..104.
+                                             По умолчанию: 0.
 
     Returns:
         200: JSON-отчёт (структура — см. WeeklyReportService.build_report)
@@ -83,6 +86,7 @@ def weekly_report_view(request):
         include_previous_week=params["include_previous_week"],
         include_meals_detail=params["include_meals_detail"],
         include_exercises_detail=params["include_exercises_detail"],
+        history_weeks=params["history_weeks"],
     )
 
     # 4. Строим отчёт
@@ -142,6 +146,7 @@ def _parse_weekly_report_params(request) -> dict:
         - include_previous_week: bool (по умолчанию True)
         - include_meals_detail: bool (по умолчанию False)
         - include_exercises_detail: bool (по умолчанию False)
+        - history_weeks: int, 0..104 (по умолчанию 0)
     """
     from datetime import datetime
 
@@ -151,6 +156,7 @@ def _parse_weekly_report_params(request) -> dict:
         "include_previous_week": True,
         "include_meals_detail": False,
         "include_exercises_detail": False,
+        "history_weeks": 0,
     }
 
     # --- period_days (целое число, 3..31) ---
@@ -168,6 +174,19 @@ def _parse_weekly_report_params(request) -> dict:
 
         params["period_days"] = period_days
 
+    # --- history_weeks (целое число, 0..104) ---
+    history_weeks_str = request.query_params.get("history_weeks")
+    if history_weeks_str is not None:
+        try:
+            history_weeks = int(history_weeks_str)
+        except ValueError:
+            raise ValidationError({"history_weeks": "Должен быть целым числом"})
+
+        if not 0 <= history_weeks <= 104:
+            raise ValidationError({"history_weeks": "Допустимо от 0 до 104 недель"})
+
+        params["history_weeks"] = history_weeks
+
     # --- end_date (дата в формате YYYY-MM-DD) ---
     end_date_str = request.query_params.get("end_date")
     if end_date_str is not None:
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("training", "0012_alter_customexercise_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="baseexercise",
+            name="source_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Хэш строки CSV и фото, из которых упражнение импортировано",
+                max_length=64,
+            ),
+        ),
+    ]
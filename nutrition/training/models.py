@@ -3,11 +3,10 @@ from common.models.TimeStampedModel import TimeStampedModel
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Q
-from PIL import Image
 import os
-from io import BytesIO
 from django.core.files.base import ContentFile
 from django.contrib.postgres.indexes import GinIndex
+from training.services.ThumbnailRenderer import ThumbnailRenderer
 
 # Типы упражнений
 EXERCISE_TYPE_CHOICES = [
@@ -158,6 +157,13 @@ class BaseExercise(TimeStampedModel):
         blank=True,
         editable=False,
     )
+    source_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Хэш строки CSV и фото, из которых упражнение импортировано",
+    )
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -171,23 +177,12 @@ class BaseExercise(TimeStampedModel):
             return
 
         try:
-            img = Image.open(self.image.path)
-
-            if img.mode not in ("L", "RGB", "RGBA"):
-                img = img.convert("RGB")
-
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-
-            thumb_io = BytesIO()
-            img.save(thumb_io, format="JPEG", quality=80, optimize=True)
-            thumb_io.seek(0)
-
-            filename = os.path.basename(self.image.name)
-            name, ext = os.path.splitext(filename)
-            thumb_filename = f"{name}_thumb{ext or '.jpg'}"
+            thumbnail = ThumbnailRenderer.render(self.image.path, size)
 
             self.image_thumbnail.save(
-                thumb_filename, ContentFile(thumb_io.read()), save=False
+                ThumbnailRenderer.thumbnail_filename(self.image.name),
+                ContentFile(thumbnail),
+                save=False,
             )
 
             super().save(update_fields=["image_thumbnail"])
@@ -0,0 +1,243 @@
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from training.models import (
+    BaseExercise,
+    MUSCLE_GROUP_CHOICES,
+    EXERCISE_TYPE_CHOICES,
+    EQUIPMENT_CHOICES,
+)
+from training.services.ThumbnailRenderer import ThumbnailRenderer
+from common.utils.CacheHelper import CacheHelper
+from typing import Dict, IO, List, Optional, TextIO, Tuple, TypedDict
+import hashlib
+import json
+import csv
+import os
+
+
+class ImportStats(TypedDict):
+    created: int
+    updated: int
+    unchanged: int
+    thumbnails: int
+
+
+class BaseExerciseImport:
+    """
+    Импорт базовых упражнений из CSV. Для каждой строки считается хэш её полей
+    и содержимого фото (BaseExercise.source_hash): неизменившиеся упражнения
+    пропускаются, новые и изменённые записываются пакетами (bulk_create/bulk_update)
+    без сигналов на каждую строку. Миниатюры создаются после записи в пуле процессов,
+    версия кэша base_exercise увеличивается один раз.
+    """
+
+    BATCH_SIZE = 500
+    FIELDS = (
+        "primary_muscle_group",
+        "secondary_muscle_group",
+        "exercise_type",
+        "equipment_type",
+        "description",
+    )
+
+    @classmethod
+    def _digest(cls, file: IO[bytes]) -> str:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def _stored_digest(cls, image: FieldFile) -> str:
+        if not image or not image.storage.exists(image.name):
+            return ""
+        with image.storage.open(image.name, "rb") as file:
+            return cls._digest(file)
+
+    @classmethod
+    def _parse_row(cls, row: Dict[str, str]) -> Tuple[Optional[dict], Optional[str]]:
+        """Возвращает поля упражнения или описание ошибки строки."""
+        valid_muscle_groups = {choice[0] for choice in MUSCLE_GROUP_CHOICES}
+
+        primary_muscle = (row.get("primary_muscle_group") or "").strip()
+        if primary_muscle not in valid_muscle_groups:
+            return None, f"неверная группа мышц '{primary_muscle}'"
+
+        secondary_muscle = (row.get("secondary_muscle_group") or "").strip()
+        if secondary_muscle in ("", "NONE"):
+            secondary_muscle = None
+        elif secondary_muscle not in valid_muscle_groups:
+            return None, f"неверная вторичная группа мышц '{secondary_muscle}'"
+
+        exercise_type = (row.get("exercise_type") or "").strip()
+        if exercise_type not in {choice[0] for choice in EXERCISE_TYPE_CHOICES}:
+            return None, f"неверный тип упражнения '{exercise_type}'"
+
+        equipment = (row.get("equipment") or "").strip()
+        if equipment not in {choice[0] for choice in EQUIPMENT_CHOICES}:
+            return None, f"неверный тип оборудования '{equipment}'"
+
+        return {
+            "primary_muscle_group": primary_muscle,
+            "secondary_muscle_group": secondary_muscle,
+            "exercise_type": exercise_type,
+            "equipment_type": equipment,
+            "description": (row.get("description") or "").strip(),
+        }, None
+
+    @classmethod
+    def read(cls, file: TextIO, image_dir: str) -> Tuple[Dict[str, dict], List[str]]:
+        """
+        Читает и проверяет строки CSV. Возвращает {название: строка} с полями,
+        путём к фото и хэшем строки, а также предупреждения о пропущенных строках.
+        При повторе названия используется последняя строка.
+        """
+        rows = dict()
+        warnings = []
+        for number, row in enumerate(csv.DictReader(file), start=1):
+            name = (row.get("name") or "").strip()
+            if not name:
+                warnings.append(f"Строка {number}: пропущено (нет названия)")
+                continue
+
+            fields, error = cls._parse_row(row)
+            if error:
+                warnings.append(f"Строка {number} ({name}): пропущено - {error}")
+                continue
+
+            image_filename = (row.get("image_filename") or "").strip()
+            image_path = None
+            image_digest = ""
+            if image_filename:
+                path = os.path.join(image_dir, image_filename)
+                if os.path.exists(path):
+                    image_path = path
+                    with open(path, "rb") as image:
+                        image_digest = cls._digest(image)
+                else:
+                    warnings.append(f"Файл {image_filename} не найден в {image_dir}")
+
+            payload = json.dumps(
+                [[fields[key] for key in cls.FIELDS], image_filename, image_digest],
+                ensure_ascii=False,
+            )
+            rows[name] = {
+                "fields": fields,
+                "image_filename": image_filename,
+                "image_path": image_path,
+                "image_digest": image_digest,
+                "source_hash": hashlib.sha256(payload.encode("utf-8")).hexdigest(),
+            }
+        return rows, warnings
+
+    @classmethod
+    def _apply(cls, exercise: BaseExercise, row: dict) -> Tuple[List[str], List[str]]:
+        """
+        Переносит строку в объект (без сохранения в БД). Фото копируется в хранилище,
+        только если его содержимое изменилось. Возвращает записанные и заменённые файлы.
+        """
+        for field, value in row["fields"].items():
+            setattr(exercise, field, value)
+        exercise.source_hash = row["source_hash"]
+
+        if not row["image_path"] or (
+            cls._stored_digest(exercise.image) == row["image_digest"]
+        ):
+            return [], []
+
+        replaced = [f.name for f in (exercise.image, exercise.image_thumbnail) if f]
+        with open(row["image_path"], "rb") as image:
+            exercise.image.save(row["image_filename"], File(image), save=False)
+        exercise.image_thumbnail = None
+        return [exercise.image.name], replaced
+
+    @classmethod
+    def create_thumbnails(cls, workers: Optional[int] = None) -> int:
+        """Создаёт недостающие миниатюры (в пуле процессов), возвращает их число."""
+        exercises = list(
+            BaseExercise.objects.exclude(image="").filter(
+                Q(image_thumbnail="") | Q(image_thumbnail__isnull=True)
+            )
+        )
+        if not exercises:
+            return 0
+
+        thumbnails = ThumbnailRenderer.render_many(
+            [exercise.image.path for exercise in exercises], workers
+        )
+        rendered = []
+        for exercise, thumbnail in zip(exercises, thumbnails):
+            if thumbnail is None:
+                continue
+            exercise.image_thumbnail.save(
+                ThumbnailRenderer.thumbnail_filename(exercise.image.name),
+                ContentFile(thumbnail),
+                save=False,
+            )
+            rendered.append(exercise)
+        BaseExercise.objects.bulk_update(
+            rendered, ["image_thumbnail"], batch_size=cls.BATCH_SIZE
+        )
+        return len(rendered)
+
+    @classmethod
+    def save(cls, rows: Dict[str, dict], workers: Optional[int] = None) -> ImportStats:
+        """Записывает новые и изменённые упражнения, затем создаёт миниатюры."""
+        existing = dict()
+        for exercise in BaseExercise.objects.order_by("id"):
+            existing.setdefault(exercise.name, exercise)
+
+        storage = BaseExercise._meta.get_field("image").storage
+        created, updated, written, replaced = [], [], [], []
+        now = timezone.now()
+        try:
+            for name, row in rows.items():
+                exercise = existing.get(name)
+                if exercise is not None and exercise.source_hash == row["source_hash"]:
+                    continue
+                if exercise is None:
+                    exercise = BaseExercise(name=name)
+                    created.append(exercise)
+                else:
+                    exercise.updated_at = now
+                    updated.append(exercise)
+                new_files, old_files = cls._apply(exercise, row)
+                written += new_files
+                replaced += old_files
+
+            with transaction.atomic():
+                BaseExercise.objects.bulk_create(created, batch_size=cls.BATCH_SIZE)
+                BaseExercise.objects.bulk_update(
+                    updated,
+                    [
+                        *cls.FIELDS,
+                        "image",
+                        "image_thumbnail",
+                        "source_hash",
+                        "updated_at",
+                    ],
+                    batch_size=cls.BATCH_SIZE,
+                )
+        except Exception:
+            # Скопированные фото не попали в БД: удаляем их, старые файлы остаются
+            for name in written:
+                storage.delete(name)
+            raise
+
+        for name in replaced:
+            storage.delete(name)
+
+        thumbnails = cls.create_thumbnails(workers)
+        if created or updated or thumbnails:
+            CacheHelper.invalidate(["base_exercise"])
+
+        return {
+            "created": len(created),
+            "updated": len(updated),
+            "unchanged": len(rows) - len(created) - len(updated),
+            "thumbnails": thumbnails,
+        }
@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from PIL import Image
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+import multiprocessing
+import logging
+import os
+
+logger = logging.getLogger("nutrition")
+
+THUMBNAIL_SIZE = (150, 150)
+
+
+def _render_thumbnail(image_path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> bytes:
+    """
+    Возвращает JPEG-миниатюру изображения. Модуль не импортирует модели,
+    поэтому функция может выполняться в пуле процессов (spawn) без настройки Django.
+    """
+    img = Image.open(image_path)
+
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGB")
+
+    img.thumbnail(size, Image.Resampling.LANCZOS)
+
+    thumb_io = BytesIO()
+    img.save(thumb_io, format="JPEG", quality=80, optimize=True)
+    return thumb_io.getvalue()
+
+
+class ThumbnailRenderer:
+    """Класс для создания миниатюр изображений упражнений"""
+
+    @classmethod
+    def thumbnail_filename(cls, image_name: str) -> str:
+        name, ext = os.path.splitext(os.path.basename(image_name))
+        return f"{name}_thumb{ext or '.jpg'}"
+
+    @classmethod
+    def render(cls, image_path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> bytes:
+        return _render_thumbnail(image_path, size)
+
+    @classmethod
+    def _result(cls, image_path: str, render: Callable[[], bytes]) -> Optional[bytes]:
+        try:
+            return render()
+        except Exception as e:
+            logger.warning(f"Thumbnail for {image_path} failed: {e}")
+            return None
+
+    @classmethod
+    def render_many(
+        cls, image_paths: List[str], workers: Optional[int] = None
+    ) -> List[Optional[bytes]]:
+        """
+        Возвращает миниатюры в порядке image_paths (None, если изображение не открылось).
+        Несколько изображений рендерятся в пуле из workers процессов.
+        """
+        workers = min(workers or os.cpu_count() or 1, len(image_paths))
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = [
+                    executor.submit(_render_thumbnail, path) for path in image_paths
+                ]
+                return [
+                    cls._result(path, future.result)
+                    for path, future in zip(image_paths, futures)
+                ]
+        return [
+            cls._result(path, partial(_render_thumbnail, path)) for path in image_paths
+        ]
@@ -15,30 +15,28 @@ logger = logging.getLogger("nutrition")
 
 @receiver([post_save, post_delete], sender=BaseExercise)
 def invalidate_base_exercise_cache(sender, instance, **kwargs):
-    CacheHelper.bump_cache_version("base_exercise")
+    CacheHelper.invalidate(["base_exercise"])
     logger.info("BaseExercise version bumped (global)")
 
 
 @receiver([post_save, post_delete], sender=CustomExercise)
 def invalidate_custom_exercise_cache(sender, instance, **kwargs):
     user_id = instance.user_id
-    CacheHelper.bump_cache_version("custom_exercise", user_id)
+    CacheHelper.invalidate(["custom_exercise"], user_id)
     logger.info(f"CustomExercise version bumped for user {user_id}")
 
 
 @receiver([post_save, post_delete], sender=TrainingSession)
 def invalidate_session_cache(sender, instance, **kwargs):
     user_id = instance.user_id
-    CacheHelper.bump_cache_version("training_session", user_id)
+    CacheHelper.invalidate(["training_session"], user_id)
     logger.info(f"TrainingSession version bumped for user {user_id}")
 
 
 @receiver([post_save, post_delete], sender=CompletedExercise)
 def invalidate_completed_exercise_cache(sender, instance, **kwargs):
     user_id = instance.user_id
-    CacheHelper.bump_cache_version("completed_exercise", user_id)
-
-    CacheHelper.bump_cache_version("training_session", user_id)
+    CacheHelper.invalidate(["completed_exercise", "training_session"], user_id)
     logger.info(
         f"CompletedExercise & TrainingSession version bumped for user {user_id}"
     )
@@ -47,6 +45,5 @@ def invalidate_completed_exercise_cache(sender, instance, **kwargs):
 @receiver([post_save, post_delete], sender=ExerciseSet)
 def invalidate_exercise_set_cache(sender, instance, **kwargs):
     user_id = instance.user_id
-    CacheHelper.bump_cache_version("training_session", user_id)
-    CacheHelper.bump_cache_version("exercise_set", user_id)
+    CacheHelper.invalidate(["training_session", "exercise_set"], user_id)
     logger.info(f"ExerciseSet & TrainingSession version bumped for user {user_id}")
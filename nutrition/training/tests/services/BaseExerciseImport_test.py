@@ -0,0 +1,148 @@
+import pytest
+import os
+from io import StringIO
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from training.models import BaseExercise
+from training.services.BaseExerciseImport import BaseExerciseImport
+from common.utils.CacheHelper import CacheHelper
+
+CSV = (
+    "name,primary_muscle_group,secondary_muscle_group,exercise_type,"
+    "description,equipment,image_filename\n"
+    "Жим штанги лежа,CHEST,TRICEPS,STRENGTH,Жим,BARBELL,bench.jpg\n"
+    "Приседания,QUADS,NONE,STRENGTH,Присед,BARBELL,squat.jpg\n"
+)
+
+
+def import_csv(image_dir, text=CSV, workers=1):
+    rows, warnings = BaseExerciseImport.read(StringIO(text), str(image_dir))
+    return BaseExerciseImport.save(rows, workers=workers), warnings
+
+
+def media_files(media_root):
+    return sorted(
+        os.path.relpath(os.path.join(path, name), media_root)
+        for path, _, names in os.walk(media_root)
+        for name in names
+    )
+
+
+@pytest.fixture
+def photos(make_image):
+    make_image("bench.jpg", color="red")
+    make_image("squat.jpg", color="blue")
+
+
+@pytest.mark.django_db
+class TestBaseExerciseImport:
+    def test_import_creates_exercises_and_thumbnails(
+        self, image_dir, photos, media_root
+    ):
+        stats, warnings = import_csv(image_dir)
+
+        assert warnings == []
+        assert stats == {"created": 2, "updated": 0, "unchanged": 0, "thumbnails": 2}
+        squat = BaseExercise.objects.get(name="Приседания")
+        assert squat.secondary_muscle_group is None
+        assert squat.source_hash
+        assert os.path.exists(squat.image.path)
+        assert os.path.exists(squat.image_thumbnail.path)
+
+    def test_unchanged_file_makes_no_writes(
+        self, image_dir, photos, media_root, django_capture_on_commit_callbacks
+    ):
+        import_csv(image_dir)
+        files = media_files(media_root)
+        cache.clear()
+        version = CacheHelper.get_cache_version("base_exercise")
+
+        with CaptureQueriesContext(connection) as queries:
+            with django_capture_on_commit_callbacks(execute=True):
+                stats, _ = import_csv(image_dir)
+
+        assert stats == {"created": 0, "updated": 0, "unchanged": 2, "thumbnails": 0}
+        assert not [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        assert media_files(media_root) == files
+        assert CacheHelper.get_cache_version("base_exercise") == version
+
+    def test_changed_photo_replaces_files(
+        self, image_dir, photos, make_image, media_root
+    ):
+        import_csv(image_dir)
+        old = BaseExercise.objects.get(name="Жим штанги лежа")
+        old_files = [old.image.path, old.image_thumbnail.path]
+        squat = BaseExercise.objects.get(name="Приседания")
+        squat_files = [squat.image.path, squat.image_thumbnail.path]
+
+        make_image("bench.jpg", color="green")
+        stats, _ = import_csv(image_dir)
+
+        assert stats == {"created": 0, "updated": 1, "unchanged": 1, "thumbnails": 1}
+        new = BaseExercise.objects.get(pk=old.pk)
+        assert new.source_hash != old.source_hash
+        assert new.image.path not in old_files
+        assert os.path.exists(new.image.path)
+        assert os.path.exists(new.image_thumbnail.path)
+        assert not any(os.path.exists(path) for path in old_files)
+        assert all(os.path.exists(path) for path in squat_files)
+        assert len(media_files(media_root)) == 4
+
+    def test_description_change_keeps_photo(self, image_dir, photos, media_root):
+        import_csv(image_dir)
+        files = media_files(media_root)
+
+        stats, _ = import_csv(image_dir, CSV.replace(",Жим,", ",Новое описание,"))
+
+        assert stats["updated"] == 1
+        assert stats["thumbnails"] == 0
+        assert media_files(media_root) == files
+        assert (
+            BaseExercise.objects.get(name="Жим штанги лежа").description
+            == "Новое описание"
+        )
+
+    def test_cache_version_bumped_once(
+        self, image_dir, photos, media_root, django_capture_on_commit_callbacks
+    ):
+        cache.clear()
+        version = CacheHelper.get_cache_version("base_exercise")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            import_csv(image_dir)
+
+        assert CacheHelper.get_cache_version("base_exercise") == version + 1
+
+    def test_failed_write_deletes_copied_photos(
+        self, image_dir, photos, media_root, monkeypatch
+    ):
+        def fail(*args, **kwargs):
+            raise DatabaseError("write failed")
+
+        monkeypatch.setattr(BaseExercise.objects, "bulk_create", fail)
+
+        with pytest.raises(DatabaseError):
+            import_csv(image_dir)
+
+        assert media_files(media_root) == []
+        assert not BaseExercise.objects.exists()
+
+    def test_read_skips_invalid_rows(self, image_dir, photos):
+        rows, warnings = BaseExerciseImport.read(
+            StringIO(
+                CSV
+                + "Тяга,BACK,NONE,STRENGTH,,ROPE,\n"
+                + ",BACK,NONE,STRENGTH,,BARBELL,\n"
+                + "Подтягивания,BACK,BICEPS,STRENGTH,,PULL_UP_BAR,pullup.jpg\n"
+            ),
+            str(image_dir),
+        )
+
+        assert list(rows) == ["Жим штанги лежа", "Приседания", "Подтягивания"]
+        assert rows["Подтягивания"]["image_path"] is None
+        assert len(warnings) == 3
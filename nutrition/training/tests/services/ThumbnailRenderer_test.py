@@ -0,0 +1,44 @@
+import pytest
+from io import BytesIO
+from PIL import Image
+from training.services.ThumbnailRenderer import ThumbnailRenderer
+
+
+def size_of(thumbnail):
+    return Image.open(BytesIO(thumbnail)).size
+
+
+class TestThumbnailRenderer:
+    def test_thumbnail_filename(self):
+        assert (
+            ThumbnailRenderer.thumbnail_filename("photos/base_exercises/squat.png")
+            == "squat_thumb.png"
+        )
+        assert ThumbnailRenderer.thumbnail_filename("squat") == "squat_thumb.jpg"
+
+    def test_render_keeps_aspect_ratio(self, make_image):
+        thumbnail = ThumbnailRenderer.render(str(make_image("wide.jpg", (600, 300))))
+
+        assert size_of(thumbnail) == (150, 75)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_render_many_keeps_order(self, make_image, image_dir, workers):
+        broken = image_dir / "broken.jpg"
+        broken.write_bytes(b"not an image")
+        paths = [
+            str(make_image("wide.jpg", (600, 300))),
+            str(broken),
+            str(make_image("tall.jpg", (300, 600))),
+            str(image_dir / "missing.jpg"),
+        ]
+
+        thumbnails = ThumbnailRenderer.render_many(paths, workers=workers)
+
+        assert len(thumbnails) == 4
+        assert size_of(thumbnails[0]) == (150, 75)
+        assert thumbnails[1] is None
+        assert size_of(thumbnails[2]) == (75, 150)
+        assert thumbnails[3] is None
+
+    def test_render_many_empty(self):
+        assert ThumbnailRenderer.render_many([]) == []
@@ -0,0 +1,24 @@
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    path = tmp_path / "photos"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def make_image(image_dir):
+    def make(filename, size=(300, 200), color="red"):
+        Image.new("RGB", size, color).save(image_dir / filename, format="JPEG")
+        return image_dir / filename
+
+    return make
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
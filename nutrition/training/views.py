@@ -8,7 +8,6 @@ from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from common.permissions.IsOwner403Permission import IsOwner403Permission
 from common.mixins.AutocompleteMixin import AutocompleteMixin
-from django.core.cache import cache
 from training.services.TrainingDataBuilder import TrainingDataBuilder
 from common.decorators.cache_response import cache_response
 
@@ -19,6 +18,7 @@ class BaseExerciseViewSet(AutocompleteMixin, viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, FuzzySearchFilter]
     filterset_fields = ["primary_muscle_group", "exercise_type", "equipment_type"]
     search_fields = ["name"]
+    autocomplete_index_entity = "base_exercise"
 
     def get_serializer_class(self):
         """Выбираем сериализатор в зависимости от действия"""
@@ -58,6 +58,8 @@ class CustomExerciseViewSet(AutocompleteMixin, viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, FuzzySearchFilter]
     filterset_fields = ["primary_muscle_group", "exercise_type", "equipment_type"]
     search_fields = ["name"]
+    autocomplete_index_entity = "custom_exercise"
+    autocomplete_index_per_user = True
 
     def get_queryset(self):
         return models.CustomExercise.objects.filter(
@@ -229,22 +231,18 @@ class ExerciseSetViewSet(viewsets.ModelViewSet):
 
 
 class TagsView(APIView):
+    @cache_response(entity="tags", ttl=60 * 60 * 24 * 7)
     def get(self, request):
-        cache_key = "tags"
-        data = cache.get(cache_key)
-
-        if not data:
-            data = {
-                "muscle_groups": [
-                    {"value": k, "label": v} for k, v in models.MUSCLE_GROUP_CHOICES
-                ],
-                "exercise_types": [
-                    {"value": k, "label": v} for k, v in models.EXERCISE_TYPE_CHOICES
-                ],
-                "equipment_types": [
-                    {"value": k, "label": v} for k, v in models.EQUIPMENT_CHOICES
-                ],
-            }
-            cache.set(cache_key, data, 60 * 60 * 24 * 7)
+        data = {
+            "muscle_groups": [
+                {"value": k, "label": v} for k, v in models.MUSCLE_GROUP_CHOICES
+            ],
+            "exercise_types": [
+                {"value": k, "label": v} for k, v in models.EXERCISE_TYPE_CHOICES
+            ],
+            "equipment_types": [
+                {"value": k, "label": v} for k, v in models.EQUIPMENT_CHOICES
+            ],
+        }
 
         return Response(data)